@@ -119,7 +119,7 @@ class ModifiedGapEncoderColumn(GapEncoderColumn):
                 break  # Stop if the change in W is smaller than the tolerance
 
         # Update self.H_dict_ with the learned encoded vectors (activations)
-        self.H_dict_.update(zip(unq_X, unq_H))
+        self.H_dict_.update(unq_X, unq_H)
         return self
 
 
@@ -0,0 +1,148 @@
+"""
+Benchmark the accuracy and the latency of the transform of the GapEncoder
+on the traffic_violations dataset, for several numbers of iterations, with
+and without the approximate mode initializing the activations of the unseen
+strings from the topics.
+
+The encoding with the default parameters (100 iterations from uniform
+activations) is used as reference: we report the relative error of the
+encoding of the test set, and the balanced accuracy of a classifier trained
+on the reference encoding of the train set and evaluated on the encoding of
+the test set.
+
+Date: October 2026
+"""
+
+from functools import lru_cache
+from time import perf_counter
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.metrics import balanced_accuracy_score
+from sklearn.model_selection import train_test_split
+from utils import default_parser, find_result, monitor
+
+from skrub import GapEncoder
+from skrub.datasets import fetch_traffic_violations
+
+
+@lru_cache
+def fit_reference(high_card_feature: str, max_rows: int):
+    ds = fetch_traffic_violations()
+    X = np.array(ds.X[high_card_feature]).reshape(-1, 1).astype(str)
+    y = ds.y
+    X_train, X_test, y_train, y_test = train_test_split(
+        X[:max_rows], y[:max_rows], test_size=0.2, random_state=0
+    )
+    gap = GapEncoder(batch_size=512, random_state=0).fit(X_train)
+    clf = HistGradientBoostingClassifier().fit(gap.transform(X_train), y_train)
+    H_test = gap.transform(X_test)
+    return gap, clf, X_test, y_test, H_test
+
+
+benchmark_name = "gap_encoder_benchmark_transform"
+
+
+@monitor(
+    memory=False,
+    time=False,
+    parametrize={
+        "high_card_feature": [
+            "description",
+            "location",
+            "search_reason_for_stop",
+            "charge",
+            "driver_city",
+        ],
+        "max_rows": [20_000, 100_000],
+        "approximate_transform": [False, True],
+        "transform_max_iter": [1, 2, 3, 5, 10, 100],
+    },
+    save_as=benchmark_name,
+    repeat=3,
+)
+def benchmark(
+    high_card_feature: str,
+    max_rows: int,
+    approximate_transform: bool,
+    transform_max_iter: int,
+):
+    gap, clf, X_test, y_test, H_test = fit_reference(high_card_feature, max_rows)
+    gap.set_params(
+        approximate_transform=approximate_transform,
+        transform_max_iter=transform_max_iter,
+    )
+    start_time = perf_counter()
+    H = gap.transform(X_test)
+    end_time = perf_counter()
+    gap.set_params(approximate_transform=False, transform_max_iter=None)
+
+    return {
+        "time_transform": end_time - start_time,
+        "relative_error": np.abs(H - H_test).sum() / np.abs(H_test).sum(),
+        "balanced_accuracy_hgb_test": balanced_accuracy_score(y_test, clf.predict(H)),
+        "balanced_accuracy_hgb_test_reference": balanced_accuracy_score(
+            y_test, clf.predict(H_test)
+        ),
+        "test_size": X_test.shape[0],
+    }
+
+
+def plot(df: pd.DataFrame):
+    for y, ylabel in [
+        ("time_transform", "Time (s)"),
+        ("relative_error", "Relative error"),
+    ]:
+        sns.lineplot(
+            x="transform_max_iter",
+            y=y,
+            data=df[df["max_rows"] == df["max_rows"].max()],
+            hue="high_card_feature",
+            style="approximate_transform",
+        )
+        plt.xscale("log")
+        plt.yscale("log")
+        # put the legend out of the figure
+        plt.legend(bbox_to_anchor=(1.05, 1), loc=2, borderaxespad=0.0)
+        plt.ylabel(ylabel)
+        plt.xlabel("transform_max_iter")
+        plt.title("Transform of the test set")
+        # make sure the plot is not cut
+        plt.tight_layout()
+        plt.show()
+
+    sns.scatterplot(
+        x="time_transform",
+        y="balanced_accuracy_hgb_test",
+        data=df,
+        hue="transform_max_iter",
+        style="approximate_transform",
+    )
+    plt.xscale("log")
+    plt.legend(bbox_to_anchor=(1.05, 1), loc=2, borderaxespad=0.0)
+    plt.ylabel("Balanced accuracy")
+    plt.xlabel("Time (s)")
+    plt.title("Accuracy versus latency of the transform")
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    _args = ArgumentParser(
+        description="Benchmark for the approximate transform of the GapEncoder.",
+        parents=[default_parser],
+    ).parse_args()
+
+    if _args.run:
+        df = benchmark()
+    else:
+        result_file = find_result(benchmark_name)
+        df = pd.read_parquet(result_file)
+
+    if _args.plot:
+        plot(df)
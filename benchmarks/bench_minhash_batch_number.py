@@ -5,6 +5,9 @@ which is the batched version with batch_per_job=1
 (the batch_per_job parameter has no effect on the results)
 
 Date: February 2023
+
+With ``--hashing``, compares instead the ``fast`` and ``oph`` (one permutation
+hashing) options of skrub's MinHashEncoder, for several numbers of components.
 """
 
 import pickle
@@ -22,6 +25,7 @@ from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.utils import gen_even_slices, murmurhash3_32
 from utils import default_parser, find_result, monitor
 
+from skrub import MinHashEncoder as SkrubMinHashEncoder
 from skrub._fast_hash import ngram_min_hash
 from skrub._string_distances import get_unique_ngrams
 from skrub._utils import LRUDict, check_input
@@ -400,6 +404,39 @@ def benchmark(
     ).transform(X)
 
 
+benchmark_hashing_name = "bench_minhash_hashing"
+
+
+@monitor(
+    memory=True,
+    time=True,
+    parametrize={
+        "dataset_size": ["medium"],
+        "hashing": ["fast", "oph"],
+        "n_components": [30, 100, 300],
+    },
+    save_as=benchmark_hashing_name,
+    repeat=10,
+)
+def benchmark_hashing(
+    dataset_size: str,
+    hashing: str,
+    n_components: int,
+) -> dict[str, int]:
+    X = data[dataset_size]
+    SkrubMinHashEncoder(hashing=hashing, n_components=n_components).fit(X).transform(X)
+    # The time and memory are only recorded along with returned values
+    return {"n_samples": X.shape[0]}
+
+
+def plot_hashing(df: pd.DataFrame):
+    sns.set_theme(style="ticks", palette="pastel")
+    sns.boxplot(x="n_components", y="time", hue="hashing", data=df)
+    plt.yscale("log")
+    plt.tight_layout()
+    plt.show()
+
+
 def plot(df: pd.DataFrame):
     sns.set_theme(style="ticks", palette="pastel")
 
@@ -419,10 +456,16 @@ def plot(df: pd.DataFrame):
 
 
 if __name__ == "__main__":
-    _args = ArgumentParser(
+    _parser = ArgumentParser(
         description="Benchmark for the batch feature of the MinHashEncoder.",
         parents=[default_parser],
-    ).parse_args()
+    )
+    _parser.add_argument(
+        "--hashing",
+        help="Compares the 'fast' and 'oph' hashing of skrub's MinHashEncoder.",
+        action="store_true",
+    )
+    _args = _parser.parse_args()
 
     # Generate the data if not already on disk, and keep them in memory.
     data = {}  # Will hold the datasets in memory.
@@ -441,11 +484,20 @@ if __name__ == "__main__":
                 pickle.dump(_gen, fl)
                 data.update({name: _gen})
 
+    if _args.hashing:
+        _benchmark, _name, _plot = (
+            benchmark_hashing,
+            benchmark_hashing_name,
+            plot_hashing,
+        )
+    else:
+        _benchmark, _name, _plot = benchmark, benchmark_name, plot
+
     if _args.run:
-        df = benchmark()
+        df = _benchmark()
     else:
-        result_file = find_result(benchmark_name)
+        result_file = find_result(_name)
         df = pd.read_parquet(result_file)
 
     if _args.plot:
-        plot(df)
+        _plot(df)
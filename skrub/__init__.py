@@ -12,6 +12,8 @@ from ._gap_encoder import GapEncoder
 from ._interpolation_joiner import InterpolationJoiner
 from ._joiner import Joiner
 from ._minhash_encoder import MinHashEncoder
+from ._minhash_lsh import MinHashLSH
+from ._ngram_index import NgramIndex
 from ._select_cols import DropCols, SelectCols
 from ._similarity_encoder import SimilarityEncoder
 from ._table_vectorizer import TableVectorizer
@@ -29,6 +31,8 @@ __all__ = [
     "GapEncoder",
     "InterpolationJoiner",
     "MinHashEncoder",
+    "MinHashLSH",
+    "NgramIndex",
     "SimilarityEncoder",
     "TableVectorizer",
     "deduplicate",
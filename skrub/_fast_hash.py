@@ -2,8 +2,8 @@
 n-gram hashing by simple dot products
 
 The principle is as follows:
-  1. A string is viewed as a succession of numbers (the ASCII or UTF8
-     representation of its elements).
+  1. A string is viewed as a succession of numbers (the Unicode code points
+     of its characters).
   2. Each n-gram is then an n-dimensional vector of integers "g". A simple
      hash function is then computed by taking the dot product with a
      given random vector "atom", modulo max-int (integers larger than
@@ -17,6 +17,7 @@ The principle is as follows:
 import functools
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 # Precompute to avoid the cost and
 # cast to int32 to speed up the min
@@ -75,8 +76,8 @@ def ngram_min_hash(
     int or tuple
         The min_hash or (min_hash, max_hash) of the n-grams of the string.
     """
-    # Create a numerical 1D array from the string
-    array = np.frombuffer(string.encode(), dtype="int8", count=len(string))
+    # Create a numerical 1D array from the string: its Unicode code points
+    array = np.frombuffer(string.encode("utf-32-le", "surrogatepass"), dtype=np.int32)
 
     max_hash = MININT32
     min_hash = MAXINT32
@@ -94,3 +95,302 @@ def ngram_min_hash(
     if return_minmax:
         return min_hash, max_hash
     return min_hash
+
+
+# Maximum number of strings hashed together by the batched kernels. Strings are
+# sorted by length before being split in chunks, so that the zero-padding of
+# each chunk stays small even when a few strings are very long.
+_CHUNK_SIZE = 1024
+
+# Maximum number of n-gram hashes (n_strings * n_windows * n_seeds) held in
+# memory at once by the batched kernels.
+_CHUNK_ELEMENTS = 2**22
+
+
+def _string_lengths(strings):
+    """Number of characters of each string of an object or unicode array."""
+    if strings.dtype.kind == "U":
+        return np.char.str_len(strings).astype(np.int64)
+    return np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+
+
+def _pack_strings(strings, width):
+    """
+    Pack strings into a zero-padded matrix of Unicode code points.
+
+    NumPy stores ``U`` arrays as fixed-width UCS-4 buffers padded with zeros,
+    so once the strings are in a ``U`` array their code points are obtained
+    with a zero-copy view as 32-bit integers, without encoding each string.
+
+    Parameters
+    ----------
+    strings : ndarray of shape (n_strings, )
+        The strings to pack, as an object or unicode array.
+    width : int
+        The length of the longest string.
+
+    Returns
+    -------
+    ndarray of shape (n_strings, width)
+        The int32 code points of the strings, padded with zeros on the right.
+    """
+    strings = np.ascontiguousarray(strings.astype(f"U{max(width, 1)}"))
+    return strings.view(np.int32).reshape(len(strings), -1)
+
+
+def _iter_chunks(lengths, n_seeds):
+    """
+    Split strings in chunks of similar lengths.
+
+    Yields arrays of indices into ``lengths``, such that the hashes of each
+    chunk hold at most about ``_CHUNK_ELEMENTS`` values.
+    """
+    order = np.argsort(lengths, kind="stable")
+    start = 0
+    while start < len(order):
+        stop = min(start + _CHUNK_SIZE, len(order))
+        # lengths are sorted: the last string of the chunk is the longest
+        width = max(lengths[order[stop - 1]], 1)
+        stop = min(stop, start + max(1, _CHUNK_ELEMENTS // (width * n_seeds)))
+        yield order[start:stop]
+        start = stop
+
+
+def _window_min_max(matrix, lengths, atoms):
+    """
+    Min and max of the sliding-window hashes of packed strings.
+
+    This is the vectorized equivalent of ``np.correlate(array, atom)`` for each
+    row of ``matrix`` and each row of ``atoms``, including the case of strings
+    shorter than the atom, for which ``np.correlate`` slides the string along
+    the atom instead. Rows without any window (empty strings) get ``MAXINT32``
+    as min and ``MININT32`` as max.
+
+    Parameters
+    ----------
+    matrix : ndarray of shape (n_strings, width)
+        The packed strings, see ``_pack_strings``.
+    lengths : ndarray of shape (n_strings, )
+        The length of each string.
+    atoms : ndarray of shape (n_seeds, atom_len)
+        The random vectors used to hash the n-grams, one per seed.
+
+    Returns
+    -------
+    min_hash, max_hash : ndarray of shape (n_strings, n_seeds)
+        The min and max hash of each row, for each seed.
+    """
+    atom_len = atoms.shape[1]
+    if matrix.shape[1] < atom_len:
+        matrix = np.pad(matrix, ((0, 0), (0, atom_len - matrix.shape[1])))
+
+    # Strings at least as long as the atom: hash every n-gram of every string
+    # for every seed with a single product between the (strided, zero-copy)
+    # sliding windows and the atoms.
+    # Integer overflow wraps around, as in np.correlate.
+    windows = sliding_window_view(matrix, atom_len, axis=1)
+    hashes = windows @ atoms.T
+    valid = (np.arange(windows.shape[1]) <= (lengths - atom_len)[:, None])[..., None]
+    min_hash = np.where(valid, hashes, MAXINT32).min(axis=1)
+    max_hash = np.where(valid, hashes, MININT32).max(axis=1)
+
+    # Strings shorter than the atom: slide the string along the atom.
+    short = (lengths < atom_len) & (lengths > 0)
+    if short.any():
+        sub = matrix[short, :atom_len]
+        short_hashes = np.empty((sub.shape[0], atom_len, len(atoms)), dtype=np.int32)
+        for k in range(atom_len):
+            short_hashes[:, k] = sub[:, : atom_len - k] @ atoms[:, k:].T
+        valid = (np.arange(atom_len) <= (atom_len - lengths[short])[:, None])[..., None]
+        min_hash[short] = np.where(valid, short_hashes, MAXINT32).min(axis=1)
+        max_hash[short] = np.where(valid, short_hashes, MININT32).max(axis=1)
+
+    return min_hash, max_hash
+
+
+def ngram_min_hash_batch(
+    strings,
+    ngram_range: tuple[int, int] = (2, 4),
+    seed=0,
+    return_minmax=False,
+):
+    """
+    Compute the min/max hash of the ngrams of several strings at once.
+
+    This gives the same result as calling ``ngram_min_hash`` on each string
+    (and each seed), but the strings are packed in a padded matrix of Unicode
+    code points and the hashes of all the n-grams are computed with vectorized
+    operations.
+    When several seeds are given, their atoms are stacked in a matrix so
+    that all the seeds are hashed in the same pass.
+
+    Parameters
+    ----------
+    strings : sequence of str
+        Strings to encode. A NumPy ``U`` array is hashed without converting
+        its elements to Python strings.
+    ngram_range : 2-tuple of int, default=(2, 4)
+        The lower and upper boundaries of the range of n-values for different
+        n-grams used in the string similarity. All values of `n` such
+        that ``min_n <= n <= max_n`` will be used.
+    seed : int or array-like of int, default=0
+        Integer used to seed the hashing function. If an array-like of
+        integers, the hashes are computed for each of these seeds.
+    return_minmax : bool, default=False
+        If True, returns both the minhash and maxhash of the strings.
+        Else, only returns the minhash.
+
+    Returns
+    -------
+    ndarray of shape (n_strings, ), (n_strings, 2), (n_strings, n_seeds) \
+            or (n_strings, n_seeds, 2)
+        The min_hash, or the min_hash and max_hash, of the n-grams of each
+        string. The seeds axis is only present if `seed` is an array-like.
+    """
+    if not (isinstance(strings, np.ndarray) and strings.dtype.kind == "U"):
+        strings = np.asarray(list(strings), dtype=object).reshape(-1)
+    lengths = _string_lengths(strings)
+
+    def pack(chunk, width):
+        return _pack_strings(strings[chunk], width)
+
+    return _min_hash_packed(lengths, pack, ngram_range, seed, return_minmax)
+
+
+def _decode_utf8(data, offsets):
+    """
+    Decode UTF-8 strings stored contiguously in a byte buffer.
+
+    This is the layout of Arrow string arrays: the bytes of the string ``i``
+    are ``data[offsets[i]:offsets[i + 1]]``. The data is assumed to be valid
+    UTF-8, which Arrow guarantees.
+
+    Parameters
+    ----------
+    data : ndarray of shape (n_bytes, ) and dtype uint8
+        The concatenated UTF-8 encoded strings.
+    offsets : ndarray of shape (n_strings + 1, )
+        The boundaries of the strings in `data`.
+
+    Returns
+    -------
+    code_points : ndarray of shape (n_chars, ) and dtype int32
+        The concatenated Unicode code points of the strings.
+    char_offsets : ndarray of shape (n_strings + 1, )
+        The boundaries of the strings in `code_points`.
+    """
+    # Each character starts with a byte which is not a continuation byte
+    # (0b10xxxxxx), and whose high bits give the number of bytes
+    starts = np.flatnonzero((data & 0xC0) != 0x80)
+    lead = data[starts].astype(np.int32)
+    n_bytes = 1 + (lead >= 0xC0) + (lead >= 0xE0) + (lead >= 0xF0)
+    code_points = lead & np.array([0x7F, 0x1F, 0x0F, 0x07])[n_bytes - 1]
+    padded = np.concatenate([data, np.zeros(3, dtype=np.uint8)]).astype(np.int32)
+    for k in range(1, 4):
+        cont = n_bytes > k
+        code_points[cont] = (code_points[cont] << 6) | (padded[starts[cont] + k] & 0x3F)
+    char_offsets = np.searchsorted(starts, offsets)
+    return code_points.astype(np.int32), char_offsets
+
+
+def ngram_min_hash_utf8(
+    data,
+    offsets,
+    ngram_range: tuple[int, int] = (2, 4),
+    seed=0,
+    return_minmax=False,
+):
+    """
+    Compute the min/max hash of the ngrams of strings stored in a byte buffer.
+
+    This gives the same result as ``ngram_min_hash_batch``, for strings
+    stored as in Arrow string arrays: the UTF-8 bytes of all the strings are
+    concatenated in `data`, and `offsets` gives their boundaries. The strings
+    are decoded and hashed with vectorized operations, without creating
+    Python strings.
+
+    Parameters
+    ----------
+    data : ndarray of shape (n_bytes, ) and dtype uint8
+        The concatenated UTF-8 encoded strings.
+    offsets : ndarray of shape (n_strings + 1, )
+        The boundaries of the strings in `data`: the string ``i`` is
+        ``data[offsets[i]:offsets[i + 1]]``.
+    ngram_range : 2-tuple of int, default=(2, 4)
+        The lower and upper boundaries of the range of n-values for different
+        n-grams used in the string similarity. All values of `n` such
+        that ``min_n <= n <= max_n`` will be used.
+    seed : int or array-like of int, default=0
+        Integer used to seed the hashing function. If an array-like of
+        integers, the hashes are computed for each of these seeds.
+    return_minmax : bool, default=False
+        If True, returns both the minhash and maxhash of the strings.
+        Else, only returns the minhash.
+
+    Returns
+    -------
+    ndarray of shape (n_strings, ), (n_strings, 2), (n_strings, n_seeds) \
+            or (n_strings, n_seeds, 2)
+        The min_hash, or the min_hash and max_hash, of the n-grams of each
+        string. The seeds axis is only present if `seed` is an array-like.
+    """
+    code_points, char_offsets = _decode_utf8(
+        np.asarray(data, dtype=np.uint8), np.asarray(offsets, dtype=np.int64)
+    )
+    starts, lengths = char_offsets[:-1], np.diff(char_offsets)
+    # Avoid out-of-bounds indices when gathering the zero-padding
+    code_points = np.concatenate([code_points, np.zeros(1, dtype=np.int32)])
+
+    def pack(chunk, width):
+        positions = starts[chunk, None] + np.arange(width)
+        padding = np.arange(width) >= lengths[chunk, None]
+        matrix = code_points[np.where(padding, -1, positions)]
+        matrix[padding] = 0
+        return matrix
+
+    return _min_hash_packed(lengths, pack, ngram_range, seed, return_minmax)
+
+
+def _min_hash_packed(lengths, pack, ngram_range, seed, return_minmax):
+    """
+    Compute the min/max hashes of strings by chunks of packed strings.
+
+    Parameters
+    ----------
+    lengths : ndarray of shape (n_strings, )
+        The length of each string.
+    pack : callable
+        ``pack(chunk, width)`` returns the int32 code points of the strings of
+        index `chunk`, as a zero-padded matrix of shape (len(chunk), width).
+    ngram_range, seed, return_minmax
+        See ``ngram_min_hash_batch``.
+
+    Returns
+    -------
+    ndarray
+        See ``ngram_min_hash_batch``.
+    """
+    seeds = np.atleast_1d(seed)
+    min_hash = np.full((len(lengths), len(seeds)), MAXINT32, dtype=np.int32)
+    max_hash = np.full((len(lengths), len(seeds)), MININT32, dtype=np.int32)
+
+    # Same n-gram sizes as in ngram_min_hash
+    atoms = {
+        atom_len: np.stack([gen_atom(atom_len, seed=int(s)) for s in seeds])
+        for atom_len in range(ngram_range[0], ngram_range[1])
+    }
+    for chunk in _iter_chunks(lengths, len(seeds)):
+        chunk_lengths = lengths[chunk]
+        matrix = pack(chunk, max(chunk_lengths.max(), 1))
+        for atom_len, chunk_atoms in atoms.items():
+            chunk_min, chunk_max = _window_min_max(matrix, chunk_lengths, chunk_atoms)
+            min_hash[chunk] = np.minimum(min_hash[chunk], chunk_min)
+            max_hash[chunk] = np.maximum(max_hash[chunk], chunk_max)
+
+    if return_minmax:
+        hashes = np.stack([min_hash, max_hash], axis=2)
+    else:
+        hashes = min_hash
+    if np.ndim(seed) == 0:
+        return hashes[:, 0]
+    return hashes
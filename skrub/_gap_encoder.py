@@ -3,27 +3,43 @@ Implements the GapEncoder: a probabilistic encoder for categorical variables.
 """
 from __future__ import annotations
 
-from collections.abc import Generator
-from copy import deepcopy
+import json
+import numbers
+import os
+import shutil
+import uuid
+from collections.abc import Callable, Generator, Iterable
+from pathlib import Path
 from typing import Literal
 
 import numpy as np
 import pandas as pd
 import scipy.sparse as sp
+import sklearn
 from joblib import Parallel, delayed
 from numpy.random import RandomState
 from numpy.typing import ArrayLike, NDArray
 from scipy import sparse
 from sklearn.base import BaseEstimator, TransformerMixin
-from sklearn.cluster import KMeans, kmeans_plusplus
+from sklearn.cluster import KMeans, MiniBatchKMeans, kmeans_plusplus
 from sklearn.decomposition._nmf import _beta_divergence
 from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
 from sklearn.neighbors import NearestNeighbors
-from sklearn.utils import check_random_state, gen_batches
+from sklearn.utils import check_random_state, gen_batches, parse_version
 from sklearn.utils.extmath import row_norms, safe_sparse_dot
 from sklearn.utils.validation import _num_samples, check_is_fitted
 
-from ._utils import check_input
+from ._utils import ArrayDict, _encode_keys, check_input
+
+# Number of labels of each topic kept by ``GapEncoderColumn.freeze``
+_MAX_FROZEN_LABELS = 100
+
+# Maximum number of strings whose words are ranked to label the topics
+_MAX_LABEL_STRINGS = 10_000
+
+# Number of activations kept in each column by ``GapEncoder.fit_from_chunks``
+# when `max_cached_activations` is None
+_MAX_CHUNKS_CACHED_ACTIVATIONS = 1_000_000
 
 
 class GapEncoderColumn(BaseEstimator, TransformerMixin):
@@ -38,7 +54,7 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
     """
 
     rho_: float
-    H_dict_: dict[NDArray, NDArray]
+    H_dict_: ArrayDict
 
     def __init__(
         self,
@@ -50,7 +66,10 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
         rescale_rho: bool = False,
         hashing: bool = False,
         hashing_n_features: int = 2**12,
-        init: Literal["k-means++", "random", "k-means"] = "k-means++",
+        init: Literal[
+            "k-means++", "random", "k-means", "minibatch-k-means"
+        ] = "k-means++",
+        init_subsample: int | None = None,
         max_iter: int = 5,
         ngram_range: tuple[int, int] = (2, 4),
         analyzer: Literal["word", "char", "char_wb"] = "char",
@@ -59,6 +78,15 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
         rescale_W: bool = True,
         max_iter_e_step: int = 1,
         max_no_improvement: int = 5,
+        transform_max_iter: int | None = None,
+        transform_tol: float = 1e-3,
+        approximate_transform: bool = False,
+        max_cached_activations: int | None = None,
+        count_weighted: bool = False,
+        dtype: type = np.float64,
+        checkpoint_dir: str | os.PathLike | None = None,
+        checkpoint_every: int | None = None,
+        resume_from: str | os.PathLike | None = None,
         verbose: int = 0,
     ):
         self.ngram_range = ngram_range
@@ -72,19 +100,35 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
         self.hashing_n_features = hashing_n_features
         self.max_iter = max_iter
         self.init = init
+        self.init_subsample = init_subsample
         self.analyzer = analyzer
         self.add_words = add_words
         self.random_state = check_random_state(random_state)
         self.rescale_W = rescale_W
         self.max_iter_e_step = max_iter_e_step
         self.max_no_improvement = max_no_improvement
+        self.transform_max_iter = transform_max_iter
+        self.transform_tol = transform_tol
+        self.approximate_transform = approximate_transform
+        self.max_cached_activations = max_cached_activations
+        self.count_weighted = count_weighted
+        self.dtype = dtype
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every = checkpoint_every
+        self.resume_from = resume_from
         self.verbose = verbose
 
-    def _init_vars(self, X) -> tuple[NDArray, NDArray, NDArray]:
+    def _init_vars(
+        self, X, init_topics: bool = True
+    ) -> tuple[NDArray, NDArray, NDArray]:
         """
-        Build the bag-of-n-grams representation `V` of `X` and initialize
-        the topics `W`.
+        Build the bag-of-n-grams representation `V` of `X` and, if
+        `init_topics`, initialize the topics `W`.
         """
+        if np.dtype(self.dtype) not in (np.float32, np.float64):
+            raise ValueError(
+                f"Got dtype={self.dtype!r}, but expected np.float32 or np.float64. "
+            )
         # Init n-grams counts vectorizer
         if self.hashing:
             self.ngrams_count_ = HashingVectorizer(
@@ -93,6 +137,7 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
                 n_features=self.hashing_n_features,
                 norm=None,
                 alternate_sign=False,
+                dtype=self.dtype,
             )
             if self.add_words:  # Init a word counts vectorizer if needed
                 self.word_count_ = HashingVectorizer(
@@ -100,16 +145,29 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
                     n_features=self.hashing_n_features,
                     norm=None,
                     alternate_sign=False,
+                    dtype=self.dtype,
                 )
         else:
             self.ngrams_count_ = CountVectorizer(
-                analyzer=self.analyzer, ngram_range=self.ngram_range, dtype=np.float64
+                analyzer=self.analyzer, ngram_range=self.ngram_range, dtype=self.dtype
             )
             if self.add_words:
-                self.word_count_ = CountVectorizer(dtype=np.float64)
-
-        # Init H_dict_ with empty dict to train from scratch
-        self.H_dict_ = dict()
+                self.word_count_ = CountVectorizer(dtype=self.dtype)
+
+        # The topic labels are computed again for the new topics
+        self._topic_ranks = None
+        # Init H_dict_ with an empty store to train from scratch
+        if self.max_cached_activations is not None and (
+            not isinstance(self.max_cached_activations, numbers.Integral)
+            or self.max_cached_activations < 1
+        ):
+            raise ValueError(
+                f"Got max_cached_activations={self.max_cached_activations!r}, "
+                "but expected a positive integer or None. "
+            )
+        self.H_dict_ = ArrayDict(
+            self.n_components, dtype=self.dtype, capacity=self.max_cached_activations
+        )
         # Build the n-grams counts matrix unq_V on unique elements of X
         unq_X, lookup = np.unique(X, return_inverse=True)
         unq_V = self.ngrams_count_.fit_transform(unq_X)
@@ -124,43 +182,112 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
                     (self.vocabulary, self.word_count_.get_feature_names_out())
                 )
         _, self.n_vocab = unq_V.shape
-        # Init the topics W given the n-grams counts V
-        self.W_, self.A_, self.B_ = self._init_w(unq_V[lookup], X)
-        # Init the activations unq_H of each unique input string
-        unq_H = _rescale_h(unq_V, np.ones((len(unq_X), self.n_components)))
-        # Update self.H_dict_ with unique input strings and their activations
-        self.H_dict_.update(zip(unq_X, unq_H))
+        if init_topics:
+            self._init_topics(unq_X, unq_V, lookup)
         if self.rescale_rho:
             # Make update rate per iteration independent of the batch_size
             self.rho_ = self.rho ** (self.batch_size / len(X))
         return unq_X, unq_V, lookup
 
-    def _get_H(self, X: NDArray) -> NDArray:
+    def _init_topics(self, unq_X: NDArray, unq_V: NDArray, lookup: NDArray) -> None:
+        """
+        Initialize the topics `W` given the n-grams counts `unq_V` of the
+        unique strings `unq_X`, weighted by their counts in a subsample of the
+        rows `lookup`, and the activations of `unq_X` in `H_dict_`.
+        """
+        if self.init_subsample is not None and (
+            not isinstance(self.init_subsample, numbers.Integral)
+            or self.init_subsample < self.n_components
+        ):
+            raise ValueError(
+                f"Got init_subsample={self.init_subsample!r}, but expected an "
+                "integer greater than or equal to "
+                f"n_components={self.n_components} or None. "
+            )
+        init_lookup = lookup
+        if self.init_subsample is not None and self.init_subsample < len(lookup):
+            init_lookup = self.random_state.choice(
+                lookup, size=self.init_subsample, replace=False
+            )
+        init_idx, init_counts = np.unique(init_lookup, return_counts=True)
+        self.W_, self.A_, self.B_ = self._init_w(
+            unq_V[init_idx], unq_X[init_idx], init_counts
+        )
+        # Init the activations unq_H of each unique input string
+        unq_H = _rescale_h(
+            unq_V, np.ones((len(unq_X), self.n_components), dtype=self.dtype)
+        )
+        # Update self.H_dict_ with unique input strings and their activations
+        self.H_dict_.update(unq_X, unq_H)
+
+    def _get_V(self, X: NDArray) -> NDArray:
         """
-        Return the bag-of-n-grams representation of `X`.
+        Return the bag-of-n-grams representation `V` of `X`, with the
+        vectorizers fitted in `_init_vars`.
         """
-        H_out = np.empty((len(X), self.n_components))
-        for x, h_out in zip(X, H_out):
-            h_out[:] = self.H_dict_[x]
+        V = self.ngrams_count_.transform(X)
+        if self.add_words:  # Add word counts
+            V2 = self.word_count_.transform(X)
+            V = sparse.hstack((V, V2), format="csr")
+        return V
+
+    def _get_H(
+        self, X: NDArray, V: NDArray | None = None, W: NDArray | None = None
+    ) -> NDArray:
+        """
+        Return a copy of the activations of `X`, gathered from `H_dict_`.
+
+        If the bag-of-n-grams representation `V` of `X` is given, the
+        activations of the strings missing from `H_dict_` are initialized
+        from `V`, without adding them to `H_dict_`: uniformly, or from the
+        topics `W` if they are given.
+        """
+        if V is None:
+            return self.H_dict_.get(X)
+        rows = self.H_dict_.rows(X)
+        seen = rows != -1
+        H_out = np.empty((len(X), self.n_components), dtype=self.H_dict_.values.dtype)
+        H_out[seen] = self.H_dict_.values[rows[seen]]
+        if not seen.all() and W is not None:
+            unseen = np.flatnonzero(~seen)
+            H_out[unseen] = _topics_h(V[unseen], W)
+        elif not seen.all():
+            unseen = np.flatnonzero(~seen)
+            H_out[unseen] = _rescale_h(
+                V[unseen], np.ones((len(unseen), self.n_components), dtype=H_out.dtype)
+            )
         return H_out
 
-    def _init_w(self, V: NDArray, X) -> tuple[NDArray, NDArray, NDArray]:
+    def _get_W(self) -> NDArray:
         """
-        Initialize the topics `W`.
+        Return the topics `W`, in the data type of the activations.
+
+        They differ once the model is frozen with a lower precision than the
+        activations.
+        """
+        return self.W_.astype(self.H_dict_.values.dtype, copy=False)
+
+    def _init_w(
+        self, V: NDArray, X: NDArray, sample_weight: NDArray
+    ) -> tuple[NDArray, NDArray, NDArray]:
+        """
+        Initialize the topics `W` from the n-grams counts `V` of the unique
+        strings `X`, weighted by their counts `sample_weight`.
         If `self.init='k-means++'`, we use the init method of
         sklearn.cluster.KMeans.
         If `self.init='random'`, topics are initialized with a Gamma
         distribution.
-        If `self.init='k-means'`, topics are initialized with a KMeans on the
-        n-grams counts.
+        If `self.init='k-means'` or `self.init='minibatch-k-means'`, topics
+        are initialized with a KMeans or a MiniBatchKMeans on the n-grams
+        counts.
         """
+        if V.shape[0] < self.n_components:
+            # Not enough unique strings for the clusterings: repeat them
+            rows = np.repeat(np.arange(V.shape[0]), sample_weight)
+            V, X, sample_weight = V[rows], X[rows], np.ones(len(rows))
         if self.init == "k-means++":
-            W, _ = kmeans_plusplus(
-                V,
-                self.n_components,
-                x_squared_norms=row_norms(V, squared=True),
-                random_state=self.random_state,
-                n_local_trials=None,
+            W = _kmeans_plusplus(
+                V, self.n_components, sample_weight, random_state=self.random_state
             )
             W = W + 0.1  # To avoid restricting topics to a few n-grams only
         elif self.init == "random":
@@ -169,11 +296,13 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
                 scale=self.gamma_scale_prior,
                 size=(self.n_components, self.n_vocab),
             )
-        elif self.init == "k-means":
+        elif self.init in ["k-means", "minibatch-k-means"]:
             prototypes = get_kmeans_prototypes(
                 X,
                 self.n_components,
                 analyzer=self.analyzer,
+                sample_weight=sample_weight,
+                minibatch=self.init == "minibatch-k-means",
                 random_state=self.random_state,
             )
             W = self.ngrams_count_.transform(prototypes).A + 0.1
@@ -182,19 +311,19 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
                 W = np.hstack((W, W2))
             # if k-means doesn't find the exact number of prototypes
             if W.shape[0] < self.n_components:
-                W2, _ = kmeans_plusplus(
+                W2 = _kmeans_plusplus(
                     V,
                     self.n_components - W.shape[0],
-                    x_squared_norms=row_norms(V, squared=True),
+                    sample_weight,
                     random_state=self.random_state,
-                    n_local_trials=None,
                 )
                 W2 = W2 + 0.1
                 W = np.concatenate((W, W2), axis=0)
         else:
             raise ValueError(f"Initialization method {self.init!r} does not exist. ")
+        W = W.astype(self.dtype, copy=False)
         W /= W.sum(axis=1, keepdims=True)
-        A = np.ones((self.n_components, self.n_vocab)) * 1e-10
+        A = np.full((self.n_components, self.n_vocab), 1e-10, dtype=self.dtype)
         B = A.copy()
         return W, A, B
 
@@ -276,6 +405,116 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
 
         return False
 
+    def _batches(
+        self, lookup: NDArray, batch_size: int
+    ) -> Generator[tuple[NDArray, NDArray, NDArray | None], None, None]:
+        """
+        Make the batches used to update the topics.
+
+        Yields the indices of the unique strings of each batch, the indices of
+        its rows in the unique strings, and their weights. With
+        `count_weighted`, the batches are made of unique strings weighted by
+        their counts, otherwise they are made of rows, without weights.
+        """
+        if self.count_weighted:
+            for unq_idx, counts in batch_counts(lookup, n=batch_size):
+                yield unq_idx, unq_idx, counts
+        else:
+            for unq_idx, idx in batch_lookup(lookup, n=batch_size):
+                yield unq_idx, idx, None
+
+    def _save_checkpoint(
+        self, unq_X: NDArray, unq_H: NDArray, step: int, converged: bool
+    ) -> None:
+        """
+        Save the state of `fit` after `step` mini-batch steps in
+        `checkpoint_dir`.
+
+        The state is written in a new directory, which replaces the previous
+        checkpoint once it is complete, so that an interruption never leaves
+        a partial checkpoint.
+        """
+        path = Path(self.checkpoint_dir)
+        step_dir = path / f"step_{step}_{uuid.uuid4().hex}"
+        step_dir.mkdir(parents=True)
+        key_bytes, key_offsets = _encode_keys(unq_X)
+        for name, array in [
+            ("W", self.W_),
+            ("A", self.A_),
+            ("B", self.B_),
+            ("H", unq_H),
+            ("H_keys", key_bytes),
+            ("H_offsets", key_offsets),
+        ]:
+            np.save(step_dir / f"{name}.npy", array, allow_pickle=False)
+        state = {
+            "step": step,
+            "converged": converged,
+            "rho_": self.rho_,
+            "ewa_cost": self._ewa_cost,
+            "ewa_cost_min": self._ewa_cost_min,
+            "no_improvement": self._no_improvement,
+        }
+        (step_dir / "state.json").write_text(
+            json.dumps({key: _to_json(value) for key, value in state.items()})
+        )
+        tmp_file = path / ".latest.tmp"
+        tmp_file.write_text(step_dir.name)
+        os.replace(tmp_file, path / "latest")
+        for old_dir in path.glob("step_*"):
+            if old_dir != step_dir:
+                shutil.rmtree(old_dir, ignore_errors=True)
+
+    def _load_checkpoint(self, unq_X: NDArray) -> tuple[int, bool, NDArray] | None:
+        """
+        Restore the state saved in the latest checkpoint of `resume_from`.
+
+        Returns the number of mini-batch steps done, whether the fit had
+        converged and the activations of the unique strings `unq_X`, or None
+        if there is no checkpoint.
+
+        The ``.npy`` files are memory-mapped: the strings are compared with
+        `unq_X` without loading them, and the arrays are copied once into
+        memory, as they are updated when the fit goes on.
+        """
+        path = Path(self.resume_from)
+        if not (path / "latest").exists():
+            return None
+        step_dir = path / (path / "latest").read_text()
+
+        def load(name):
+            return np.load(step_dir / f"{name}.npy", mmap_mode="r")
+
+        key_bytes, key_offsets = _encode_keys(unq_X)
+        if not (
+            np.array_equal(load("H_offsets"), key_offsets)
+            and np.array_equal(load("H_keys"), key_bytes)
+        ):
+            raise ValueError(
+                f"The strings of the checkpoint in {str(step_dir)!r} differ from "
+                "the strings of X. The fit must be resumed with the same data "
+                "and parameters. "
+            )
+        W = load("W")
+        if W.shape != (self.n_components, self.n_vocab):
+            raise ValueError(
+                f"The topics of the checkpoint in {str(step_dir)!r} have shape "
+                f"{W.shape}, but expected {(self.n_components, self.n_vocab)}. "
+                "The fit must be resumed with the same data and parameters. "
+            )
+        self.W_ = np.array(W, dtype=self.dtype)
+        self.A_ = np.array(load("A"), dtype=self.dtype)
+        self.B_ = np.array(load("B"), dtype=self.dtype)
+        # The activations are restored as they were in fit, rather than
+        # through H_dict_ which may evict some of them
+        unq_H = np.array(load("H"), dtype=self.dtype)
+        state = json.loads((step_dir / "state.json").read_text())
+        self.rho_ = state["rho_"]
+        self._ewa_cost = state["ewa_cost"]
+        self._ewa_cost_min = state["ewa_cost_min"]
+        self._no_improvement = state["no_improvement"]
+        return state["step"], state["converged"], unq_H
+
     def fit(self, X: ArrayLike, y=None) -> "GapEncoderColumn":
         """
         Fit the GapEncoder on `X`.
@@ -300,17 +539,54 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
         self._no_improvement = 0
         # Check if first item has str or np.str_ type
         assert isinstance(X[0], str), "Input data is not string. "
-        # Make n-grams counts matrix unq_V
-        unq_X, unq_V, lookup = self._init_vars(X)
-        n_batch = (len(X) - 1) // self.batch_size + 1
+        # Make n-grams counts matrix unq_V. When resuming, the topics are
+        # initialized only if there is no checkpoint to restore them from.
+        unq_X, unq_V, lookup = self._init_vars(
+            X, init_topics=self.resume_from is None
+        )
         n_samples = len(X)
+        if self.count_weighted:
+            n_batch = (len(unq_X) - 1) // self.batch_size + 1
+            if self.rescale_rho:
+                # The batches are made of unique strings
+                self.rho_ = self.rho ** (self.batch_size / len(unq_X))
+        else:
+            n_batch = (len(X) - 1) // self.batch_size + 1
         del X
-        # Get activations unq_H
-        unq_H = self._get_H(unq_X)
-        converged = False
+        if self.checkpoint_every is not None and (
+            not isinstance(self.checkpoint_every, numbers.Integral)
+            or self.checkpoint_every < 1
+        ):
+            raise ValueError(
+                f"Got checkpoint_every={self.checkpoint_every!r}, but expected a "
+                "positive integer or None. "
+            )
+        checkpoint_every = self.checkpoint_every or n_batch
+        # Restore the state of the last checkpoint, if any
+        checkpoint = None
+        if self.resume_from is not None:
+            checkpoint = self._load_checkpoint(unq_X)
+        if checkpoint is not None:
+            start_step, converged, unq_H = checkpoint
+            # Fill H_dict_ as the initialization of the topics does, so that
+            # the same activations are evicted as in an uninterrupted fit
+            self.H_dict_.update(unq_X, unq_H)
+        else:
+            if self.resume_from is not None:
+                self._init_topics(unq_X, unq_V, lookup)
+            start_step, converged = 0, False
+            # Get activations unq_H
+            unq_H = self._get_H(unq_X, unq_V)
+        step = start_step
         for n_iter_ in range(self.max_iter):
+            if converged:
+                break
             # Loop over batches
-            for i, (unq_idx, idx) in enumerate(batch_lookup(lookup, n=self.batch_size)):
+            batches = self._batches(lookup, self.batch_size)
+            for i, (unq_idx, idx, weights) in enumerate(batches):
+                if n_iter_ * n_batch + i < start_step:
+                    # Already done before the checkpoint
+                    continue
                 # Update activations unq_H
                 unq_H[unq_idx] = _multiplicative_update_h(
                     unq_V[unq_idx],
@@ -331,30 +607,80 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
                     unq_H[idx],
                     self.rescale_W,
                     self.rho_,
+                    sample_weight=weights,
                 )
-                batch_cost = _beta_divergence(
-                    unq_V[idx],
-                    unq_H[idx],
-                    self.W_,
-                    "kullback-leibler",
-                    square_root=False,
-                ) / len(idx)
+                batch_size = len(idx) if weights is None else weights.sum()
+                batch_cost = (
+                    _kl_divergence(unq_V[idx], unq_H[idx], self.W_, weights)
+                    / batch_size
+                )
+                step = n_iter_ * n_batch + i + 1
                 if self._minibatch_convergence(
-                    batch_size=len(idx),
+                    batch_size=batch_size,
                     batch_cost=batch_cost,
                     n_samples=n_samples,
-                    step=n_iter_ * n_batch + i,
+                    step=step - 1,
                     n_steps=self.max_iter * n_batch,
                 ):
                     converged = True
                     break
-            if converged:
-                break
+                if self.checkpoint_dir is not None and step % checkpoint_every == 0:
+                    self._save_checkpoint(unq_X, unq_H, step, converged=False)
+        if self.checkpoint_dir is not None:
+            # Save the final state. Resuming from it does nothing if the fit
+            # converged, otherwise it goes on if max_iter allows more steps.
+            self._save_checkpoint(unq_X, unq_H, step, converged=converged)
 
         # Update self.H_dict_ with the learned encoded vectors (activations)
-        self.H_dict_.update(zip(unq_X, unq_H))
+        self.H_dict_.update(unq_X, unq_H)
+        self._topic_ranks = self._compute_topic_ranks()
         return self
 
+    def _get_topic_ranks(self) -> tuple[NDArray, NDArray]:
+        """
+        Return the words of the strings seen during fit, and for each topic
+        the indices of the words by decreasing normalized activation.
+
+        They are computed at the end of fit, or when they are first read
+        after partial_fit, and cached until the topics are updated.
+        """
+        if getattr(self, "_topic_ranks", None) is None:
+            self._topic_ranks = self._compute_topic_ranks()
+        return self._topic_ranks
+
+    def _compute_topic_ranks(self) -> tuple[NDArray, NDArray]:
+        """
+        Rank the words of at most `_MAX_LABEL_STRINGS` strings seen during
+        fit, drawn at random, for each topic.
+
+        The words are encoded with the default parameters of transform, so
+        that the labels do not depend on `transform_max_iter`, `transform_tol`
+        and `approximate_transform`.
+        """
+        strings = self.H_dict_.keys()
+        if len(strings) > _MAX_LABEL_STRINGS:
+            sample = np.random.RandomState(0).choice(
+                len(strings), _MAX_LABEL_STRINGS, replace=False
+            )
+            strings = [strings[i] for i in np.sort(sample)]
+        vectorizer = CountVectorizer()
+        try:
+            vectorizer.fit(strings)
+        except ValueError:
+            # The vectorizer failed to find words, we need to switch to
+            # char-level representation
+            vectorizer = CountVectorizer(analyzer="char_wb")
+            vectorizer.fit(strings)
+        vocabulary = np.array(vectorizer.get_feature_names_out())
+        encoding = self._encode(vocabulary, max_iter=100, tol=1e-3)
+        encoding = abs(encoding)
+        encoding = encoding / np.sum(encoding, axis=1, keepdims=True)
+        ranks = np.stack(
+            [np.argsort(-encoding[:, i]) for i in range(encoding.shape[1])],
+            axis=1,
+        )
+        return vocabulary, ranks
+
     def get_feature_names_out(
         self,
         n_labels: int = 3,
@@ -376,24 +702,10 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
         list of str
             The labels that best describe each topic.
         """
-
-        vectorizer = CountVectorizer()
-        try:
-            vectorizer.fit(list(self.H_dict_.keys()))
-        except ValueError:
-            # The vectorizer failed to find words, we need to switch to
-            # char-level representation
-            vectorizer = CountVectorizer(analyzer="char_wb")
-            vectorizer.fit(list(self.H_dict_.keys()))
-        vocabulary = np.array(vectorizer.get_feature_names_out())
-        encoding = self.transform(np.array(vocabulary).reshape(-1))
-        encoding = abs(encoding)
-        encoding = encoding / np.sum(encoding, axis=1, keepdims=True)
-        n_components = encoding.shape[1]
+        vocabulary, ranks = self._get_topic_ranks()
         topic_labels = []
-        for i in range(n_components):
-            x = encoding[:, i]
-            labels = vocabulary[np.argsort(-x)[:n_labels]]
+        for i in range(ranks.shape[1]):
+            labels = vocabulary[ranks[:n_labels, i]]
             label = ", ".join(labels)
             label = prefix + label
             # Avoid having twice the same name for the different features
@@ -419,20 +731,16 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
             The Kullback-Leibler divergence.
         """
 
-        # Build n-grams/word counts matrix
-        unq_X, lookup = np.unique(X, return_inverse=True)
-        unq_V = self.ngrams_count_.transform(unq_X)
-        if self.add_words:
-            unq_V2 = self.word_count_.transform(unq_X)
-            unq_V = sparse.hstack((unq_V, unq_V2), format="csr")
-
-        self._add_unseen_keys_to_H_dict(unq_X)
-        unq_H = self._get_H(unq_X)
+        # Build n-grams/word counts matrix of the unique strings
+        unq_X, counts = np.unique(X, return_counts=True)
+        unq_V = self._get_V(unq_X)
+        unq_H = self._get_H(unq_X, unq_V)
+        W = self._get_W()
         # Given the learnt topics W, optimize the activations H to fit V = HW
         for slice in gen_batches(n=unq_H.shape[0], batch_size=self.batch_size):
             unq_H[slice] = _multiplicative_update_h(
                 unq_V[slice],
-                self.W_,
+                W,
                 unq_H[slice],
                 epsilon=1e-3,
                 max_iter=self.max_iter_e_step,
@@ -440,10 +748,9 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
                 gamma_shape_prior=self.gamma_shape_prior,
                 gamma_scale_prior=self.gamma_scale_prior,
             )
-        # Compute the KL divergence between V and HW
-        kl_divergence = _beta_divergence(
-            unq_V[lookup], unq_H[lookup], self.W_, "kullback-leibler", square_root=False
-        )
+        # Compute the KL divergence between V and HW once per unique string,
+        # weighted by its number of occurrences
+        kl_divergence = _kl_divergence(unq_V, unq_H, W, sample_weight=counts)
         return kl_divergence
 
     def partial_fit(self, X: ArrayLike, y=None) -> "GapEncoderColumn":
@@ -465,81 +772,65 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
             The fitted GapEncoderColumn instance (self).
         """
 
-        # Init H_dict_ with empty dict if it's the first call of partial_fit
-        if not hasattr(self, "H_dict_"):
-            self.H_dict_ = dict()
-        # Same thing for the rho_ parameter
+        # The topic labels are computed when they are first read, rather than
+        # after each of the calls of an online learning procedure
+        self._partial_fit(X, batch_size=len(X))
+        return self
+
+    def _partial_fit(self, X: ArrayLike, batch_size: int) -> "GapEncoderColumn":
+        """
+        Partial fit this instance on `X`, updating the topics once per batch
+        of `batch_size` rows.
+
+        The n-grams counts of `X` are computed once for all the batches.
+        """
+        # Init the rho_ parameter if it's the first call of partial_fit
         if not hasattr(self, "rho_"):
             self.rho_ = self.rho
         # Check if first item has str or np.str_ type
         assert isinstance(X[0], str), "Input data is not string. "
+        if hasattr(self, "W_") and not hasattr(self, "A_"):
+            raise ValueError(
+                "This GapEncoder was frozen for inference and cannot be fitted "
+                "further. Call fit to train a new model. "
+            )
         # Check if it is not the first batch
-        if hasattr(self, "vocabulary"):  # Update unq_X, unq_V with new batch
+        if hasattr(self, "W_"):  # Update unq_X, unq_V with new batch
             unq_X, lookup = np.unique(X, return_inverse=True)
-            unq_V = self.ngrams_count_.transform(unq_X)
-            if self.add_words:
-                unq_V2 = self.word_count_.transform(unq_X)
-                unq_V = sparse.hstack((unq_V, unq_V2), format="csr")
-
-            unseen_X = np.setdiff1d(unq_X, np.array([*self.H_dict_]))
-            unseen_V = self.ngrams_count_.transform(unseen_X)
-            if self.add_words:
-                unseen_V2 = self.word_count_.transform(unseen_X)
-                unseen_V = sparse.hstack((unseen_V, unseen_V2), format="csr")
-
-            if unseen_V.shape[0] != 0:
-                unseen_H = _rescale_h(
-                    unseen_V, np.ones((len(unseen_X), self.n_components))
-                )
-                for x, h in zip(unseen_X, unseen_H):
-                    self.H_dict_[x] = h
-                del unseen_H
-            del unseen_X, unseen_V
+            unq_V = self._get_V(unq_X)
         else:  # If it is the first batch, call _init_vars to init unq_X, unq_V
             unq_X, unq_V, lookup = self._init_vars(X)
 
-        unq_H = self._get_H(unq_X)
-        # Update unq_H, the activations
-        unq_H = _multiplicative_update_h(
-            unq_V,
-            self.W_,
-            unq_H,
-            epsilon=1e-3,
-            max_iter=self.max_iter_e_step,
-            rescale_W=self.rescale_W,
-            gamma_shape_prior=self.gamma_shape_prior,
-            gamma_scale_prior=self.gamma_scale_prior,
-        )
-        # Update the topics self.W_
-        _multiplicative_update_w(
-            unq_V[lookup],
-            self.W_,
-            self.A_,
-            self.B_,
-            unq_H[lookup],
-            self.rescale_W,
-            self.rho_,
-        )
+        # Activations of the batch, initialized for the unseen strings
+        unq_H = self._get_H(unq_X, unq_V)
+        for unq_idx, idx, weights in self._batches(lookup, batch_size):
+            # Update the activations unq_H
+            unq_H[unq_idx] = _multiplicative_update_h(
+                unq_V[unq_idx],
+                self.W_,
+                unq_H[unq_idx],
+                epsilon=1e-3,
+                max_iter=self.max_iter_e_step,
+                rescale_W=self.rescale_W,
+                gamma_shape_prior=self.gamma_shape_prior,
+                gamma_scale_prior=self.gamma_scale_prior,
+            )
+            # Update the topics self.W_
+            _multiplicative_update_w(
+                unq_V[idx],
+                self.W_,
+                self.A_,
+                self.B_,
+                unq_H[idx],
+                self.rescale_W,
+                self.rho_,
+                sample_weight=weights,
+            )
         # Update self.H_dict_ with the learned encoded vectors (activations)
-        self.H_dict_.update(zip(unq_X, unq_H))
+        self.H_dict_.update(unq_X, unq_H)
+        self._topic_ranks = None
         return self
 
-    def _add_unseen_keys_to_H_dict(self, X) -> None:
-        """
-        Add activations of unseen string categories from `X` to `H_dict`.
-        """
-        unseen_X = np.setdiff1d(X, np.array([*self.H_dict_]))
-        if unseen_X.size > 0:
-            unseen_V = self.ngrams_count_.transform(unseen_X)
-            if self.add_words:
-                unseen_V2 = self.word_count_.transform(unseen_X)
-                unseen_V = sparse.hstack((unseen_V, unseen_V2), format="csr")
-
-            unseen_H = _rescale_h(
-                unseen_V, np.ones((unseen_V.shape[0], self.n_components))
-            )
-            self.H_dict_.update(zip(unseen_X, unseen_H))
-
     def transform(self, X: ArrayLike) -> NDArray:
         """Return the encoded vectors (activations) `H` of input strings in `X`.
 
@@ -553,39 +844,123 @@ class GapEncoderColumn(BaseEstimator, TransformerMixin):
         ndarray, shape (n_samples, n_topics)
             Transformed input.
         """
+        return self._transform(
+            X,
+            max_iter=self.transform_max_iter,
+            tol=self.transform_tol,
+            approximate=self.approximate_transform,
+        )
+
+    def _transform(
+        self, X: ArrayLike, max_iter: int | None, tol: float, approximate: bool
+    ) -> NDArray:
+        """
+        Return the activations of `X` for the given values of
+        `transform_max_iter`, `transform_tol` and `approximate_transform`,
+        without reading nor changing the parameters of this instance.
+        """
         check_is_fitted(self, "H_dict_")
-        # Copy the state of H before continuing fitting it
-        pre_trans_H_dict_ = deepcopy(self.H_dict_)
+        if max_iter is None:
+            max_iter = 3 if approximate else 100
+        elif not isinstance(max_iter, numbers.Integral) or max_iter < 1:
+            raise ValueError(
+                f"Got transform_max_iter={max_iter!r}, but "
+                "expected a positive integer or None. "
+            )
+        if not isinstance(tol, numbers.Real) or tol < 0:
+            raise ValueError(
+                f"Got transform_tol={tol!r}, but expected a non-negative number. "
+            )
         # Check if the first item has str or np.str_ type
         assert isinstance(X[0], str), "Input data is not string. "
-        unq_X = np.unique(X)
+        return self._encode(X, max_iter, tol, approximate=approximate)
+
+    def _encode(
+        self, X: ArrayLike, max_iter: int, tol: float, approximate: bool = False
+    ) -> NDArray:
+        """
+        Return the activations of `X`, adjusted for at most `max_iter`
+        iterations with the tolerance `tol`, without changing `H_dict_`.
+        """
+        unq_X, lookup = np.unique(X, return_inverse=True)
         # Build the n-grams counts matrix V for the string data to encode
-        unq_V = self.ngrams_count_.transform(unq_X)
-        if self.add_words:  # Add words counts
-            unq_V2 = self.word_count_.transform(unq_X)
-            unq_V = sparse.hstack((unq_V, unq_V2), format="csr")
-        # Add unseen strings in X to H_dict
-        self._add_unseen_keys_to_H_dict(unq_X)
-        unq_H = self._get_H(unq_X)
+        unq_V = self._get_V(unq_X)
+        # Work on a copy of the activations of the strings in X, so that
+        # H_dict_ is left unchanged
+        W = self._get_W()
+        unq_H = self._get_H(unq_X, unq_V, W=W if approximate else None)
         # Loop over batches
         for slc in gen_batches(n=unq_H.shape[0], batch_size=self.batch_size):
             # Given the learnt topics W, optimize H to fit V = HW
             unq_H[slc] = _multiplicative_update_h(
                 unq_V[slc],
-                self.W_,
+                W,
                 unq_H[slc],
-                epsilon=1e-3,
-                max_iter=100,
+                epsilon=tol,
+                max_iter=max_iter,
                 rescale_W=self.rescale_W,
                 gamma_shape_prior=self.gamma_shape_prior,
                 gamma_scale_prior=self.gamma_scale_prior,
             )
-        # Store and return the encoded vectors of X
-        self.H_dict_.update(zip(unq_X, unq_H))
-        feature_names_out = self._get_H(X)
-        # Restore H
-        self.H_dict_ = pre_trans_H_dict_
-        return feature_names_out
+        # Return the encoded vectors of X
+        return unq_H[lookup]
+
+    def freeze(
+        self,
+        dtype: type = np.float32,
+        max_cached_activations: int | None = 1024,
+    ) -> "GapEncoderColumn":
+        """Drop the training state, to keep only what is needed for inference.
+
+        See :meth:`GapEncoder.freeze`.
+
+        Parameters
+        ----------
+        dtype : {np.float16, np.float32, np.float64}, default=np.float32
+            Data type in which the topics are stored.
+        max_cached_activations : int, optional, default=1024
+            Number of activations of the most recently fitted strings which
+            are kept to warm-start their encoding.
+
+        Returns
+        -------
+        GapEncoderColumn
+            The frozen GapEncoderColumn instance (self).
+        """
+        check_is_fitted(self, "H_dict_")
+        if np.dtype(dtype) not in (np.float16, np.float32, np.float64):
+            raise ValueError(
+                f"Got dtype={dtype!r}, but expected np.float16, np.float32 or "
+                "np.float64. "
+            )
+        if max_cached_activations is not None and (
+            not isinstance(max_cached_activations, numbers.Integral)
+            or max_cached_activations < 0
+        ):
+            raise ValueError(
+                f"Got max_cached_activations={max_cached_activations!r}, but "
+                "expected a non-negative integer or None. "
+            )
+        # The topic labels are computed from all the strings seen during fit,
+        # and only their first words are kept
+        vocabulary, ranks = self._get_topic_ranks()
+        ranks = ranks[:_MAX_FROZEN_LABELS]
+        used = np.unique(ranks)
+        self._topic_ranks = (
+            vocabulary[used],
+            np.searchsorted(used, ranks).astype(np.int32),
+        )
+        for attribute in ["A_", "B_", "vocabulary"]:
+            if hasattr(self, attribute):
+                delattr(self, attribute)
+        # The encoding is computed in at least single precision
+        compute_dtype = np.promote_types(dtype, np.float32)
+        self.W_ = self.W_.astype(dtype)
+        self.H_dict_.compact(max_cached_activations, dtype=compute_dtype)
+        self.ngrams_count_.set_params(dtype=compute_dtype)
+        if self.add_words:
+            self.word_count_.set_params(dtype=compute_dtype)
+        return self
 
 
 class GapEncoder(TransformerMixin, BaseEstimator):
@@ -641,12 +1016,21 @@ class GapEncoder(TransformerMixin, BaseEstimator):
     hashing_n_features : int, default=2**12
         Number of features for the HashingVectorizer.
         Only relevant if `hashing=True`.
-    init : {'k-means++', 'random', 'k-means'}, default='k-means++'
+    init : {'k-means++', 'random', 'k-means', 'minibatch-k-means'}, \
+default='k-means++'
         Initialization method of the `W` matrix.
         If `init='k-means++'`, we use the init method of KMeans.
         If `init='random'`, topics are initialized with a Gamma distribution.
         If `init='k-means'`, topics are initialized with a KMeans on the
         n-grams counts.
+        If `init='minibatch-k-means'`, a MiniBatchKMeans is used instead,
+        which is faster on large columns.
+        The unique strings are clustered, weighted by their number of
+        occurrences.
+    init_subsample : int, optional
+        Maximum number of rows used to initialize the topics, drawn at
+        random. It must be at least `n_components`. By default, all the rows
+        are used.
     max_iter : int, default=5
         Maximum number of iterations on the input data.
     ngram_range : int 2-tuple, default=(2, 4)
@@ -675,6 +1059,61 @@ class GapEncoder(TransformerMixin, BaseEstimator):
         that do not yield an improvement on the smoothed cost function.
         To disable early stopping and run the process fully,
         set ``max_no_improvement=None``.
+    transform_max_iter : int, optional
+        Maximum number of iterations to adjust the activations in
+        :term:`transform`. By default, 100 iterations, or 3 iterations if
+        `approximate_transform=True`.
+    transform_tol : float, default=1e-3
+        Tolerance on the relative change of the activations of a string to
+        stop adjusting them in :term:`transform`.
+    approximate_transform : bool, default=False
+        If `True`, :term:`transform` initializes the activations of the
+        strings unseen during :term:`fit` from the topics, by sharing the
+        counts of their n-grams between the topics in proportion to their
+        weight for each n-gram, instead of giving all the topics the same
+        activation. Starting closer to the solution, a few iterations are
+        enough for a good approximation, which makes the encoding of new
+        strings several times faster.
+        `transform_max_iter`, `transform_tol` and `approximate_transform` can
+        be changed with :term:`set_params` after :term:`fit`.
+    max_cached_activations : int, optional
+        Maximum number of strings whose activations are kept after
+        :term:`fit` and :term:`partial_fit`, in each column. When it is
+        exceeded, the activations of the least recently fitted strings are
+        dropped, and they are recomputed from the topics when these strings
+        are encoded again. This bounds the memory used by online learning
+        with :meth:`GapEncoder.partial_fit`. By default, all the activations
+        are kept, except with :meth:`GapEncoder.fit_from_chunks` which keeps
+        at most 1_000_000 of them.
+    count_weighted : bool, default=False
+        If `True`, the topics are updated with batches of `batch_size` unique
+        strings, weighted by their number of occurrences in the topics update
+        and in the cost, instead of batches of `batch_size` rows. This is
+        equivalent to repeating the rows, but the cost of an iteration grows
+        with the number of unique strings rather than with the number of rows,
+        which is much faster on columns with many repeated values.
+    dtype : {np.float64, np.float32}, default=np.float64
+        Data type of the n-grams counts, the topics and the activations, and
+        of the output of :term:`transform`. Using `np.float32` halves the
+        memory used by the model and speeds up fitting and encoding, at the
+        cost of precision.
+    checkpoint_dir : str or path-like, optional
+        Directory in which :term:`fit` periodically saves its state: the
+        topics, their running statistics, the update rate, the convergence
+        monitoring and the activations, in ``.npy`` files which can be
+        memory-mapped. Each column is saved in its own ``column_<k>``
+        subdirectory, and only the latest checkpoint is kept.
+    checkpoint_every : int, optional
+        Number of mini-batch steps between checkpoints. By default, a
+        checkpoint is saved at the end of each iteration on the input data.
+        Only relevant if `checkpoint_dir` is set.
+    resume_from : str or path-like, optional
+        Directory of checkpoints saved by a previous :term:`fit` on the same
+        data, with the same parameters. :term:`fit` resumes from the latest
+        checkpoint, instead of starting from scratch. If the directory
+        contains no checkpoint, the fit starts from scratch, so that the same
+        parameters can be used to start a fit and to resume it after an
+        interruption.
     handle_missing : {'error', 'empty_impute'}, default='empty_impute'
         Whether to raise an error or impute with empty string ('') if missing
         values (NaN) are present during GapEncoder.fit (default is to impute).
@@ -716,7 +1155,7 @@ class GapEncoder(TransformerMixin, BaseEstimator):
 
     Examples
     --------
-    >>> enc = GapEncoder(n_components=2, random_state=0)
+    >>> enc = GapEncoder(n_components=2, random_state=1)
 
     Let's encode the following non-normalized data:
 
@@ -724,28 +1163,28 @@ class GapEncoder(TransformerMixin, BaseEstimator):
     ...      ['london'], ['London, England'], ['London'], ['Pqris']]
 
     >>> enc.fit(X)
-    GapEncoder(n_components=2, random_state=0)
+    GapEncoder(n_components=2, random_state=1)
 
     The GapEncoder has found the following two topics:
 
     >>> enc.get_feature_names_out()
-    array(['england, london, uk', 'france, paris, pqris'], dtype=object)
+    array(['france, paris, pqris', 'england, london, uk'], dtype=object)
 
-    It got it right, reccuring topics are "London" and "England" on the
-    one side and "Paris" and "France" on the other.
+    It got it right, reccuring topics are "Paris" and "France" on the
+    one side and "London" and "England" on the other.
 
     As this is a continuous encoding, we can look at the level of
     activation of each topic for each category:
 
     >>> enc.transform(X)
-    array([[ 0.051..., 10.548...],
-           [ 0.050...,  4.549...],
-           [12.046...,  0.053...],
-           [ 0.052..., 16.547...],
-           [ 6.049...,  0.050...],
-           [19.545...,  0.054...],
-           [ 6.049...,  0.050...],
-           [ 0.060...,  4.539...]])
+    array([[10.547...,  0.052...],
+           [ 4.549...,  0.050...],
+           [ 0.054..., 12.045...],
+           [16.546...,  0.053...],
+           [ 0.050...,  6.049...],
+           [ 0.056..., 19.543...],
+           [ 0.050...,  6.049...],
+           [ 4.549...,  0.050...]])
 
     The higher the value, the bigger the correspondence with the topic.
     """
@@ -765,7 +1204,10 @@ class GapEncoder(TransformerMixin, BaseEstimator):
         rescale_rho: bool = False,
         hashing: bool = False,
         hashing_n_features: int = 2**12,
-        init: Literal["k-means++", "random", "k-means"] = "k-means++",
+        init: Literal[
+            "k-means++", "random", "k-means", "minibatch-k-means"
+        ] = "k-means++",
+        init_subsample: int | None = None,
         max_iter: int = 5,
         ngram_range: tuple[int, int] = (2, 4),
         analyzer: Literal["word", "char", "char_wb"] = "char",
@@ -774,6 +1216,15 @@ class GapEncoder(TransformerMixin, BaseEstimator):
         rescale_W: bool = True,
         max_iter_e_step: int = 1,
         max_no_improvement: int = 5,
+        transform_max_iter: int | None = None,
+        transform_tol: float = 1e-3,
+        approximate_transform: bool = False,
+        max_cached_activations: int | None = None,
+        count_weighted: bool = False,
+        dtype: type = np.float64,
+        checkpoint_dir: str | os.PathLike | None = None,
+        checkpoint_every: int | None = None,
+        resume_from: str | os.PathLike | None = None,
         handle_missing: Literal["error", "empty_impute"] = "zero_impute",
         n_jobs: int | None = None,
         verbose: int = 0,
@@ -789,12 +1240,22 @@ class GapEncoder(TransformerMixin, BaseEstimator):
         self.hashing_n_features = hashing_n_features
         self.max_iter = max_iter
         self.init = init
+        self.init_subsample = init_subsample
         self.analyzer = analyzer
         self.add_words = add_words
         self.random_state = random_state
         self.rescale_W = rescale_W
         self.max_iter_e_step = max_iter_e_step
         self.max_no_improvement = max_no_improvement
+        self.transform_max_iter = transform_max_iter
+        self.transform_tol = transform_tol
+        self.approximate_transform = approximate_transform
+        self.max_cached_activations = max_cached_activations
+        self.count_weighted = count_weighted
+        self.dtype = dtype
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every = checkpoint_every
+        self.resume_from = resume_from
         self.handle_missing = handle_missing
         self.n_jobs = n_jobs
         self.verbose = verbose
@@ -815,11 +1276,21 @@ class GapEncoder(TransformerMixin, BaseEstimator):
             hashing_n_features=self.hashing_n_features,
             max_iter=self.max_iter,
             init=self.init,
+            init_subsample=self.init_subsample,
             add_words=self.add_words,
             random_state=self.random_state,
             rescale_W=self.rescale_W,
             max_iter_e_step=self.max_iter_e_step,
             max_no_improvement=self.max_no_improvement,
+            transform_max_iter=self.transform_max_iter,
+            transform_tol=self.transform_tol,
+            approximate_transform=self.approximate_transform,
+            max_cached_activations=self.max_cached_activations,
+            count_weighted=self.count_weighted,
+            dtype=self.dtype,
+            checkpoint_dir=self.checkpoint_dir,
+            checkpoint_every=self.checkpoint_every,
+            resume_from=self.resume_from,
             verbose=self.verbose,
         )
 
@@ -875,9 +1346,15 @@ class GapEncoder(TransformerMixin, BaseEstimator):
         X = check_input(X)
         self._check_n_features(X, reset=True)
         X = self._handle_missing(X)
+        models = [self._create_column_gap_encoder() for _ in range(X.shape[1])]
+        for k, model in enumerate(models):
+            # Each column is checkpointed in its own directory
+            for param in ["checkpoint_dir", "resume_from"]:
+                path = getattr(self, param)
+                if path is not None:
+                    model.set_params(**{param: Path(path) / f"column_{k}"})
         self.fitted_models_ = Parallel(n_jobs=self.n_jobs, verbose=self.verbose)(
-            delayed(self._create_column_gap_encoder().fit)(X[:, k])
-            for k in range(X.shape[1])
+            delayed(model.fit)(X[:, k]) for k, model in enumerate(models)
         )
         return self
 
@@ -909,7 +1386,16 @@ class GapEncoder(TransformerMixin, BaseEstimator):
         X = self._handle_missing(X)
         X_enc = []
         for k in range(X.shape[1]):
-            X_enc.append(self.fitted_models_[k].transform(X[:, k]))
+            # The parameters of transform may have been set after fit, they
+            # are passed to the fitted models rather than set on them
+            X_enc.append(
+                self.fitted_models_[k]._transform(
+                    X[:, k],
+                    max_iter=self.transform_max_iter,
+                    tol=self.transform_tol,
+                    approximate=self.approximate_transform,
+                )
+            )
         X_enc = np.hstack(X_enc)
         return X_enc
 
@@ -948,6 +1434,142 @@ class GapEncoder(TransformerMixin, BaseEstimator):
             self.fitted_models_[k].partial_fit(X[:, k])
         return self
 
+    def fit_from_chunks(
+        self,
+        chunks: Iterable[ArrayLike] | Callable[[], Iterable[ArrayLike]],
+        n_epochs: int = 1,
+    ) -> "GapEncoder":
+        """Fit the instance on chunks of X, for several epochs.
+
+        To be used to fit data which does not fit in memory, for instance
+        read from the row groups of a parquet file. Only one chunk is in
+        memory at a time. The n-grams counts of each chunk are computed once,
+        and the topics are updated with its batches of `batch_size` rows, as
+        with :term:`partial_fit`.
+
+        As the n-grams vocabulary is learned on the first chunk when
+        `hashing=False`, using `hashing=True` is recommended. The first chunk
+        must have at least `n_components` rows.
+
+        The activations of the strings are kept to warm-start their encoding,
+        so their memory grows with the number of distinct strings in the
+        chunks. To bound it, at most `max_cached_activations` activations are
+        kept in each column, or 1_000_000 if it is None: the least recently
+        fitted strings are dropped first. Checkpoints are not supported, so
+        `checkpoint_dir` and `resume_from` must be None.
+
+        Parameters
+        ----------
+        chunks : iterable of array-like, or callable
+            The chunks of string data, of shape (n_samples_chunk, n_features),
+            or a callable returning them. The chunks are iterated over once per
+            epoch: if `n_epochs > 1`, it must be an iterable which can be
+            iterated over several times, like a list, or a callable returning
+            a new iterator at each call.
+        n_epochs : int, default=1
+            The number of passes over the chunks.
+
+        Returns
+        -------
+        GapEncoder
+            The fitted GapEncoder instance (self).
+        """
+        if not isinstance(n_epochs, numbers.Integral) or n_epochs < 1:
+            raise ValueError(
+                f"Got n_epochs={n_epochs!r}, but expected a positive integer. "
+            )
+        if n_epochs > 1 and not callable(chunks) and iter(chunks) is chunks:
+            raise ValueError(
+                "Got an iterator of chunks, which can only be iterated over "
+                f"once, but n_epochs={n_epochs}. Pass a callable returning a "
+                "new iterator instead. "
+            )
+        for param in ["checkpoint_dir", "resume_from"]:
+            if getattr(self, param) is not None:
+                raise ValueError(
+                    f"Got {param}={getattr(self, param)!r}, but fit_from_chunks "
+                    "does not support checkpoints. Set it to None, or use fit. "
+                )
+        max_cached_activations = self.max_cached_activations
+        if max_cached_activations is None:
+            max_cached_activations = _MAX_CHUNKS_CACHED_ACTIVATIONS
+        self.rho_ = self.rho
+        fitted_models = None
+        for _ in range(n_epochs):
+            epoch_chunks = chunks() if callable(chunks) else chunks
+            for X in epoch_chunks:
+                if isinstance(X, pd.DataFrame):
+                    self.column_names_ = list(X.columns)
+                X = check_input(X)
+                self._check_n_features(X, reset=fitted_models is None)
+                X = self._handle_missing(X)
+                if fitted_models is None:
+                    # Check that n_samples >= n_components, as in fit
+                    if X.shape[0] < self.n_components:
+                        raise ValueError(
+                            f"The first chunk has n_samples={X.shape[0]}, but it "
+                            f"should be >= n_components={self.n_components}. "
+                        )
+                    fitted_models = [
+                        self._create_column_gap_encoder().set_params(
+                            max_cached_activations=max_cached_activations
+                        )
+                        for _ in range(X.shape[1])
+                    ]
+                for k, model in enumerate(fitted_models):
+                    model._partial_fit(X[:, k], batch_size=self.batch_size)
+        if fitted_models is None:
+            raise ValueError("Got no chunks to fit the GapEncoder on. ")
+        for model in fitted_models:
+            model._topic_ranks = model._compute_topic_ranks()
+        self.fitted_models_ = fitted_models
+        return self
+
+    def freeze(
+        self,
+        dtype: type = np.float32,
+        max_cached_activations: int | None = 1024,
+    ) -> "GapEncoder":
+        """Drop the training state, to keep only what is needed for inference.
+
+        The running statistics of the topics and the n-grams vocabulary array
+        are dropped, the topics are stored in `dtype`, and only the
+        activations of the `max_cached_activations` most recently fitted
+        strings of each column are kept to warm-start their encoding. The
+        activations of the other strings are computed from the topics when
+        they are encoded. The topic labels are computed before the
+        activations are dropped, so that :meth:`get_feature_names_out` is
+        unchanged for up to 100 labels per topic.
+
+        The frozen encoder can be saved with :func:`joblib.dump`, and loaded
+        with ``joblib.load(filename, mmap_mode="r")`` to memory-map its
+        arrays instead of reading them. With `hashing=False`, the vocabulary
+        of the n-grams counts vectorizer is still loaded as a dict: use
+        `hashing=True` for the smallest artifacts.
+
+        A frozen encoder can only be used to encode and score data: it must be
+        fitted again with :term:`fit` to be trained further.
+
+        Parameters
+        ----------
+        dtype : {np.float16, np.float32, np.float64}, default=np.float32
+            Data type in which the topics are stored. The encoding is computed
+            in the data type of the topics, or in `np.float32` if they are
+            stored in `np.float16`.
+        max_cached_activations : int, optional, default=1024
+            Number of activations kept in each column. If `None`, all the
+            activations are kept.
+
+        Returns
+        -------
+        GapEncoder
+            The frozen GapEncoder instance (self).
+        """
+        check_is_fitted(self, "fitted_models_")
+        for model in self.fitted_models_:
+            model.freeze(dtype=dtype, max_cached_activations=max_cached_activations)
+        return self
+
     def get_feature_names_out(
         self,
         col_names: Literal["auto"] | list[str] | None = None,
@@ -1047,6 +1669,38 @@ class GapEncoder(TransformerMixin, BaseEstimator):
         }
 
 
+def _kmeans_plusplus(
+    V: NDArray,
+    n_clusters: int,
+    sample_weight: NDArray,
+    random_state: RandomState,
+) -> NDArray:
+    """
+    Return `n_clusters` centers of the rows of `V`, weighted by
+    `sample_weight`, chosen with the k-means++ method.
+    """
+    if parse_version(sklearn.__version__) < parse_version("1.3"):
+        # sample_weight is only supported since scikit-learn 1.3
+        V = V[np.repeat(np.arange(V.shape[0]), sample_weight)]
+        kwargs = {}
+    else:
+        kwargs = {"sample_weight": sample_weight}
+    centers, _ = kmeans_plusplus(
+        V,
+        n_clusters,
+        x_squared_norms=row_norms(V, squared=True),
+        random_state=random_state,
+        n_local_trials=None,
+        **kwargs,
+    )
+    return centers
+
+
+def _to_json(value):
+    """Convert NumPy scalars to Python scalars, which can be saved in JSON."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
 def _rescale_W(W: NDArray, A: NDArray) -> None:
     """
     Rescale the topics `W` to have a L1-norm equal to 1.
@@ -1063,7 +1717,7 @@ def _special_sparse_dot(H, W, X):
     if sp.issparse(X):
         ii, jj = X.nonzero()
         n_vals = ii.shape[0]
-        dot_vals = np.empty(n_vals)
+        dot_vals = np.empty(n_vals, dtype=np.result_type(H, W))
         n_components = H.shape[1]
         batch_size = max(n_components, n_vals // n_components)
         for start in range(0, n_vals, batch_size):
@@ -1088,15 +1742,21 @@ def _multiplicative_update_w(
     Ht: NDArray,
     rescale_W: bool,
     rho: float,
+    sample_weight: NDArray | None = None,
 ) -> tuple[NDArray, NDArray, NDArray]:
     """
     Multiplicative update step for the topics `W`.
+
+    If given, `sample_weight` weights the rows of `Vt` and `Ht`, which is
+    equivalent to repeating them.
     """
     A *= rho
     HtW = _special_sparse_dot(Ht, W, Vt)
     Vt_data = Vt.data
     HtW_data = HtW.data
     np.divide(Vt_data, HtW_data + 1e-10, out=Vt_data)
+    if sample_weight is not None:
+        Ht = Ht * sample_weight.reshape(-1, 1)
     HtVt = safe_sparse_dot(Ht.T, Vt)
     A += W * HtVt
     B *= rho
@@ -1107,6 +1767,32 @@ def _multiplicative_update_w(
     return W, A, B
 
 
+def _kl_divergence(
+    V: NDArray, H: NDArray, W: NDArray, sample_weight: NDArray | None = None
+) -> float:
+    """
+    Kullback-Leibler divergence between `V` and `HW`.
+
+    If given, `sample_weight` weights the rows of `V` and `H`, which gives the
+    same divergence as repeating them.
+    """
+    if sample_weight is None:
+        return _beta_divergence(V, H, W, "kullback-leibler", square_root=False)
+    # Same computation as _beta_divergence, with weighted terms
+    epsilon = np.finfo(np.float32).eps
+    V = sparse.csr_matrix(V)
+    # HW where V is non zero, in the order of the non zero entries of V
+    rows, _ = V.nonzero()
+    V_data = V.data[V.data != 0]
+    HW_data = _special_sparse_dot(H, W, V).data
+    keep = V_data > epsilon
+    V_data, HW_data = V_data[keep], np.maximum(HW_data[keep], epsilon)
+    weights = sample_weight[rows[keep]]
+    res = np.dot(weights * V_data, np.log(V_data / HW_data))
+    res += np.dot(sample_weight, H) @ W.sum(axis=1) - np.dot(weights, V_data)
+    return res
+
+
 def _rescale_h(V: NDArray, H: NDArray) -> NDArray:
     """
     Rescale the activations `H`.
@@ -1117,6 +1803,16 @@ def _rescale_h(V: NDArray, H: NDArray) -> NDArray:
     return H
 
 
+def _topics_h(V: NDArray, W: NDArray) -> NDArray:
+    """
+    Initialize the activations from the n-grams counts `V` and the topics `W`,
+    by sharing the count of each n-gram between the topics in proportion to
+    their weight for this n-gram.
+    """
+    W_share = W / np.maximum(W.sum(axis=0), 1e-10)
+    return np.asarray(safe_sparse_dot(V, W_share.T))
+
+
 def _multiplicative_update_h(
     Vt: NDArray,
     W: NDArray,
@@ -1129,6 +1825,11 @@ def _multiplicative_update_h(
 ):
     """
     Multiplicative update step for the activations `H`.
+
+    All the rows of `Ht` are updated at once with sparse matrix products.
+    A row is frozen as soon as its relative squared change falls below
+    ``epsilon ** 2``, and the other rows are updated for at most `max_iter`
+    iterations. `Ht` is modified in-place.
     """
     if rescale_W:
         WT1 = 1 + 1 / gamma_scale_prior
@@ -1137,20 +1838,44 @@ def _multiplicative_update_h(
         WT1 = np.sum(W, axis=1) + 1 / gamma_scale_prior
         W_WT1 = W / WT1.reshape(-1, 1)
     const = (gamma_shape_prior - 1) / WT1
+    # The sparse products need a C-contiguous array, which is made once
+    W_WT1_T = np.ascontiguousarray(W_WT1.T)
     squared_epsilon = epsilon**2
-    for vt, ht in zip(Vt, Ht):
-        vt_ = vt.data
-        idx = vt.indices
-        W_WT1_ = W_WT1[:, idx]
-        W_ = W[:, idx]
-        squared_norm = 1
-        for _ in range(max_iter):
-            if squared_norm <= squared_epsilon:
+    Vt = sparse.csr_matrix(Vt)
+    # Indices of the rows which have not converged yet
+    active = np.arange(Ht.shape[0])
+    n_iter = 0
+    while n_iter < max_iter and active.size:
+        # Gather the non zero entries of the active rows of V, and the matching
+        # columns of W, once for several iterations
+        Vt_active = Vt[active]
+        rows = np.repeat(np.arange(active.size), np.diff(Vt_active.indptr))
+        W_nnz = W.T[Vt_active.indices]
+        Ht_active = Ht[active]
+        running = np.ones(active.size, dtype=bool)
+        while n_iter < max_iter:
+            # Ratio of the n-grams counts to their estimate HW, where V is non
+            # zero
+            HtW = np.einsum("ij,ij->i", Ht_active[rows], W_nnz)
+            ratio = sparse.csr_matrix(
+                (Vt_active.data / (HtW + 1e-10), Vt_active.indices, Vt_active.indptr),
+                shape=Vt_active.shape,
+            )
+            Ht_out = Ht_active * safe_sparse_dot(ratio, W_WT1_T) + const
+            change = Ht_out - Ht_active
+            squared_norm = np.einsum("ij,ij->i", change, change) / np.einsum(
+                "ij,ij->i", Ht_active, Ht_active
+            )
+            # Only update the running rows, NaN norms (null activations) do not
+            # count as converged
+            Ht_active[running] = Ht_out[running]
+            running &= ~(squared_norm <= squared_epsilon)
+            n_iter += 1
+            if np.count_nonzero(running) <= active.size // 2:
+                # Enough rows have converged to gather the running ones again
                 break
-            aux = np.dot(W_WT1_, vt_ / (np.dot(ht, W_) + 1e-10))
-            ht_out = ht * aux + const
-            squared_norm = np.dot(ht_out - ht, ht_out - ht) / np.dot(ht, ht)
-            ht[:] = ht_out
+        Ht[active] = Ht_active
+        active = active[running]
     return Ht
 
 
@@ -1168,6 +1893,23 @@ def batch_lookup(
         yield unq_indices, indices
 
 
+def batch_counts(
+    lookup: NDArray,
+    n: int = 1,
+) -> Generator[tuple[NDArray, NDArray], None, None]:
+    """
+    Make batches of the unique values of the lookup array, in the order of
+    their first occurrence, with their number of occurrences.
+    """
+    unq_indices, first, counts = np.unique(
+        lookup, return_index=True, return_counts=True
+    )
+    order = np.argsort(first, kind="stable")
+    for idx in range(0, len(order), n):
+        batch = order[idx : idx + n]
+        yield unq_indices[batch], counts[batch]
+
+
 def get_kmeans_prototypes(
     X: ArrayLike,
     n_prototypes: int,
@@ -1176,12 +1918,13 @@ def get_kmeans_prototypes(
     ngram_range: tuple[int, int] = (2, 4),
     sparse: bool = False,
     sample_weight=None,
+    minibatch: bool = False,
     random_state: int | RandomState | None = None,
 ) -> NDArray:
     """
     Computes prototypes based on:
       - dimensionality reduction (via hashing n-grams)
-      - k-means clustering
+      - k-means clustering, or mini-batch k-means if `minibatch=True`
       - nearest neighbor
     """
     vectorizer = HashingVectorizer(
@@ -1194,7 +1937,12 @@ def get_kmeans_prototypes(
     projected = vectorizer.transform(X)
     if not sparse:
         projected = projected.toarray()
-    kmeans = KMeans(n_clusters=n_prototypes, n_init=10, random_state=random_state)
+    if minibatch:
+        kmeans = MiniBatchKMeans(
+            n_clusters=n_prototypes, n_init=3, random_state=random_state
+        )
+    else:
+        kmeans = KMeans(n_clusters=n_prototypes, n_init=10, random_state=random_state)
     kmeans.fit(projected, sample_weight=sample_weight)
     centers = kmeans.cluster_centers_
     neighbors = NearestNeighbors()
@@ -4,22 +4,145 @@ applying the MinHash method to n-gram decompositions of strings.
 """
 from __future__ import annotations
 
+import numbers
+import os
 from collections.abc import Callable, Collection
+from pathlib import Path
 from typing import Literal
 
 import numpy as np
+import pandas as pd
 from joblib import Parallel, delayed, effective_n_jobs
 from numpy.typing import ArrayLike, NDArray
-from sklearn.base import BaseEstimator, TransformerMixin
-from sklearn.utils import gen_even_slices, murmurhash3_32
+from sklearn.base import BaseEstimator, TransformerMixin, clone
+from sklearn.utils import gen_batches, gen_even_slices, murmurhash3_32
 from sklearn.utils.validation import _check_feature_names_in, check_is_fitted
 
-from ._fast_hash import ngram_min_hash
-from ._string_distances import get_unique_ngrams
-from ._utils import LRUDict, check_input
+from ._dataframe._namespace import is_pandas, is_polars
+from ._fast_hash import ngram_min_hash_batch, ngram_min_hash_utf8
+from ._string_distances import (
+    get_ngram_ids,
+    get_ngram_vocabulary,
+)
+from ._utils import LRUDict, MmapDict, check_input, import_optional_dependency
 
 NoneType = type(None)
 
+# Smallest prime larger than 2**32, used by the universal hashing family of
+# the 'murmur_universal' hashing
+_UNIVERSAL_PRIME = np.uint64(4294967311)
+
+_MURMUR_BATCH_SIZE = 1024
+
+
+def _is_arrow_string_dtype(dtype) -> bool:
+    """Whether a pandas dtype stores strings in Arrow arrays."""
+    if isinstance(dtype, pd.StringDtype):
+        return dtype.storage.startswith("pyarrow")
+    if isinstance(dtype, pd.ArrowDtype):
+        return str(dtype.pyarrow_dtype) in ["string", "large_string"]
+    return False
+
+
+def _get_arrow_string_columns(X) -> list | None:
+    """Get the columns of a dataframe as Arrow string arrays, without copies.
+
+    Returns `None` unless `X` is a Polars dataframe with only string columns,
+    or a pandas dataframe with only Arrow-backed string columns.
+    """
+    if is_polars(X):
+        import polars as pl
+
+        if not isinstance(X, pl.DataFrame) or not all(
+            dtype == pl.Utf8 for dtype in X.dtypes
+        ):
+            return None
+        columns = [X.to_series(j).to_arrow() for j in range(X.shape[1])]
+    elif is_pandas(X):
+        if X.shape[1] == 0 or not all(map(_is_arrow_string_dtype, X.dtypes)):
+            return None
+        columns = [X.iloc[:, j].array.__arrow_array__() for j in range(X.shape[1])]
+    else:
+        return None
+
+    pa = import_optional_dependency("pyarrow")
+    arrays = []
+    for column in columns:
+        if isinstance(column, pa.ChunkedArray):
+            column = column.combine_chunks()
+        if not (
+            pa.types.is_string(column.type) or pa.types.is_large_string(column.type)
+        ):
+            column = column.cast(pa.large_string())
+        arrays.append(column)
+    return arrays
+
+
+def _get_utf8_buffers(array) -> tuple[NDArray, NDArray]:
+    """Get the data and offsets buffers of an Arrow string array, without copies.
+
+    Returns
+    -------
+    data : ndarray of dtype uint8
+        The concatenated UTF-8 encoded strings.
+    offsets : ndarray of shape (len(array) + 1, )
+        The boundaries of the strings in `data`.
+    """
+    _, offsets, data = array.buffers()
+    offsets_dtype = np.int64 if str(array.type) == "large_string" else np.int32
+    offsets = np.frombuffer(offsets, dtype=offsets_dtype)
+    offsets = offsets[array.offset : array.offset + len(array) + 1]
+    if data is None:
+        return np.zeros(0, dtype=np.uint8), offsets
+    return np.frombuffer(data, dtype=np.uint8), offsets
+
+
+_OUTPUT_DTYPES = [np.float64, np.float32, np.int32, np.uint16, np.uint8]
+
+
+def _convert_hashes(hashes: NDArray, dtype: np.dtype) -> NDArray:
+    """Convert hashes to the output dtype of the MinHashEncoder.
+
+    Floating-point hashes are cast. Integer hashes are cast to int32, and
+    then truncated to their lowest bits for unsigned dtypes (b-bit minwise
+    hashing).
+    """
+    if dtype.kind == "f":
+        return hashes.astype(dtype)
+    hashes = hashes.astype(np.int32)
+    if dtype.kind == "u":
+        hashes = hashes.view(np.uint32) & (2 ** (8 * dtype.itemsize) - 1)
+    return hashes.astype(dtype)
+
+
+def _densify(bins: NDArray) -> NDArray:
+    """Fill the empty bins of one permutation hashing.
+
+    Uses rotation densification: an empty bin (``inf``) takes the value of the
+    next non-empty bin on its right, circularly, plus the distance to that
+    bin. Non-empty bins have values in [0, 1), so densified values can not be
+    mistaken for actual ones.
+
+    Parameters
+    ----------
+    bins : ndarray of shape (n_strings, n_bins)
+        The min of each bin, ``inf`` for empty bins. Each row must have at
+        least one non-empty bin.
+
+    Returns
+    -------
+    ndarray of shape (n_strings, n_bins)
+        The densified bins.
+    """
+    n_bins = bins.shape[1]
+    filled = np.isfinite(np.tile(bins, 2))
+    # Index of the next non-empty bin, looking at the bins twice to wrap around
+    idx = np.where(filled, np.arange(2 * n_bins), 2 * n_bins)
+    next_filled = np.minimum.accumulate(idx[:, ::-1], axis=1)[:, ::-1][:, :n_bins]
+    return np.take_along_axis(np.tile(bins, 2), next_filled, axis=1) + (
+        next_filled - np.arange(n_bins)
+    )
+
 
 class MinHashEncoder(TransformerMixin, BaseEstimator):
     """Encode string categorical features by applying the MinHash method to n-gram \
@@ -27,8 +150,8 @@ class MinHashEncoder(TransformerMixin, BaseEstimator):
 
     The principle is as follows:
 
-    1. A string is viewed as a succession of numbers (the ASCII or UTF8
-       representation of its elements).
+    1. A string is viewed as a succession of numbers (the Unicode code points
+       of its characters).
     2. The string is then decomposed into a set of n-grams, i.e.
        n-dimensional vectors of integers.
     3. A hashing function is used to assign an integer to each n-gram.
@@ -51,9 +174,18 @@ class MinHashEncoder(TransformerMixin, BaseEstimator):
         The lower and upper boundaries of the range of n-values for different
         n-grams used in the string similarity. All values of `n` such
         that ``min_n <= n <= max_n`` will be used.
-    hashing : {'fast', 'murmur'}, default='fast'
+    hashing : {'fast', 'murmur', 'murmur_universal', 'oph'}, default='fast'
         Hashing function. `fast` is faster than `murmur` but
         might have some concern with its entropy.
+        `murmur_universal` hashes each n-gram only once with murmur, and
+        derives the `n_components` hash functions from this hash with a
+        universal hashing family ``(a * h + b) mod p``. It is much faster than
+        `murmur`, but gives different encodings.
+        `oph` (one permutation hashing) hashes each n-gram only once, splits
+        the range of the hashes in `n_components` bins and takes the min of
+        each bin, filling empty bins from their non-empty neighbors. Its cost
+        grows with the number of n-grams plus `n_components` rather than with
+        their product, which makes it faster than `fast` with many components.
     minmax_hash : bool, default=False
         If `True`, returns the min and max hashes concatenated.
     handle_missing : {'error', 'zero_impute'}, default='zero_impute'
@@ -61,15 +193,38 @@ class MinHashEncoder(TransformerMixin, BaseEstimator):
         vectors filled with zeros.
     n_jobs : int, optional
         The number of jobs to run in parallel.
-        The hash computations for all unique elements are parallelized.
+        The hash computations for the unique elements which are not in the
+        cache are parallelized, with threads for `fast` hashing and processes
+        otherwise, unless another joblib backend is set. The computed hashes
+        are then added to the cache.
         `None` means 1 unless in a joblib.parallel_backend.
         -1 means using all processors.
         See :term:`n_jobs` for more details.
+    output_dtype : {np.float64, np.float32, np.int32, np.uint16, np.uint8}, \
+            default=np.float64
+        The dtype of the output. With `fast` hashing, ``np.int32`` gives the
+        raw hashes, and ``np.uint16`` and ``np.uint8`` keep only their 16 or 8
+        lowest bits (b-bit minwise hashing), which divides the memory used by
+        the output by 4 or 8. Integer dtypes are only supported with `fast`
+        hashing.
+    cache_size : int, default=1024
+        The maximum number of encoded strings kept in memory, in `hash_dict_`,
+        to speed up later transforms. The least recently used strings are
+        evicted first.
+    cache_dir : str or path-like, optional
+        If not `None`, the encoded strings are also stored in this directory,
+        in memory-mapped ``.npy`` files, without size limit. They are reused
+        by all the encoders using the same directory with the same
+        `n_components`, `ngram_range`, `hashing` and `minmax_hash`, including
+        in other processes.
 
     Attributes
     ----------
     hash_dict_ : LRUDict
         Computed hashes.
+    hash_store_ : MmapDict or None
+        Computed hashes stored in `cache_dir`, or `None` if `cache_dir` is
+        `None`.
     n_features_in_ : int
         Number of features seen during :term:`fit`.
     feature_names_in_ : ndarray of shape (n_features_in,)
@@ -116,18 +271,20 @@ class MinHashEncoder(TransformerMixin, BaseEstimator):
     """
 
     hash_dict_: LRUDict
-
-    _capacity: int = 2**10
+    hash_store_: MmapDict | None
 
     def __init__(
         self,
         *,
         n_components: int = 30,
         ngram_range: tuple[int, int] = (2, 4),
-        hashing: Literal["fast", "murmur"] = "fast",
+        hashing: Literal["fast", "murmur", "murmur_universal", "oph"] = "fast",
         minmax_hash: bool = False,
         handle_missing: Literal["error", "zero_impute"] = "zero_impute",
         n_jobs: int = None,
+        output_dtype: type = np.float64,
+        cache_size: int = 2**10,
+        cache_dir: str | os.PathLike | None = None,
     ):
         self.ngram_range = ngram_range
         self.n_components = n_components
@@ -135,94 +292,272 @@ class MinHashEncoder(TransformerMixin, BaseEstimator):
         self.minmax_hash = minmax_hash
         self.handle_missing = handle_missing
         self.n_jobs = n_jobs
+        self.output_dtype = output_dtype
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
 
-    def _get_murmur_hash(self, string: str) -> NDArray:
-        """
-        Encode a string using murmur hashing function.
+    def _get_murmur_hash_batch(self, strings: Collection[str]) -> NDArray:
+        """Encode several strings using murmur hashing function.
+
+        The n-grams of each batch of strings are extracted together, and each
+        unique n-gram of the batch is hashed once per component, with the
+        component as seed. Each component is the min of the hashes of the
+        n-grams of the string.
 
         Parameters
         ----------
-        string : str
-            The string to encode.
+        strings : collection of str
+            The strings to encode.
 
         Returns
         -------
-        ndarray of shape (n_components, )
-            The encoded string.
+        ndarray of shape (n_strings, n_components)
+            The encoded strings.
         """
-        min_hashes = np.ones(self.n_components) * np.infty
-        grams = get_unique_ngrams(string, self.ngram_range)
-        if len(grams) == 0:
-            grams = get_unique_ngrams(" Na ", self.ngram_range)
-        for gram in grams:
-            hash_array = np.array(
+        strings = np.asarray(strings, dtype=object)
+        res = np.empty((len(strings), self.n_components))
+        for batch in gen_batches(len(strings), _MURMUR_BATCH_SIZE):
+            gram_ids, indptr, grams = self._get_unique_ngrams(strings[batch])
+            hashes = np.array(
                 [
-                    murmurhash3_32("".join(gram), seed=d, positive=True)
+                    [murmurhash3_32(gram, seed=d, positive=True) for gram in grams]
                     for d in range(self.n_components)
-                ]
+                ],
+                dtype=np.float64,
+            ).reshape(self.n_components, len(grams))
+            res[batch] = np.minimum.reduceat(hashes[:, gram_ids], indptr[:-1], axis=1).T
+        return res / (2**32 - 1)
+
+    def _get_unique_ngrams(
+        self, strings: Collection[str]
+    ) -> tuple[NDArray, NDArray, list[str]]:
+        """Extract the unique n-grams of several strings.
+
+        Strings without any n-gram are replaced by ``" Na "``.
+
+        Parameters
+        ----------
+        strings : collection of str
+            The strings to decompose in n-grams.
+
+        Returns
+        -------
+        gram_ids : ndarray of shape (n_grams, )
+            The index of each n-gram of each string in `grams`.
+            The n-grams of the string ``i`` are
+            ``gram_ids[indptr[i]:indptr[i + 1]]``.
+        indptr : ndarray of shape (n_strings + 1, )
+            The boundaries of the n-grams of each string in `gram_ids`.
+        grams : list of str
+            The unique n-grams of all the strings.
+        """
+        strings = np.asarray(strings, dtype=object)
+        indptr, gram_ids, grams = get_ngram_vocabulary(strings, self.ngram_range)
+        empty = indptr[1:] == indptr[:-1]
+        if empty.any():
+            strings = strings.copy()
+            strings[empty] = " Na "
+            indptr, gram_ids, grams = get_ngram_vocabulary(strings, self.ngram_range)
+        return gram_ids, indptr, grams
+
+    def _get_ngram_murmur_hashes(
+        self, strings: Collection[str]
+    ) -> tuple[NDArray, NDArray, NDArray]:
+        """Hash each unique n-gram of several strings once with murmur.
+
+        Parameters
+        ----------
+        strings : collection of str
+            The strings to decompose in n-grams.
+
+        Returns
+        -------
+        gram_ids : ndarray of shape (n_grams, )
+            The index of each n-gram of each string in `gram_hashes`.
+            The n-grams of the string ``i`` are
+            ``gram_ids[indptr[i]:indptr[i + 1]]``.
+        indptr : ndarray of shape (n_strings + 1, )
+            The boundaries of the n-grams of each string in `gram_ids`.
+        gram_hashes : ndarray of shape (n_unique_grams, )
+            The positive 32-bit murmur hash of each unique n-gram, as uint64.
+        """
+        gram_ids, indptr, grams = self._get_unique_ngrams(strings)
+        gram_hashes = np.fromiter(
+            (murmurhash3_32(gram, positive=True) for gram in grams),
+            dtype=np.uint64,
+            count=len(grams),
+        )
+        return gram_ids, indptr, gram_hashes
+
+    def _get_murmur_universal_hash_batch(self, strings: Collection[str]) -> NDArray:
+        """Encode several strings using murmur and a universal hashing family.
+
+        Each unique n-gram of the strings is hashed once with murmur, to a
+        32-bit value ``h``. The `n_components` hash functions are then
+        ``(a * h + b) mod p``, for random ``a`` and ``b`` and a prime ``p``,
+        computed for all the n-grams of a batch of strings at once.
+
+        Parameters
+        ----------
+        strings : collection of str
+            The strings to encode.
+
+        Returns
+        -------
+        ndarray of shape (n_strings, n_components)
+            The encoded strings.
+        """
+        # a, b and the hashes are below 2**32 so a * h + b fits in 64 bits
+        rng = np.random.RandomState(0)
+        a = rng.randint(1, 2**32, size=(self.n_components, 1), dtype=np.uint64)
+        b = rng.randint(0, 2**32, size=(self.n_components, 1), dtype=np.uint64)
+
+        # The n-grams are hashed and permuted by batches of strings, to bound
+        # the size of the permuted hashes
+        strings = np.asarray(strings, dtype=object)
+        res = np.empty((len(strings), self.n_components))
+        for batch in gen_batches(len(strings), _MURMUR_BATCH_SIZE):
+            gram_ids, indptr, gram_hashes = self._get_ngram_murmur_hashes(
+                strings[batch]
             )
-            min_hashes = np.minimum(min_hashes, hash_array)
-        return min_hashes / (2**32 - 1)
+            permuted = (a * gram_hashes + b) % _UNIVERSAL_PRIME
+            res[batch] = np.minimum.reduceat(
+                permuted[:, gram_ids], indptr[:-1], axis=1
+            ).T
+        return res / _UNIVERSAL_PRIME
+
+    def _get_oph_hash_batch(self, strings: Collection[str]) -> NDArray:
+        """Encode several strings using one permutation hashing.
+
+        Each n-gram is hashed once, to a 32-bit value, with the vectorized
+        rolling hash of ``get_ngram_ids``. The range of the hashes is split in
+        `n_components` bins: the high bits of a hash give its bin, and the low
+        bits its value in the bin. Each component is the min of the values of
+        the n-grams in its bin. Empty bins are then densified.
+
+        Parameters
+        ----------
+        strings : collection of str
+            The strings to encode.
+
+        Returns
+        -------
+        ndarray of shape (n_strings, n_components)
+            The encoded strings.
+        """
+        strings = np.asarray(strings, dtype=object)
+        res = np.empty((len(strings), self.n_components))
+        for batch in gen_batches(len(strings), _MURMUR_BATCH_SIZE):
+            batch_strings = strings[batch]
+            indptr, ids = get_ngram_ids(batch_strings, self.ngram_range, unique=True)
+            empty = indptr[1:] == indptr[:-1]
+            if empty.any():
+                batch_strings = batch_strings.copy()
+                batch_strings[empty] = " Na "
+                indptr, ids = get_ngram_ids(
+                    batch_strings, self.ngram_range, unique=True
+                )
+
+            # The hashes are below 2**32 so h * n_components fits in 64 bits
+            scaled = (ids >> np.uint64(32)) * np.uint64(self.n_components)
+            bins = (scaled >> np.uint64(32)).astype(np.intp)
+            values = (scaled & np.uint64(2**32 - 1)) / 2**32
+            rows = np.repeat(np.arange(len(batch_strings)), np.diff(indptr))
+            batch_res = np.full((len(batch_strings), self.n_components), np.inf)
+            np.minimum.at(batch_res, (rows, bins), values)
+            res[batch] = _densify(batch_res)
+        return res
 
-    def _get_fast_hash(self, string: str) -> NDArray:
-        """Encode a string with fast hashing function.
+    def _get_fast_hash_batch(self, strings: Collection[str]) -> NDArray:
+        """Encode several strings with fast hashing function.
 
         Fast hashing supports both min_hash and minmax_hash encoding.
+        All the strings and all the seeds are hashed together with the
+        batched kernel of ``_fast_hash``.
+
+        Parameters
+        ----------
+        strings : collection of str
+            The strings to encode.
+
+        Returns
+        -------
+        ndarray of shape (n_strings, n_components)
+            The encoded strings, using specified encoding scheme.
+        """
+        return self._run_fast_hash(ngram_min_hash_batch, strings)
+
+    def _get_fast_hash_utf8(self, data: NDArray, offsets: NDArray) -> NDArray:
+        """Encode strings stored in a UTF-8 byte buffer with fast hashing function.
 
         Parameters
         ----------
-        string : str
-            The string to encode.
+        data : ndarray of shape (n_bytes, ) and dtype uint8
+            The concatenated UTF-8 encoded strings, as in Arrow string arrays.
+        offsets : ndarray of shape (n_strings + 1, )
+            The boundaries of the strings in `data`.
 
         Returns
         -------
-        ndarray of shape (n_components, )
-            The encoded string, using specified encoding scheme.
+        ndarray of shape (n_strings, n_components)
+            The encoded strings, using specified encoding scheme.
         """
+        return self._run_fast_hash(ngram_min_hash_utf8, data, offsets)
+
+    def _run_fast_hash(self, kernel: Callable, *strings) -> NDArray:
+        """Call a batched kernel of ``_fast_hash`` with all the seeds."""
         if self.minmax_hash:
-            return np.concatenate(
-                [
-                    ngram_min_hash(string, self.ngram_range, seed, return_minmax=True)
-                    for seed in range(self.n_components // 2)
-                ]
-            )
+            # The min and max hashes of each seed are consecutive
+            seeds = np.arange(self.n_components // 2)
+            hashes = kernel(*strings, self.ngram_range, seeds, return_minmax=True)
+            return hashes.reshape(-1, self.n_components)
         else:
-            return np.array(
-                [
-                    ngram_min_hash(string, self.ngram_range, seed)
-                    for seed in range(self.n_components)
-                ]
-            )
+            seeds = np.arange(self.n_components)
+            return kernel(*strings, self.ngram_range, seeds)
 
-    def _compute_hash_batched(
-        self, batch: Collection[str], hash_func: Callable[[str], NDArray]
-    ) -> NDArray:
-        """Function called to compute the hashes of a batch of strings.
-
-        Check if the string is in the hash dictionary, if not, compute the hash
-        using the specified hashing function and add it to the dictionary.
+    def _get_cached_hashes(self, strings: NDArray) -> tuple[NDArray, NDArray]:
+        """Look up strings in the hash dictionary and in the hash store.
 
         Parameters
         ----------
-        batch : collection of str
-            The batch of strings to encode.
-        hash_func : callable
-            Hashing function to use on the string.
+        strings : ndarray of shape (n_strings, )
+            The strings to encode.
 
         Returns
         -------
-        ndarray of shape (n_samples, n_components)
-            The encoded strings, using specified encoding scheme.
+        hashes : ndarray of shape (n_strings, n_components)
+            The encoded strings found in the caches, and zeros for the others.
+        to_compute : ndarray of shape (n_missing, )
+            The indices of the strings that were not found and are not missing
+            values, and thus need to be hashed.
         """
-        res = np.zeros((len(batch), self.n_components))
-        for i, string in enumerate(batch):
-            if string not in self.hash_dict_:
-                if string == "NAN":  # true if x is a missing value
-                    self.hash_dict_[string] = np.zeros(self.n_components)
-                else:
-                    self.hash_dict_[string] = hash_func(string)
-            res[i] = self.hash_dict_[string]
-        return res
+        res = np.zeros((len(strings), self.n_components))
+        to_compute = []
+        for i, string in enumerate(strings):
+            if string in self.hash_dict_:
+                res[i] = self.hash_dict_[string]
+            elif self.hash_store_ is not None and string in self.hash_store_:
+                res[i] = self.hash_store_[string]
+                self.hash_dict_[string] = res[i].copy()
+            # "" is a missing value, it is encoded with zeros
+            elif string != "":
+                to_compute.append(i)
+        return res, np.asarray(to_compute, dtype=np.intp)
+
+    def _cache_hashes(self, strings: NDArray, hashes: NDArray) -> None:
+        """Add newly computed hashes to the hash dictionary and hash store.
+
+        Parameters
+        ----------
+        strings : ndarray of shape (n_strings, )
+            The encoded strings.
+        hashes : ndarray of shape (n_strings, n_components)
+            Their encodings.
+        """
+        for string, hash_array in zip(strings, hashes):
+            self.hash_dict_[string] = hash_array.copy()
+        if self.hash_store_ is not None:
+            self.hash_store_.update(strings, hashes)
 
     def fit(self, X: ArrayLike, y=None) -> "MinHashEncoder":
         """Fit the MinHashEncoder to `X`.
@@ -243,20 +578,54 @@ class MinHashEncoder(TransformerMixin, BaseEstimator):
             The fitted MinHashEncoder instance (self).
         """
         self._check_feature_names(X, reset=True)
-        X = check_input(X)
-        self._check_n_features(X, reset=True)
+        # Only the number of columns is needed, so Arrow string columns are
+        # not converted to Python strings
+        arrow_columns = _get_arrow_string_columns(X)
+        if arrow_columns is None:
+            X = check_input(X)
+            self._check_n_features(X, reset=True)
+        else:
+            self.n_features_in_ = len(arrow_columns)
 
-        if self.hashing not in ["fast", "murmur"]:
+        if self.hashing not in ["fast", "murmur", "murmur_universal", "oph"]:
             raise ValueError(
-                f"Got hashing={self.hashing!r}, "
-                "but expected any of {'fast', 'murmur'}. "
+                f"Got hashing={self.hashing!r}, but expected "
+                "any of {'fast', 'murmur', 'murmur_universal', 'oph'}. "
             )
         if self.handle_missing not in ["error", "zero_impute"]:
             raise ValueError(
                 f"Got handle_missing={self.handle_missing!r}, but expected "
                 "any of {'error', 'zero_impute'}. "
             )
-        self.hash_dict_ = LRUDict(capacity=self._capacity)
+        try:
+            output_dtype = np.dtype(self.output_dtype)
+        except TypeError:
+            output_dtype = None
+        if output_dtype not in _OUTPUT_DTYPES:
+            raise ValueError(
+                f"Got output_dtype={self.output_dtype!r}, but expected any of "
+                "{np.float64, np.float32, np.int32, np.uint16, np.uint8}. "
+            )
+        if output_dtype.kind != "f" and self.hashing != "fast":
+            raise ValueError(
+                f"Got output_dtype={self.output_dtype!r}, but integer output "
+                "dtypes are only supported with hashing='fast'. "
+            )
+        if not isinstance(self.cache_size, numbers.Integral) or self.cache_size < 1:
+            raise ValueError(
+                f"Got cache_size={self.cache_size!r}, but expected a positive integer."
+            )
+        self.hash_dict_ = LRUDict(capacity=self.cache_size)
+        if self.cache_dir is None:
+            self.hash_store_ = None
+        else:
+            # Hashes are only shared between encoders computing the same ones
+            min_n, max_n = self.ngram_range
+            store_name = (
+                f"{self.hashing}-{self.n_components}-{min_n}_{max_n}"
+                f"-{'minmax' if self.minmax_hash else 'min'}"
+            )
+            self.hash_store_ = MmapDict(Path(self.cache_dir) / store_name)
         return self
 
     def transform(self, X: ArrayLike) -> NDArray:
@@ -274,8 +643,16 @@ class MinHashEncoder(TransformerMixin, BaseEstimator):
             Transformed input.
         """
         check_is_fitted(self, "hash_dict_")
+        if self.hash_store_ is not None:
+            # Pick up the hashes stored by other encoders since the last call
+            self.hash_store_.refresh()
         self._check_feature_names(X, reset=False)
-        X = check_input(X)
+        # Hashing from the Arrow buffers bypasses the caches
+        arrow_columns = None
+        if self.hashing == "fast" and self.hash_store_ is None:
+            arrow_columns = _get_arrow_string_columns(X)
+        if arrow_columns is None:
+            X = check_input(X)
         self._check_n_features(X, reset=False)
         if self.minmax_hash:
             if self.n_components % 2 != 0:
@@ -283,11 +660,11 @@ class MinHashEncoder(TransformerMixin, BaseEstimator):
                     "n_components should be even when using"
                     f"minmax_hash encoding, got {self.n_components}"
                 )
-        if self.hashing == "murmur":
+        if self.hashing in ["murmur", "murmur_universal", "oph"]:
             if self.minmax_hash:
                 raise ValueError(
                     "minmax_hash encoding is not supported"
-                    "with the murmur hashing function"
+                    f"with the {self.hashing} hashing function"
                 )
         if self.handle_missing not in ["error", "zero_impute"]:
             raise ValueError(
@@ -295,12 +672,12 @@ class MinHashEncoder(TransformerMixin, BaseEstimator):
                 f"'error' or 'zero_impute', got {self.handle_missing!r}"
             )
 
-        # Handle missing values
-        missing_mask = (
-            ~(X == X)  # Find np.nan
-            | (X == None)  # noqa: E711 Find None. Note: `X is None` doesn't work.
-            | (X == "")  # Find empty strings
-        )
+        if arrow_columns is not None:
+            return self._transform_arrow(arrow_columns)
+
+        # Handle missing values: None, NaN, pd.NA and empty strings
+        missing_mask = pd.isna(X)
+        missing_mask[~missing_mask] = X[~missing_mask] == ""
 
         if missing_mask.any():  # contains at least one missing value
             if self.handle_missing == "error":
@@ -309,38 +686,104 @@ class MinHashEncoder(TransformerMixin, BaseEstimator):
                     "handle_missing='zero_impute' to encode with missing values"
                 )
             elif self.handle_missing == "zero_impute":
-                # NANs will be replaced by zeroes in _compute_hash
-                X[missing_mask] = "NAN"
+                # Empty strings are encoded with zeros, as in the Arrow path,
+                # so that a "NAN" string is not taken for a missing value
+                X[missing_mask] = ""
 
+        # Only the parameters are sent to the workers, not the fitted caches
+        hasher = clone(self)
         if self.hashing == "fast":
-            hash_func = self._get_fast_hash
+            hash_func = hasher._get_fast_hash_batch
         elif self.hashing == "murmur":
-            hash_func = self._get_murmur_hash
+            hash_func = hasher._get_murmur_hash_batch
+        elif self.hashing == "murmur_universal":
+            hash_func = hasher._get_murmur_universal_hash_batch
+        elif self.hashing == "oph":
+            hash_func = hasher._get_oph_hash_batch
         else:
             raise ValueError(
-                "Hashing function should be either 'fast' or 'murmur', "
-                f"got {self.hashing!r}"
+                "Hashing function should be either 'fast', 'murmur', "
+                f"'murmur_universal' or 'oph', got {self.hashing!r}"
             )
 
-        # Compute the hashes for unique values
+        # Compute the hashes for unique values which are not in the caches
         unique_x, indices_x = np.unique(X, return_inverse=True)
-        n_jobs = effective_n_jobs(self.n_jobs)
-
-        # Compute the hashes in parallel on n_jobs batches
-        unique_x_trans = Parallel(n_jobs=n_jobs)(
-            delayed(self._compute_hash_batched)(
-                unique_x[idx_slice],
-                hash_func,
+        unique_x_trans, to_compute = self._get_cached_hashes(unique_x)
+        if len(to_compute):
+            strings = unique_x[to_compute]
+            n_jobs = effective_n_jobs(self.n_jobs)
+            # The fast hashing spends most of its time in NumPy operations,
+            # which release the GIL, while the others run Python code
+            prefer = "threads" if self.hashing == "fast" else "processes"
+
+            # Compute the hashes in parallel on n_jobs batches, and merge them
+            # in the caches of the estimator
+            hashes = Parallel(n_jobs=n_jobs, prefer=prefer)(
+                delayed(hash_func)(strings[idx_slice])
+                for idx_slice in gen_even_slices(len(strings), n_jobs)
             )
-            for idx_slice in gen_even_slices(len(unique_x), n_jobs)
+            hashes = np.concatenate(hashes)
+            unique_x_trans[to_compute] = hashes
+            self._cache_hashes(strings, hashes)
+
+        # Match the hashes of the unique value to the original values,
+        # directly in the output array: the row i * n_columns + j of
+        # the reshaped output is the encoding of X[i, j]
+        X_out = np.empty(
+            (len(X), X.shape[1] * self.n_components), dtype=self.output_dtype
         )
-
-        # Match the hashes of the unique value to the original values
-        X_out = np.concatenate(unique_x_trans)[indices_x].reshape(
-            len(X), X.shape[1] * self.n_components
+        np.take(
+            _convert_hashes(unique_x_trans, X_out.dtype),
+            indices_x.ravel(),
+            axis=0,
+            out=X_out.reshape(-1, self.n_components),
         )
+        return X_out
+
+    def _transform_arrow(self, columns: list) -> NDArray:
+        """Transform string columns stored in Arrow arrays.
 
-        return X_out.astype(np.float64)  # The output is an int32 before conversion
+        The unique values of each column are hashed directly from the UTF-8
+        buffer of its Arrow dictionary encoding, without creating Python
+        strings. Null values are found with the validity bitmap. The hashes
+        are not added to `hash_dict_`.
+
+        Parameters
+        ----------
+        columns : list of pyarrow.StringArray or pyarrow.LargeStringArray
+            The columns to encode.
+
+        Returns
+        -------
+        ndarray of shape (n_samples, n_columns * n_components)
+            Transformed input.
+        """
+        X_out = np.empty(
+            (len(columns[0]), len(columns) * self.n_components),
+            dtype=self.output_dtype,
+        )
+        for j, column in enumerate(columns):
+            encoded = column.dictionary_encode()
+            data, offsets = _get_utf8_buffers(encoded.dictionary)
+            # An extra row of zeros encodes the nulls
+            hashes = np.zeros((len(offsets), self.n_components))
+            hashes[:-1] = self._get_fast_hash_utf8(data, offsets)
+            is_empty = np.append(np.diff(offsets) == 0, False)
+            if column.null_count or is_empty.any():
+                if self.handle_missing == "error":
+                    raise ValueError(
+                        "Found missing values in input data; set "
+                        "handle_missing='zero_impute' to encode with missing values"
+                    )
+                hashes[is_empty] = 0
+            indices = encoded.indices.fill_null(len(hashes) - 1).to_numpy()
+            np.take(
+                _convert_hashes(hashes, X_out.dtype),
+                indices,
+                axis=0,
+                out=X_out[:, j * self.n_components : (j + 1) * self.n_components],
+            )
+        return X_out
 
     def get_feature_names_out(
         self, input_features: ArrayLike | str | None = None
@@ -0,0 +1,286 @@
+"""
+Implements the MinHashLSH index, which finds similar strings by hashing bands
+of their MinHashEncoder signatures (locality-sensitive hashing).
+"""
+from __future__ import annotations
+
+import numbers
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from scipy import sparse
+from sklearn.base import BaseEstimator, clone
+from sklearn.utils import gen_batches
+from sklearn.utils.validation import check_is_fitted
+
+from ._minhash_encoder import MinHashEncoder
+from ._utils import _expand_ranges, clone_if_default
+
+DEFAULT_ENCODER = MinHashEncoder(n_components=30)
+
+# Number of pairs of signatures compared at once when estimating similarities
+_SIMILARITY_BATCH_SIZE = 2**16
+
+
+def _check_strings(X: ArrayLike) -> NDArray:
+    """Check that X is a 1-D array-like of strings, and return it as a
+    2-D object array with a single column, as expected by the encoder."""
+    X = np.asarray(X, dtype=object)
+    if X.ndim != 1:
+        raise ValueError(
+            "Expected a 1-dimensional array-like of strings, got an array of "
+            f"shape {X.shape}."
+        )
+    return X[:, None]
+
+
+def _signature_codes(signatures: NDArray) -> NDArray:
+    """Return the signatures as uint64 codes, equal if and only if the
+    signature values are equal.
+
+    All the output dtypes of the encoder are exactly represented by float64.
+    """
+    return np.ascontiguousarray(signatures, dtype=np.float64).view(np.uint64)
+
+
+def _estimate_similarity(
+    signatures_a: NDArray, idx_a: NDArray, signatures_b: NDArray, idx_b: NDArray
+) -> NDArray:
+    """Fraction of equal components between the pairs of signatures
+    ``(signatures_a[idx_a], signatures_b[idx_b])``, which estimates the
+    Jaccard similarity of their n-gram sets."""
+    similarity = np.empty(len(idx_a), dtype=np.float64)
+    if not len(idx_a):
+        return similarity
+    for batch in gen_batches(len(idx_a), _SIMILARITY_BATCH_SIZE):
+        equal = signatures_a[idx_a[batch]] == signatures_b[idx_b[batch]]
+        similarity[batch] = equal.mean(axis=1)
+    return similarity
+
+
+class MinHashLSH(BaseEstimator):
+    """Index of strings for fast similarity search, with locality-sensitive \
+    hashing of their MinHash signatures.
+
+    The strings are encoded with a :class:`MinHashEncoder`. The signatures are
+    split into `n_bands` bands of ``r = n_columns / n_bands`` consecutive
+    components, and each band is hashed into a hash table. Two strings are
+    candidates if all the components of at least one of their bands are equal.
+    As each component of the signatures of two strings is equal with a
+    probability equal to the Jaccard similarity `s` of their n-gram sets, they
+    are candidates with probability ``1 - (1 - s^r)^n_bands``. This
+    probability rises sharply around the similarity ``(1 / n_bands)^(1 / r)``:
+    more bands find less similar pairs, at the cost of more candidates.
+
+    Finding candidates only requires lookups in the hash tables, rather than
+    comparing all the pairs of strings. The similarity of the candidates is
+    estimated by the fraction of equal components in their signatures.
+
+    Missing values and empty strings are encoded with zeros by the encoder.
+    They are not indexed: they are never candidates, and have no similar
+    strings when they are queried.
+
+    Parameters
+    ----------
+    encoder : MinHashEncoder, default=MinHashEncoder(n_components=30)
+        The encoder computing the signatures of the strings. It is cloned and
+        fitted on the strings passed to :term:`fit`. Its `n_components` must
+        be a multiple of `n_bands`.
+    n_bands : int, default=10
+        The number of bands the signatures are split into.
+
+    Attributes
+    ----------
+    encoder_ : MinHashEncoder
+        The fitted encoder.
+    signatures_ : ndarray of shape (n_samples, n_columns)
+        The signatures of the strings seen during :term:`fit`.
+    rows_per_band_ : int
+        The number of components in each band.
+    n_samples_fit_ : int
+        The number of strings seen during :term:`fit`.
+    multipliers_ : ndarray of shape (rows_per_band_,)
+        The random odd multipliers hashing the components of a band into a
+        key.
+    band_sorted_keys_ : ndarray of shape (n_bands, n_indexed)
+        The sorted keys of each band of the indexed strings, which are the
+        strings seen during :term:`fit` except the missing values.
+    band_order_ : ndarray of shape (n_bands, n_indexed)
+        The index of the string of each key in `band_sorted_keys_`.
+
+    See Also
+    --------
+    MinHashEncoder
+        Encode string columns as a numeric array with the minhash method.
+    deduplicate
+        Deduplicate data by hierarchically clustering similar strings.
+
+    Examples
+    --------
+    >>> from skrub import MinHashLSH
+    >>> lsh = MinHashLSH(n_bands=15)
+    >>> lsh.fit(["Paris", "Paris, FR", "London", "London, UK", "Berlin"])
+    MinHashLSH(n_bands=15)
+
+    The candidate pairs are the indices of strings sharing a band, with their
+    estimated similarity:
+
+    >>> pairs, similarity = lsh.candidate_pairs()
+    >>> pairs
+    array([[0, 1],
+           [2, 3]])
+
+    Queries return a sparse matrix of estimated similarities with the
+    strings seen during :term:`fit`:
+
+    >>> lsh.query(["London, U.K."]).toarray().round(2)
+    array([[0.  , 0.  , 0.37, 0.57, 0.  ]])
+    """
+
+    def __init__(self, encoder: MinHashEncoder = DEFAULT_ENCODER, n_bands: int = 10):
+        self.encoder = clone_if_default(encoder, DEFAULT_ENCODER)
+        self.n_bands = n_bands
+
+    def _band_keys(self, signatures: NDArray) -> NDArray:
+        """Hash each band of the signatures into a uint64 key.
+
+        Returns an array of shape (n_bands, n_samples).
+        """
+        codes = _signature_codes(signatures)
+        keys = np.empty((self.n_bands, codes.shape[0]), dtype=np.uint64)
+        for band in range(self.n_bands):
+            start = band * self.rows_per_band_
+            band_codes = codes[:, start : start + self.rows_per_band_]
+            # Multiply-add with random odd multipliers, wrapping modulo 2**64
+            keys[band] = (band_codes * self.multipliers_).sum(axis=1)
+        return keys
+
+    def fit(self, X: ArrayLike, y=None) -> "MinHashLSH":
+        """Encode the strings and index them.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_samples,)
+            The strings to index.
+        y : None
+            Unused, only here for compatibility.
+
+        Returns
+        -------
+        MinHashLSH
+            The fitted index.
+        """
+        X = _check_strings(X)
+        if not isinstance(self.encoder, MinHashEncoder):
+            raise TypeError(
+                "Expected 'encoder' to be a MinHashEncoder, "
+                f"got {type(self.encoder).__name__}. "
+            )
+        if not isinstance(self.n_bands, numbers.Integral) or self.n_bands < 1:
+            raise ValueError(
+                f"Got n_bands={self.n_bands!r}, but expected a positive integer. "
+            )
+        self.encoder_ = clone(self.encoder)
+        self.signatures_ = self.encoder_.fit_transform(X)
+        n_columns = self.signatures_.shape[1]
+        if n_columns % self.n_bands:
+            raise ValueError(
+                f"The signatures have {n_columns} columns, which is not a "
+                f"multiple of n_bands={self.n_bands}. "
+            )
+        self.rows_per_band_ = n_columns // self.n_bands
+        self.n_samples_fit_ = X.shape[0]
+
+        rng = np.random.RandomState(0)
+        self.multipliers_ = rng.randint(
+            0, 2**63, size=self.rows_per_band_, dtype=np.uint64
+        ) * np.uint64(2) + np.uint64(1)
+        # The signatures of the missing values are all zeros, and they are
+        # left out of the hash tables
+        indexed = np.flatnonzero(self.signatures_.any(axis=1))
+        keys = self._band_keys(self.signatures_[indexed])
+        order = np.argsort(keys, axis=1, kind="stable")
+        self.band_sorted_keys_ = np.take_along_axis(keys, order, axis=1)
+        self.band_order_ = indexed[order]
+        return self
+
+    def query(self, X: ArrayLike) -> sparse.csr_matrix:
+        """Find the strings of the index similar to the query strings.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_queries,)
+            The query strings.
+
+        Returns
+        -------
+        sparse matrix of shape (n_queries, n_samples_fit)
+            The estimated Jaccard similarities between the query strings and
+            their candidates among the strings seen during :term:`fit`. The
+            pairs which are not candidates are not stored.
+        """
+        check_is_fitted(self, "signatures_")
+        X = _check_strings(X)
+        signatures = self.encoder_.transform(X)
+        keys = self._band_keys(signatures)
+        # Missing values are not queried
+        is_missing = ~signatures.any(axis=1)
+
+        candidates = []
+        for band in range(self.n_bands):
+            sorted_keys = self.band_sorted_keys_[band]
+            starts = np.searchsorted(sorted_keys, keys[band], side="left")
+            ends = np.searchsorted(sorted_keys, keys[band], side="right")
+            counts = np.where(is_missing, 0, ends - starts)
+            rows = np.repeat(np.arange(X.shape[0], dtype=np.int64), counts)
+            cols = self.band_order_[band][_expand_ranges(starts, counts)]
+            candidates.append(rows * self.n_samples_fit_ + cols)
+        pair_codes = np.unique(np.concatenate(candidates))
+        rows, cols = np.divmod(pair_codes, self.n_samples_fit_)
+
+        similarity = _estimate_similarity(signatures, rows, self.signatures_, cols)
+        similarity = sparse.csr_matrix(
+            (similarity, (rows, cols)), shape=(X.shape[0], self.n_samples_fit_)
+        )
+        similarity.eliminate_zeros()
+        return similarity
+
+    def candidate_pairs(self) -> tuple[NDArray, NDArray]:
+        """Find the pairs of similar strings among the strings of the index.
+
+        Returns
+        -------
+        pairs : ndarray of shape (n_pairs, 2)
+            The indices ``(i, j)``, with ``i < j``, of the pairs of strings
+            sharing at least one band, sorted lexicographically.
+        similarity : ndarray of shape (n_pairs,)
+            The estimated Jaccard similarity of each pair.
+        """
+        check_is_fitted(self, "signatures_")
+        n_samples = self.n_samples_fit_
+        n_indexed = self.band_order_.shape[1]
+        candidates = []
+        for band in range(self.n_bands):
+            sorted_keys = self.band_sorted_keys_[band]
+            order = self.band_order_[band]
+            # Pair each position with the following positions of its bucket,
+            # keeping at each offset only the positions whose bucket goes on.
+            positions = np.arange(n_indexed - 1)
+            offset = 1
+            while positions.size:
+                positions = positions[positions + offset < n_indexed]
+                positions = positions[
+                    sorted_keys[positions] == sorted_keys[positions + offset]
+                ]
+                first, second = order[positions], order[positions + offset]
+                low = np.minimum(first, second).astype(np.int64)
+                high = np.maximum(first, second)
+                candidates.append(low * n_samples + high)
+                offset += 1
+        pair_codes = np.unique(np.concatenate(candidates + [np.empty(0, np.int64)]))
+        rows, cols = np.divmod(pair_codes, n_samples)
+
+        similarity = _estimate_similarity(
+            self.signatures_, rows, self.signatures_, cols
+        )
+        return np.stack([rows, cols], axis=1), similarity
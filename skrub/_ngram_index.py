@@ -0,0 +1,281 @@
+"""
+Implements the NgramIndex, which finds the most similar strings of a
+vocabulary with an inverted index of their n-grams.
+"""
+from __future__ import annotations
+
+import numbers
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from sklearn.base import BaseEstimator
+from sklearn.utils.validation import check_is_fitted
+
+from ._string_distances import _ngram_ids, get_ngram_count, preprocess
+from ._utils import _expand_ranges
+
+# Lower bounds of the similarity of the successive rings of string sizes
+# scored by ``NgramIndex.query``: the strings whose similarity bound is in
+# (0.9, 1] are scored first, then those in (0.8, 0.9], etc.
+_RING_BOUNDS = (0.9, 0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.2, 0.1, 0.0)
+
+
+def _analyze(strings: ArrayLike) -> tuple[NDArray, NDArray]:
+    """Apply the preprocessing of the SimilarityEncoder to the strings.
+
+    Returns the preprocessed strings, used to count their n-grams with
+    ``get_ngram_count``, and their lower-cased version, which is split in
+    n-grams as the CountVectorizer of the SimilarityEncoder does.
+    """
+    preprocessed = np.asarray(
+        [preprocess(string) for string in np.asarray(strings, dtype=object).ravel()],
+        dtype=object,
+    )
+    lowered = np.asarray([string.lower() for string in preprocessed], dtype=object)
+    return preprocessed, lowered
+
+
+def _count_ngrams(
+    strings: NDArray, ngram_range: tuple[int, int]
+) -> tuple[NDArray, NDArray, NDArray, NDArray]:
+    """Count the occurrences of each n-gram in each string.
+
+    Returns the flat arrays ``(rows, ids, counts)`` of the distinct n-grams of
+    each string, sorted by string, and the total number of n-grams of each
+    string.
+    """
+    rows, _, _, ids = _ngram_ids(strings, ngram_range)
+    n_ngrams = np.bincount(rows, minlength=len(strings))
+    order = np.lexsort((ids, rows))
+    rows, ids = rows[order], ids[order]
+    new = np.ones(len(ids), dtype=bool)
+    new[1:] = (rows[1:] != rows[:-1]) | (ids[1:] != ids[:-1])
+    starts = np.flatnonzero(new)
+    counts = np.diff(np.append(starts, len(ids)))
+    return rows[starts], ids[starts], counts, n_ngrams
+
+
+class NgramIndex(BaseEstimator):
+    """Index of a vocabulary of strings, to find the most similar entries to \
+    query strings.
+
+    The similarity between two strings is the n-gram similarity used by the
+    :class:`SimilarityEncoder`: the number of n-grams they share divided by
+    the number of n-grams in their union. Instead of computing the
+    similarity of a query with all the entries of the vocabulary, the index
+    keeps posting lists mapping each n-gram to the entries containing it, so
+    that only the entries sharing n-grams with the query are scored.
+
+    The entries are further pruned with their number of n-grams: as the
+    intersection of two strings with ``|a|`` and ``|b|`` n-grams has at most
+    ``min(|a|, |b|)`` n-grams, their similarity is at most
+    ``min(|a|, |b|) / max(|a|, |b|)``. The entries are scored by rings of
+    decreasing bounds, and the search stops as soon as `k` entries have a
+    similarity larger than the bound of the entries left.
+
+    Parameters
+    ----------
+    ngram_range : 2-tuple of int, default=(2, 4)
+        The lower and upper boundaries of the range of n-values for different
+        n-grams used in the string similarity. All values of `n` such
+        that ``min_n <= n <= max_n`` will be used.
+
+    Attributes
+    ----------
+    vocabulary_ : ndarray of shape (n_vocabulary,)
+        The strings of the index.
+    ngram_counts_ : ndarray of shape (n_vocabulary,)
+        The number of n-grams of each string of the vocabulary, as given by
+        ``get_ngram_count``.
+
+    See Also
+    --------
+    SimilarityEncoder
+        Encode string columns as a numeric array with n-gram string similarity.
+    MinHashLSH
+        Index of strings for fast similarity search, with locality-sensitive
+        hashing of their MinHash signatures.
+
+    Examples
+    --------
+    >>> from skrub import NgramIndex
+    >>> index = NgramIndex().fit(["Paris", "London", "Berlin", "Lisbon"])
+    >>> indices, similarities = index.query(["london", "Lisboa"], k=2)
+    >>> indices
+    array([[1, 3],
+           [3, 0]])
+    >>> similarities.round(2)
+    array([[1.  , 0.12],
+           [0.5 , 0.03]])
+    """
+
+    def __init__(self, ngram_range: tuple[int, int] = (2, 4)):
+        self.ngram_range = ngram_range
+
+    def fit(self, X: ArrayLike, y=None) -> "NgramIndex":
+        """Build the posting lists of the n-grams of a vocabulary.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_vocabulary,)
+            The strings of the vocabulary.
+        y : None
+            Unused, only here for compatibility.
+
+        Returns
+        -------
+        NgramIndex
+            The fitted index.
+        """
+        min_n, max_n = self.ngram_range
+        if not 1 <= min_n <= max_n:
+            raise ValueError(
+                f"Got ngram_range={self.ngram_range!r}, but expected "
+                "1 <= min_n <= max_n. "
+            )
+        self.vocabulary_ = np.asarray(X, dtype=object).ravel()
+        preprocessed, lowered = _analyze(self.vocabulary_)
+        self.ngram_counts_ = get_ngram_count(preprocessed, self.ngram_range)
+        rows, ids, counts, n_ngrams = _count_ngrams(lowered, self.ngram_range)
+        sizes = self._pruning_sizes(self.ngram_counts_, n_ngrams)
+
+        # Posting lists sorted by n-gram, then by size of the entries, so that
+        # the entries of a range of sizes sharing an n-gram are contiguous.
+        # Each posting is identified by a key combining both.
+        self._grams, gram_idx = np.unique(ids, return_inverse=True)
+        self._key_scale = sizes.max(initial=0) + 2
+        keys = gram_idx.ravel() * self._key_scale + sizes[rows] + 1
+        order = np.argsort(keys, kind="stable")
+        self._posting_keys = keys[order]
+        self._posting_rows = rows[order]
+        self._posting_counts = counts[order]
+        return self
+
+    @staticmethod
+    def _pruning_sizes(ngram_counts: NDArray, n_ngrams: NDArray) -> NDArray:
+        """The sizes used to prune entries, or -1 for entries which are never
+        pruned.
+
+        The bound on the similarity only holds if ``get_ngram_count`` gives the
+        actual number of n-grams, which is not the case for strings shorter
+        than the largest n-grams.
+        """
+        exact = (ngram_counts == n_ngrams) & (n_ngrams > 0)
+        return np.where(exact, ngram_counts, -1)
+
+    def query(self, X: ArrayLike, k: int = 1) -> tuple[NDArray, NDArray]:
+        """Find the `k` entries of the vocabulary most similar to each string.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_queries,)
+            The query strings.
+        k : int, default=1
+            The number of entries to return for each query.
+
+        Returns
+        -------
+        indices : ndarray of shape (n_queries, k)
+            The indices in `vocabulary_` of the most similar entries, by
+            decreasing similarity. Ties are broken by increasing index.
+        similarities : ndarray of shape (n_queries, k)
+            The similarities of the entries, equal to the encoding of the
+            :class:`SimilarityEncoder` with the same `ngram_range` and the
+            vocabulary as categories.
+        """
+        check_is_fitted(self, "vocabulary_")
+        if not isinstance(k, numbers.Integral) or not 1 <= k <= len(self.vocabulary_):
+            raise ValueError(
+                f"Got k={k!r}, but expected an integer between 1 and the size of "
+                f"the vocabulary ({len(self.vocabulary_)}). "
+            )
+        preprocessed, lowered = _analyze(X)
+        ngram_counts = get_ngram_count(preprocessed, self.ngram_range)
+        rows, ids, counts, n_ngrams = _count_ngrams(lowered, self.ngram_range)
+        sizes = self._pruning_sizes(ngram_counts, n_ngrams)
+        indptr = np.searchsorted(rows, np.arange(len(lowered) + 1))
+
+        indices = np.empty((len(lowered), k), dtype=np.intp)
+        similarities = np.empty((len(lowered), k), dtype=np.float64)
+        for i in range(len(lowered)):
+            query = slice(indptr[i], indptr[i + 1])
+            indices[i], similarities[i] = self._query_one(
+                ids[query], counts[query], ngram_counts[i], sizes[i], k
+            )
+        return indices, similarities
+
+    def _query_one(
+        self, ids: NDArray, counts: NDArray, ngram_count: int, size: int, k: int
+    ) -> tuple[NDArray, NDArray]:
+        """Find the `k` most similar entries to a single query string."""
+        # Keep the n-grams of the query which appear in the vocabulary
+        positions = np.searchsorted(self._grams, ids)
+        positions[positions == len(self._grams)] = 0
+        found = self._grams[positions] == ids
+        positions, counts = positions[found], counts[found]
+        base_keys = positions * self._key_scale + 1
+
+        # Score rings of entry sizes by decreasing bound. Each ring holds the
+        # sizes left of the previous ring, between ``low`` and ``high``, and
+        # the first ring also holds the entries which are never pruned.
+        bounds = _RING_BOUNDS if size > 0 else (0.0,)
+        max_size = self._key_scale - 2
+        prev_low, prev_high = size + 1, size
+        ranges = [(-1, -1)]
+        candidates, scores = [], []
+        n_scored = 0
+        for bound in bounds:
+            low = int(np.floor(size * bound)) + 1
+            high = int(np.ceil(size / bound)) - 1 if bound > 0 else max_size
+            ranges += [(low, prev_low - 1), (prev_high + 1, high)]
+            prev_low, prev_high = low, high
+            for range_low, range_high in ranges:
+                if (range_low, range_high) != (-1, -1):
+                    # Keep the keys within the postings of each n-gram, which
+                    # hold sizes from 1 to max_size. The ranges of the rings
+                    # are disjoint, so that each entry is scored once.
+                    range_low, range_high = max(range_low, 1), min(range_high, max_size)
+                if range_low > range_high:
+                    continue
+                starts = np.searchsorted(self._posting_keys, base_keys + range_low)
+                ends = np.searchsorted(
+                    self._posting_keys, base_keys + range_high, side="right"
+                )
+                lengths = ends - starts
+                postings = _expand_ranges(starts, lengths)
+                same = np.minimum(
+                    self._posting_counts[postings], np.repeat(counts, lengths)
+                )
+                entries, inverse = np.unique(
+                    self._posting_rows[postings], return_inverse=True
+                )
+                same_grams = np.bincount(inverse.ravel(), weights=same).astype(
+                    np.float64
+                )
+                all_grams = ngram_count + self.ngram_counts_[entries] - same_grams
+                candidates.append(entries)
+                scores.append(
+                    np.divide(
+                        same_grams,
+                        all_grams,
+                        out=np.zeros_like(same_grams),
+                        where=all_grams != 0,
+                    )
+                )
+                n_scored += len(entries)
+            ranges = []
+            # The entries left have a similarity of at most ``bound``
+            if n_scored >= k and np.partition(np.concatenate(scores), -k)[-k] > bound:
+                break
+
+        candidates = np.concatenate(candidates)
+        scores = np.concatenate(scores)
+        if np.count_nonzero(scores > 0) < k:
+            # Add the first entries sharing no n-gram with the query, which
+            # have a similarity of 0
+            n_others = min(len(self.vocabulary_), k + len(candidates))
+            others = np.setdiff1d(np.arange(n_others), candidates)
+            candidates = np.concatenate([candidates, others])
+            scores = np.concatenate([scores, np.zeros(len(others))])
+        order = np.lexsort((candidates, -scores))[:k]
+        return candidates[order], scores[order]
@@ -1,16 +1,23 @@
 """
 Some string distances
 """
+from __future__ import annotations
 
 import re
 from collections import Counter
 
-# TODO vectorize these functions (accept arrays)
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from scipy import sparse
 
+from ._fast_hash import _iter_chunks, _pack_strings, _string_lengths
 
-def get_ngram_count(string: str, ngram_range: tuple[int, int]) -> int:
+
+def get_ngram_count(
+    string: str | ArrayLike, ngram_range: tuple[int, int]
+) -> int | NDArray:
     """
-    Compute the number of ngrams in a string.
+    Compute the number of ngrams in a string, or in each string of an array.
 
     Here is where the formula comes from:
 
@@ -22,12 +29,16 @@ def get_ngram_count(string: str, ngram_range: tuple[int, int]) -> int:
 
     """
     min_n, max_n = ngram_range
-    ngram_count = 0
-
-    for i in range(min_n, max_n + 1):
-        ngram_count += len(string) - i + 1
+    if isinstance(string, str):
+        ngram_count = 0
+        for i in range(min_n, max_n + 1):
+            ngram_count += len(string) - i + 1
+        return ngram_count
 
-    return ngram_count
+    strings = np.asarray(string, dtype=object).ravel()
+    lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+    n_sizes = max_n - min_n + 1
+    return n_sizes * (lengths + 1) - n_sizes * (min_n + max_n) // 2
 
 
 def preprocess(x: str) -> str:
@@ -92,8 +103,269 @@ def get_ngrams(string: str, n: int) -> list[tuple]:
     return list(zip(*string_list))
 
 
+def _normalize(string: str) -> str:
+    """Lower-case the string, collapse its whitespace and pad it with spaces,
+    as done by ``get_ngrams``."""
+    return " " + " ".join(string.lower().split()) + " "
+
+
+# Multiplier of the polynomial rolling hash of the n-grams, and constants of
+# the splitmix64 finalizer which spreads its bits
+_ROLLING_MULTIPLIER = np.uint64(0x100000001B3)
+_MIX_MULTIPLIERS = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+
+
+def _mix(hashes: NDArray) -> NDArray:
+    """splitmix64 finalizer, applied inplace to an array of uint64."""
+    hashes ^= hashes >> np.uint64(30)
+    hashes *= _MIX_MULTIPLIERS[0]
+    hashes ^= hashes >> np.uint64(27)
+    hashes *= _MIX_MULTIPLIERS[1]
+    hashes ^= hashes >> np.uint64(31)
+    return hashes
+
+
+def _ngram_ids(
+    strings: NDArray, ngram_range: tuple[int, int]
+) -> tuple[NDArray, NDArray, NDArray, NDArray]:
+    """
+    Compute the IDs of all the n-grams of normalized strings.
+
+    Returns the flat arrays ``(rows, starts, sizes, ids)``, giving for each
+    n-gram the index of its string, its position and size in the string, and
+    its ID. The n-grams are sorted by string.
+    """
+    min_n, max_n = ngram_range
+    lengths = _string_lengths(strings)
+    rows, starts, sizes, ids = [], [], [], []
+    for chunk in _iter_chunks(lengths, max_n - min_n + 1):
+        chunk_lengths = lengths[chunk]
+        width = chunk_lengths.max(initial=0)
+        matrix = _pack_strings(strings[chunk], width).astype(np.uint64)
+        for n in range(min_n, min(max_n, width) + 1):
+            n_windows = width - n + 1
+            # Polynomial hash of the windows, starting from n so that n-grams
+            # of different sizes get different IDs
+            hashes = np.full((len(chunk), n_windows), n, dtype=np.uint64)
+            for k in range(n):
+                hashes *= _ROLLING_MULTIPLIER
+                hashes += matrix[:, k : k + n_windows]
+            valid = np.arange(n_windows) < (chunk_lengths - n + 1)[:, None]
+            chunk_rows, chunk_starts = np.nonzero(valid)
+            rows.append(chunk[chunk_rows])
+            starts.append(chunk_starts)
+            sizes.append(np.full(len(chunk_rows), n))
+            ids.append(_mix(hashes[valid]))
+    empty = [np.empty(0, dtype=np.intp)]
+    rows, starts, sizes = (np.concatenate(a + empty) for a in (rows, starts, sizes))
+    ids = np.concatenate(ids + [np.empty(0, dtype=np.uint64)])
+    order = np.argsort(rows, kind="stable")
+    return rows[order], starts[order], sizes[order], ids[order]
+
+
+def get_ngram_ids(
+    strings: ArrayLike, ngram_range: tuple[int, int], unique: bool = False
+) -> tuple[NDArray, NDArray]:
+    """
+    Return integer IDs of the n-grams of several strings.
+
+    The strings are lower-cased, their whitespace is collapsed and they are
+    padded with spaces, as in ``get_unique_ngrams``. Each n-gram is then
+    mapped to a 64-bit ID with a rolling hash of its Unicode code points, so
+    that equal n-grams get equal IDs, and different n-grams get different IDs
+    except with a negligible probability. The n-grams of all the strings are
+    hashed together with NumPy operations, without creating Python objects.
+
+    Parameters
+    ----------
+    strings : array-like of str
+        The strings to split in n-grams.
+    ngram_range : tuple (min_n, max_n)
+        The lower and upper boundaries of the range of n-values for different
+        n-grams. All values of `n` such that ``min_n <= n <= max_n`` will be
+        used.
+    unique : bool, default=False
+        If True, each n-gram is only returned once per string, and the IDs of
+        each string are sorted.
+
+    Returns
+    -------
+    indptr : ndarray of shape (n_strings + 1, )
+        The boundaries of the n-grams of each string in `ids`: the n-grams of
+        the string ``i`` are ``ids[indptr[i]:indptr[i + 1]]``.
+    ids : ndarray of shape (n_ngrams, ) and dtype uint64
+        The IDs of the n-grams of all the strings.
+    """
+    strings = _normalize_array(strings)
+    rows, _, _, ids = _ngram_ids(strings, ngram_range)
+    if unique:
+        rows, ids = _unique_per_row(rows, ids)
+    return _indptr(rows, len(strings)), ids
+
+
+def get_ngram_vocabulary(
+    strings: ArrayLike, ngram_range: tuple[int, int]
+) -> tuple[NDArray, NDArray, list[str]]:
+    """
+    Return the unique n-grams of several strings, and the n-grams of each string.
+
+    The n-grams are extracted as in ``get_ngram_ids``, so each distinct n-gram
+    is only converted to a Python string once.
+
+    Parameters
+    ----------
+    strings : array-like of str
+        The strings to split in n-grams.
+    ngram_range : tuple (min_n, max_n)
+        The lower and upper boundaries of the range of n-values for different
+        n-grams. All values of `n` such that ``min_n <= n <= max_n`` will be
+        used.
+
+    Returns
+    -------
+    indptr : ndarray of shape (n_strings + 1, )
+        The boundaries of the n-grams of each string in `gram_ids`.
+    gram_ids : ndarray of shape (n_ngrams, )
+        The unique n-grams of each string, as indices in `grams`.
+    grams : list of str
+        The unique n-grams of all the strings.
+    """
+    strings = _normalize_array(strings)
+    rows, starts, sizes, ids = _ngram_ids(strings, ngram_range)
+    _, first, gram_ids = np.unique(ids, return_index=True, return_inverse=True)
+    grams = [
+        strings[row][start : start + size]
+        for row, start, size in zip(rows[first], starts[first], sizes[first])
+    ]
+    rows, gram_ids = _unique_per_row(rows, gram_ids.ravel())
+    return _indptr(rows, len(strings)), gram_ids, grams
+
+
+def _normalize_array(strings: ArrayLike) -> NDArray:
+    """Normalize an array-like of strings with ``_normalize``."""
+    return np.asarray(
+        [_normalize(string) for string in np.asarray(strings, dtype=object).ravel()],
+        dtype=object,
+    )
+
+
+def _unique_per_row(rows: NDArray, ids: NDArray) -> tuple[NDArray, NDArray]:
+    """Remove the duplicated IDs of each row, and sort the IDs of each row."""
+    order = np.lexsort((ids, rows))
+    rows, ids = rows[order], ids[order]
+    keep = np.ones(len(ids), dtype=bool)
+    keep[1:] = (rows[1:] != rows[:-1]) | (ids[1:] != ids[:-1])
+    return rows[keep], ids[keep]
+
+
+def _indptr(rows: NDArray, n_rows: int) -> NDArray:
+    """CSR-style boundaries of the rows, from the sorted row of each element."""
+    indptr = np.zeros(n_rows + 1, dtype=np.intp)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr
+
+
+def min_intersection(counts1, counts2) -> NDArray:
+    """
+    Compute the size of the intersection of all the pairs of multisets.
+
+    Parameters
+    ----------
+    counts1 : sparse matrix of shape (n_samples1, n_features)
+        The number of occurrences of each feature (e.g. n-gram) in each element
+        of the first set of samples.
+    counts2 : sparse matrix of shape (n_samples2, n_features)
+        The same counts for the second set of samples.
+
+    Returns
+    -------
+    ndarray of shape (n_samples1, n_samples2)
+        ``sum_k min(counts1[i, k], counts2[j, k])`` for all pairs ``(i, j)``.
+
+    Notes
+    -----
+    As ``min(a, b) = sum_t [a >= t] * [b >= t]`` for non-negative integers, the
+    intersections are computed as a sum of products of binary sparse
+    matrices, one for each count ``t`` up to the largest count. N-grams rarely
+    occur more than a few times in a string, so this needs only a few sparse
+    matrix products.
+    """
+    counts1, counts2 = sparse.csr_matrix(counts1), sparse.csr_matrix(counts2)
+    out = np.zeros((counts1.shape[0], counts2.shape[0]), dtype=np.float64)
+    level = 1
+    while counts1.nnz and counts2.nnz:
+        out += (_binarize(counts1) @ _binarize(counts2).T).toarray()
+        # Only keep the entries with a count larger than the current level
+        counts1, counts2 = _above(counts1, level), _above(counts2, level)
+        level += 1
+    return out
+
+
+def _binarize(counts: sparse.csr_matrix) -> sparse.csr_matrix:
+    binary = counts.copy()
+    binary.data = np.ones_like(binary.data, dtype=np.float64)
+    return binary
+
+
+def _above(counts: sparse.csr_matrix, level: int) -> sparse.csr_matrix:
+    above = counts.copy()
+    above.data = np.where(above.data > level, above.data, 0)
+    above.eliminate_zeros()
+    return above
+
+
+def _ngram_count_matrices(
+    strings1: NDArray, strings2: NDArray, n: int
+) -> tuple[sparse.csr_matrix, sparse.csr_matrix]:
+    """Sparse n-gram count matrices of the strings, with a shared vocabulary."""
+    indptr1, ids1 = get_ngram_ids(strings1, (n, n))
+    indptr2, ids2 = get_ngram_ids(strings2, (n, n))
+    vocabulary, columns = np.unique(np.concatenate([ids1, ids2]), return_inverse=True)
+
+    def count_matrix(indptr, columns):
+        matrix = sparse.csr_matrix(
+            (np.ones(len(columns), dtype=np.int64), columns, indptr),
+            shape=(len(indptr) - 1, len(vocabulary)),
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+    return (
+        count_matrix(indptr1, columns[: len(ids1)]),
+        count_matrix(indptr2, columns[len(ids1) :]),
+    )
+
+
 def ngram_similarity(string1, string2, n, preprocess_strings=True):
-    """n-gram similarity between two strings"""
+    """
+    n-gram similarity between strings.
+
+    The similarity between two strings is the number of n-grams they have in
+    common (counted with multiplicity) divided by the number of n-grams in
+    their union. It is 0 if neither string has n-grams, for instance if they
+    are shorter than `n`.
+
+    Parameters
+    ----------
+    string1 : str or array-like of str
+        The first string, or array of strings.
+    string2 : str or array-like of str
+        The second string, or array of strings.
+    n : int
+        The size of the n-grams.
+    preprocess_strings : bool, default=True
+        Whether to apply ``preprocess`` to the strings first.
+
+    Returns
+    -------
+    float or ndarray
+        The similarity if `string1` and `string2` are strings, otherwise an
+        array of shape ``(len(string1), len(string2))``, without the axis of
+        the argument which is a single string.
+    """
+    if not (isinstance(string1, str) and isinstance(string2, str)):
+        return _ngram_similarity_array(string1, string2, n, preprocess_strings)
+
     if preprocess_strings:
         string1, string2 = preprocess(string1), preprocess(string2)
 
@@ -104,6 +376,35 @@ def ngram_similarity(string1, string2, n, preprocess_strings=True):
     count2 = Counter(ngrams2)
 
     samegrams = sum((count1 & count2).values())
-    allgrams = len(ngrams1) + len(ngrams2)
-    similarity = samegrams / (allgrams - samegrams)
+    allgrams = len(ngrams1) + len(ngrams2) - samegrams
+    if allgrams == 0:
+        # Neither string has n-grams, as in the array path
+        return 0.0
+    similarity = samegrams / allgrams
+    return similarity
+
+
+def _ngram_similarity_array(string1, string2, n, preprocess_strings):
+    strings1 = np.asarray(string1, dtype=object).ravel()
+    strings2 = np.asarray(string2, dtype=object).ravel()
+    if preprocess_strings:
+        strings1 = [preprocess(string) for string in strings1]
+        strings2 = [preprocess(string) for string in strings2]
+
+    counts1, counts2 = _ngram_count_matrices(strings1, strings2, n)
+    same_grams = min_intersection(counts1, counts2)
+    n_grams1 = np.asarray(counts1.sum(axis=1), dtype=np.float64)
+    n_grams2 = np.asarray(counts2.sum(axis=1), dtype=np.float64).T
+    all_grams = n_grams1 + n_grams2 - same_grams
+    similarity = np.divide(
+        same_grams,
+        all_grams,
+        out=np.zeros_like(same_grams),
+        where=all_grams != 0,
+    )
+
+    if isinstance(string1, str):
+        return similarity[0]
+    if isinstance(string2, str):
+        return similarity[:, 0]
     return similarity
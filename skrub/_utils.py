@@ -1,8 +1,13 @@
+from __future__ import annotations
+
 import collections
 import importlib
+import os
 import re
+import uuid
 from collections.abc import Hashable
-from typing import Any, Iterable
+from pathlib import Path
+from typing import Any, Iterable, Sequence
 
 import numpy as np
 from numpy.typing import NDArray
@@ -39,6 +44,301 @@ class LRUDict:
         return key in self.cache
 
 
+class MmapDict:
+    """dict of str to arrays, persisted in a directory
+
+    The values are stored by chunks in ``.npy`` files, which are
+    memory-mapped when read. Each call to ``update`` writes a new chunk with a
+    unique name, so several processes can share the same directory without
+    locking, and ``refresh`` picks up the chunks written by the others. The
+    keys of a chunk are stored as their concatenated UTF-8 bytes and the
+    offsets of each key, so that long keys do not inflate the others.
+
+    When there are more than ``max_chunks`` chunks, the chunks of the smallest
+    size tier are merged, so that the number of files and memory maps stays
+    bounded while each key is only rewritten a logarithmic number of times.
+    ``compact`` merges all the chunks into one.
+    """
+
+    def __init__(self, path: str | os.PathLike, max_chunks: int = 16):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_chunks = max_chunks
+        self._chunks = {}
+        self._chunk_keys = {}
+        self._index = {}
+        self.refresh()
+
+    def refresh(self):
+        """Load the chunks written since the last refresh.
+
+        If chunks were merged by another process, the index is rebuilt from
+        the chunks left.
+        """
+        names = [
+            keys_file.name[: -len(".keys.npy")]
+            for keys_file in sorted(self.path.glob("*.keys.npy"))
+        ]
+        if not set(self._chunks) <= set(names):
+            self._chunks, self._chunk_keys, self._index = {}, {}, {}
+        for name in names:
+            if name in self._chunks:
+                continue
+            try:
+                keys = _load_keys(self.path, name)
+                values = np.load(self.path / f"{name}.npy", mmap_mode="r")
+            except FileNotFoundError:
+                # The chunk was merged by another process in the meantime
+                continue
+            self._chunks[name] = values
+            self._chunk_keys[name] = keys
+            for row, key in enumerate(keys):
+                self._index.setdefault(key, (name, row))
+
+    def _write_chunk(self, keys: list[str], values: NDArray):
+        """Write a new chunk, which other processes can read once it exists."""
+        name = uuid.uuid4().hex
+        key_bytes, offsets = _encode_keys(keys)
+        # The keys are written last: a chunk is only read once they exist
+        for file_name, array in [
+            (f"{name}.npy", values),
+            (f"{name}.offsets.npy", offsets),
+            (f"{name}.keys.npy", key_bytes),
+        ]:
+            tmp_file = self.path / f".{file_name}.tmp"
+            with open(tmp_file, "wb") as fh:
+                np.save(fh, array, allow_pickle=False)
+            os.replace(tmp_file, self.path / file_name)
+
+    def update(self, keys: Iterable[str], values: NDArray):
+        """Store ``values[i]`` for each ``keys[i]``, in a new chunk."""
+        keys = [str(key) for key in keys]
+        if len(keys) == 0:
+            return
+        self._write_chunk(keys, values)
+        self.refresh()
+        while len(self._chunks) > self.max_chunks:
+            self._merge(self._small_chunks())
+
+    def _small_chunks(self) -> list[str]:
+        """The chunks of the smallest size tier holding several chunks.
+
+        The chunks whose number of rows has the same number of digits in base
+        4 are in the same tier. Merging a tier gives a chunk at least 1.25
+        times larger than each merged chunk.
+        """
+        tiers = collections.defaultdict(list)
+        for name, values in self._chunks.items():
+            tiers[len(values).bit_length() // 2].append(name)
+        for tier in sorted(tiers):
+            if len(tiers[tier]) > 1:
+                return tiers[tier]
+        # All the tiers hold one chunk: merge the two smallest ones
+        return sorted(self._chunks, key=lambda name: len(self._chunks[name]))[:2]
+
+    def compact(self):
+        """Merge all the chunks into one.
+
+        Only the chunks loaded by this process are merged and removed, so the
+        chunks written by other processes in the meantime are kept.
+        """
+        self.refresh()
+        if len(self._chunks) > 1:
+            self._merge(list(self._chunks))
+
+    def _merge(self, names: list[str]):
+        """Merge the chunks `names` into a new chunk and remove them."""
+        keys, values = [], []
+        for name in names:
+            # Keep the rows which are indexed, dropping the duplicated keys
+            rows = [
+                row
+                for row, key in enumerate(self._chunk_keys[name])
+                if self._index[key] == (name, row)
+            ]
+            keys.extend(self._chunk_keys[name][row] for row in rows)
+            values.append(self._chunks[name][rows])
+        # Close the memory maps before removing their files
+        for name in names:
+            del self._chunks[name], self._chunk_keys[name]
+        for key in keys:
+            del self._index[key]
+        self._write_chunk(keys, np.concatenate(values))
+        for name in names:
+            # The keys are removed first, so that the chunk is no longer read
+            for suffix in [".keys.npy", ".offsets.npy", ".npy"]:
+                try:
+                    os.remove(self.path / f"{name}{suffix}")
+                except OSError:
+                    # Already removed by another process, or still memory
+                    # mapped on a platform where it cannot be removed
+                    pass
+        self.refresh()
+
+    def __getitem__(self, key: str) -> NDArray:
+        name, row = self._index[key]
+        return np.array(self._chunks[name][row])
+
+    def __contains__(self, key: str):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getstate__(self):
+        # Memory maps are not pickled, they are re-opened when unpickling
+        return {"path": self.path, "max_chunks": self.max_chunks}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state.get("max_chunks", 16))
+
+
+def _encode_keys(keys: Iterable[str]) -> tuple[NDArray, NDArray]:
+    """Encode `keys` as their concatenated UTF-8 bytes and their offsets.
+
+    The bytes of ``keys[i]`` are ``key_bytes[offsets[i]:offsets[i + 1]]``.
+    Unlike a fixed-width array of strings, the keys are not padded to the
+    longest one, and their trailing NUL characters are kept.
+    """
+    encoded = [str(key).encode("utf-8", "surrogatepass") for key in keys]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(key) for key in encoded], out=offsets[1:])
+    key_bytes = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return key_bytes, offsets
+
+
+def _load_keys(path: Path, name: str) -> list[str]:
+    """Load the keys of a chunk of a ``MmapDict``."""
+    key_bytes = np.load(path / f"{name}.keys.npy", allow_pickle=False).tobytes()
+    offsets = np.load(path / f"{name}.offsets.npy", allow_pickle=False).tolist()
+    return [
+        key_bytes[start:stop].decode("utf-8", "surrogatepass")
+        for start, stop in zip(offsets[:-1], offsets[1:])
+    ]
+
+
+class ArrayDict:
+    """dict of keys to arrays, stored as the rows of one contiguous matrix
+
+    Getting or updating many keys at once gathers or scatters rows of the
+    matrix, instead of copying the arrays one by one. The matrix grows
+    geometrically as new keys are added.
+
+    With a ``capacity``, the least recently updated keys are evicted when
+    there are more keys than the capacity.
+    """
+
+    def __init__(self, n_columns: int, dtype=np.float64, capacity: int | None = None):
+        self.capacity = capacity
+        self._index = {}
+        self._keys = []
+        self._values = np.empty((0, n_columns), dtype=dtype)
+        self._last_update = np.empty(0, dtype=np.int64)
+        self._n_updates = 0
+
+    @property
+    def values(self) -> NDArray:
+        """The matrix of the values, with one row per key."""
+        return self._values[: len(self._index)]
+
+    def rows(self, keys: Sequence[Hashable]) -> NDArray:
+        """Return the row of each key, or -1 for the missing keys."""
+        index = self._index
+        return np.fromiter(
+            (index.get(key, -1) for key in keys), dtype=np.intp, count=len(keys)
+        )
+
+    def get(self, keys: Sequence[Hashable]) -> NDArray:
+        """Return a copy of the values of the keys, stacked in a matrix."""
+        rows = self.rows(keys)
+        if (rows == -1).any():
+            raise KeyError(keys[np.flatnonzero(rows == -1)[0]])
+        return self.values[rows]
+
+    def update(self, keys: Sequence[Hashable], values: NDArray):
+        """Store ``values[i]`` for each ``keys[i]``."""
+        rows = self.rows(keys)
+        for i in np.flatnonzero(rows == -1):
+            rows[i] = self._index.setdefault(keys[i], len(self._index))
+            if rows[i] == len(self._keys):
+                self._keys.append(keys[i])
+        if len(self._index) > self._values.shape[0]:
+            capacity = max(len(self._index), 2 * self._values.shape[0])
+            self._values = _resize_rows(self._values, capacity)
+            self._last_update = _resize_rows(self._last_update, capacity)
+        self._values[rows] = values
+        self._n_updates += 1
+        self._last_update[rows] = self._n_updates
+        if self.capacity is not None and len(self._index) > self.capacity:
+            self._evict(len(self._index) - self.capacity)
+
+    def _evict(self, n_evicted: int):
+        """Remove the `n_evicted` least recently updated keys.
+
+        The rows left after the last row kept are moved to the rows of the
+        evicted keys, so that the cost only depends on `n_evicted`.
+        """
+        n_kept = len(self._index) - n_evicted
+        last_update = self._last_update[: len(self._index)]
+        evicted = np.argpartition(last_update, n_evicted - 1)[:n_evicted]
+        for row in evicted:
+            del self._index[self._keys[row]]
+        holes = np.sort(evicted[evicted < n_kept])
+        is_evicted = np.zeros(n_evicted, dtype=bool)
+        is_evicted[evicted[evicted >= n_kept] - n_kept] = True
+        moved = n_kept + np.flatnonzero(~is_evicted)
+        for hole, row in zip(holes, moved):
+            self._keys[hole] = self._keys[row]
+            self._index[self._keys[hole]] = hole
+        del self._keys[n_kept:]
+        self._values[holes] = self._values[moved]
+        self._last_update[holes] = self._last_update[moved]
+
+    def compact(self, capacity: int | None = None, dtype=None):
+        """Evict the least recently updated keys down to `capacity`, and
+        store the values in an exactly sized matrix of type `dtype`."""
+        self.capacity = capacity
+        if capacity is not None and len(self._index) > capacity:
+            self._evict(len(self._index) - capacity)
+        self._values = self.values.astype(dtype or self._values.dtype)
+        self._last_update = self._last_update[: len(self._index)].copy()
+
+    def keys(self) -> list:
+        """The keys, in the order of the rows."""
+        return list(self._keys)
+
+    def __getitem__(self, key: Hashable) -> NDArray:
+        return self._values[self._index[key]].copy()
+
+    def __contains__(self, key: Hashable):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getstate__(self):
+        # The unused capacity of the matrices is not pickled
+        state = self.__dict__.copy()
+        state["_values"] = self.values.copy()
+        state["_last_update"] = self._last_update[: len(self._index)].copy()
+        return state
+
+
+def _resize_rows(array: NDArray, n_rows: int) -> NDArray:
+    """Return a copy of `array` with `n_rows` rows, keeping the first ones."""
+    resized = np.empty((n_rows, *array.shape[1:]), dtype=array.dtype)
+    n_kept = min(n_rows, array.shape[0])
+    resized[:n_kept] = array[:n_kept]
+    return resized
+
+
+def _expand_ranges(starts: NDArray, counts: NDArray) -> NDArray:
+    """Concatenate ``np.arange(start, start + count)`` for all the ranges."""
+    total = counts.sum()
+    ends = np.cumsum(counts)
+    return np.repeat(starts - ends + counts, counts) + np.arange(total)
+
+
 def check_input(X) -> NDArray:
     """
     Check input with sklearn standards.
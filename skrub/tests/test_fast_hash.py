@@ -1,4 +1,8 @@
-from skrub._fast_hash import ngram_min_hash
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from skrub._fast_hash import gen_atom, ngram_min_hash, ngram_min_hash_batch
 from skrub.tests.utils import generate_data
 
 
@@ -15,3 +19,57 @@ def test_fast_hash() -> None:
 
     min_hash4 = ngram_min_hash(a, seed=0, return_minmax=True)
     assert len(min_hash4) == 2
+
+
+@pytest.mark.parametrize("ngram_range", [(2, 4), (3, 3), (1, 5)])
+@pytest.mark.parametrize("return_minmax", [False, True])
+def test_ngram_min_hash_batch(ngram_range, return_minmax) -> None:
+    data = generate_data(50, as_list=True, random_state=0, sample_length=20)
+    # short strings, shorter than the n-grams, and non-ASCII strings
+    data += ["a", "ab", "abc", "é", "日本語", "x y"]
+
+    batch = ngram_min_hash_batch(data, ngram_range, seed=3, return_minmax=return_minmax)
+    expected = np.array(
+        [
+            ngram_min_hash(s, ngram_range, seed=3, return_minmax=return_minmax)
+            for s in data
+        ]
+    )
+    assert_array_equal(batch, expected)
+    assert ngram_min_hash_batch([]).shape == (0,)
+
+
+@pytest.mark.parametrize("return_minmax", [False, True])
+def test_ngram_min_hash_batch_seeds(return_minmax) -> None:
+    data = generate_data(20, as_list=True, random_state=0, sample_length=20)
+    data += ["a", "ab", "日本語"]
+    seeds = np.arange(7)
+
+    batch = ngram_min_hash_batch(data, seed=seeds, return_minmax=return_minmax)
+    expected = np.stack(
+        [
+            ngram_min_hash_batch(data, seed=seed, return_minmax=return_minmax)
+            for seed in seeds
+        ],
+        axis=1,
+    )
+    assert batch.shape == (len(data), len(seeds)) + (2,) * return_minmax
+    assert_array_equal(batch, expected)
+
+
+def test_ngram_min_hash_unicode() -> None:
+    # The whole string is hashed, not only the first bytes of its UTF-8
+    # encoding
+    assert ngram_min_hash("éa") != ngram_min_hash("éb")
+
+    # The code points are hashed: ASCII and non-ASCII characters are treated
+    # in the same way
+    codes = np.array([ord(c) for c in "naïve café"], dtype=np.int32)
+    expected = min(np.correlate(codes, gen_atom(atom_len)).min() for atom_len in (2, 3))
+    assert ngram_min_hash("naïve café") == expected
+
+    data = ["naïve café", "日本語", "Ελληνικά", "abc", "éa", "éb"]
+    expected = [ngram_min_hash(s, seed=2) for s in data]
+    assert_array_equal(ngram_min_hash_batch(data, seed=2), expected)
+    # unicode arrays are packed without converting their elements
+    assert_array_equal(ngram_min_hash_batch(np.array(data), seed=2), expected)
@@ -1,13 +1,16 @@
+import joblib
 import numpy as np
 import pandas as pd
 import pytest
 from numpy.testing import assert_array_equal
 from sklearn.exceptions import NotFittedError
 from sklearn.model_selection import train_test_split
+from sklearn.utils import gen_batches
 
-from skrub import GapEncoder, TableVectorizer
+from skrub import GapEncoder, TableVectorizer, _gap_encoder
 from skrub._dataframe._polars import POLARS_SETUP
 from skrub._dataframe._test_utils import is_module_polars
+from skrub._gap_encoder import batch_counts
 from skrub.datasets import fetch_midwest_survey
 from skrub.tests.utils import generate_data
 
@@ -256,6 +259,26 @@ def test_score(n_samples: int = 70):
     assert score_X1 * 2 == score_X2
 
 
+def test_score_repeated_strings():
+    X = generate_data(50, random_state=0)
+    X_repeated = np.repeat(X, np.arange(1, 51), axis=0)
+    enc = GapEncoder(n_components=3, random_state=0).fit(X)
+    model = enc.fitted_models_[0]
+    # The score is computed once per unique string, weighted by its count
+    unq_X, counts = np.unique(X_repeated, return_counts=True)
+    V = model._get_V(unq_X)
+    H = model._get_H(unq_X, V)
+    for slc in gen_batches(len(unq_X), model.batch_size):
+        H[slc] = _gap_encoder._multiplicative_update_h(
+            V[slc], model.W_, H[slc], max_iter=model.max_iter_e_step, rescale_W=True
+        )
+    lookup = np.repeat(np.arange(len(unq_X)), counts)
+    V, H = V[lookup].toarray(), H[lookup]
+    HW = H @ model.W_
+    expected = (V * np.log(np.where(V > 0, V, 1) / HW) - V + HW).sum()
+    np.testing.assert_allclose(enc.score(X_repeated), expected, rtol=1e-10)
+
+
 @pytest.mark.parametrize("px", MODULES)
 @pytest.mark.parametrize(
     "missing",
@@ -334,3 +357,404 @@ def test_max_no_improvements_none():
     X = generate_data(300, random_state=0)
     enc_none = GapEncoder(n_components=2, max_no_improvement=None, random_state=42)
     enc_none.fit(X)
+
+
+def test_batch_counts():
+    lookup = np.array([2, 0, 2, 1, 0, 2, 3])
+    batches = list(batch_counts(lookup, n=3))
+    assert_array_equal(batches[0][0], [2, 0, 1])
+    assert_array_equal(batches[0][1], [3, 2, 1])
+    assert_array_equal(batches[1][0], [3])
+    assert_array_equal(batches[1][1], [1])
+
+
+def test_transform_leaves_activations_unchanged():
+    """Check that transform does not change the stored activations"""
+    X = generate_data(100, random_state=0)
+    enc = GapEncoder(n_components=3, random_state=0).fit(X)
+    H_dict = enc.fitted_models_[0].H_dict_
+    keys, values = H_dict.keys(), H_dict.values.copy()
+    X_test = np.concatenate([X[:10], [["an unseen string"]]])
+    H = enc.transform(X_test)
+    assert H_dict.keys() == keys
+    assert_array_equal(H_dict.values, values)
+    # Repeated strings are encoded identically
+    assert_array_equal(enc.transform(np.concatenate([X_test, X_test])), [*H, *H])
+
+
+def test_max_cached_activations():
+    X = generate_data(300, random_state=0)
+    X_test = generate_data(50, random_state=1)
+    enc = GapEncoder(n_components=3, random_state=0)
+    enc_bounded = GapEncoder(n_components=3, max_cached_activations=20, random_state=0)
+    for X_batch in np.array_split(X, 6):
+        enc.partial_fit(X_batch)
+        enc_bounded.partial_fit(X_batch)
+        assert len(enc_bounded.fitted_models_[0].H_dict_) <= 20
+    # Only the activations of the strings of the last batch are kept
+    H_dict = enc_bounded.fitted_models_[0].H_dict_
+    assert set(H_dict.keys()) <= set(np.unique(X[-50:]))
+    assert enc_bounded.transform(X_test).shape == (50, 3)
+
+    enc_bounded = GapEncoder(n_components=3, max_cached_activations=10**6)
+    enc_bounded.set_params(random_state=0).fit(X)
+    enc.fit(X)
+    assert_array_equal(enc_bounded.transform(X_test), enc.transform(X_test))
+
+    with pytest.raises(ValueError, match="max_cached_activations"):
+        GapEncoder(n_components=3, max_cached_activations=0).fit(X)
+
+
+def test_count_weighted():
+    rng = np.random.RandomState(0)
+    categories = generate_data(50, random_state=0).ravel()
+    X = categories[rng.zipf(1.5, size=2000) % 50].reshape(-1, 1)
+    # With a single batch, weighting the unique strings by their counts is
+    # the same as repeating them
+    params = dict(
+        n_components=3, batch_size=10**6, max_no_improvement=None, random_state=0
+    )
+    enc = GapEncoder(**params).fit(X)
+    enc_weighted = GapEncoder(count_weighted=True, **params).fit(X)
+    np.testing.assert_allclose(
+        enc_weighted.fitted_models_[0].W_, enc.fitted_models_[0].W_
+    )
+
+    # Batches are made of unique strings
+    enc_weighted = GapEncoder(
+        n_components=3, batch_size=10, count_weighted=True, random_state=0
+    ).fit(X)
+    assert enc_weighted.transform(X).shape == (2000, 3)
+
+
+@pytest.mark.parametrize(
+    ["hashing", "init", "add_words"],
+    [(False, "k-means++", False), (True, "random", True)],
+)
+def test_float32(hashing, init, add_words):
+    X = generate_data(300, random_state=0)
+    X_test = generate_data(50, random_state=1)
+    params = dict(
+        n_components=3, hashing=hashing, init=init, add_words=add_words, random_state=0
+    )
+    enc = GapEncoder(**params).fit(X)
+    enc_32 = GapEncoder(dtype=np.float32, **params).fit(X)
+    model = enc_32.fitted_models_[0]
+    for array in [model.W_, model.A_, model.B_, model.H_dict_.values]:
+        assert array.dtype == np.float32
+    H, H_32 = enc.transform(X_test), enc_32.transform(X_test)
+    assert H_32.dtype == np.float32
+    np.testing.assert_allclose(H_32, H, rtol=1e-3, atol=1e-3 * H.max())
+    np.testing.assert_allclose(model.W_, enc.fitted_models_[0].W_, rtol=1e-3)
+    np.testing.assert_allclose(enc_32.score(X), enc.score(X), rtol=1e-5)
+    assert_array_equal(enc_32.get_feature_names_out(), enc.get_feature_names_out())
+
+    with pytest.raises(ValueError, match="dtype"):
+        GapEncoder(n_components=3, dtype=np.int64).fit(X)
+
+
+def test_fit_from_chunks(monkeypatch):
+    X = generate_data(300, random_state=0)
+    X_test = generate_data(50, random_state=1)
+    chunks = np.array_split(X, 3)
+    # With batches as large as the chunks, it is the same as partial_fit
+    enc = GapEncoder(n_components=3, random_state=0)
+    for chunk in chunks:
+        enc.partial_fit(chunk)
+    enc_chunks = GapEncoder(n_components=3, batch_size=100, random_state=0)
+    enc_chunks.fit_from_chunks(chunks)
+    assert_array_equal(enc_chunks.transform(X_test), enc.transform(X_test))
+
+    # Several epochs over chunks read by a callable
+    enc_chunks = GapEncoder(n_components=3, batch_size=20, hashing=True)
+    enc_chunks.fit_from_chunks(lambda: iter(chunks), n_epochs=3)
+    assert enc_chunks.transform(X_test).shape == (50, 3)
+    assert len(enc_chunks.get_feature_names_out()) == 3
+
+    with pytest.raises(ValueError, match="iterator"):
+        enc_chunks.fit_from_chunks(iter(chunks), n_epochs=2)
+    with pytest.raises(ValueError, match="n_epochs"):
+        enc_chunks.fit_from_chunks(chunks, n_epochs=0)
+    with pytest.raises(ValueError, match="no chunks"):
+        enc_chunks.fit_from_chunks([])
+    with pytest.raises(ValueError, match="features"):
+        enc_chunks.fit_from_chunks([X, np.hstack([X, X])])
+    with pytest.raises(ValueError, match="first chunk"):
+        enc_chunks.fit_from_chunks([X[:2], X])
+    with pytest.raises(ValueError, match="checkpoints"):
+        GapEncoder(checkpoint_dir="checkpoints").fit_from_chunks(chunks)
+
+    # The activations are bounded, by default or by max_cached_activations
+    enc_chunks = GapEncoder(n_components=3, max_cached_activations=50)
+    enc_chunks.fit_from_chunks(chunks)
+    assert len(enc_chunks.fitted_models_[0].H_dict_) <= 50
+    assert enc_chunks.max_cached_activations == 50
+    monkeypatch.setattr(_gap_encoder, "_MAX_CHUNKS_CACHED_ACTIVATIONS", 60)
+    enc_chunks = GapEncoder(n_components=3).fit_from_chunks(chunks)
+    assert len(enc_chunks.fitted_models_[0].H_dict_) <= 60
+    assert enc_chunks.max_cached_activations is None
+
+
+def test_partial_fit_hashing():
+    """Check that partial_fit with hashing keeps learning the same topics"""
+    X = generate_data(200, random_state=0)
+    enc = GapEncoder(n_components=3, hashing=True, random_state=0)
+    enc.partial_fit(X[:100])
+    W = enc.fitted_models_[0].W_.copy()
+    enc.partial_fit(X[100:])
+    enc_second = GapEncoder(n_components=3, hashing=True, random_state=0)
+    enc_second.partial_fit(X[100:])
+    assert not np.allclose(enc.fitted_models_[0].W_, W)
+    assert not np.allclose(enc.fitted_models_[0].W_, enc_second.fitted_models_[0].W_)
+
+
+@pytest.mark.parametrize("max_cached_activations", [None, 50])
+def test_checkpoint_resume(tmp_path, monkeypatch, max_cached_activations):
+    X = np.hstack([generate_data(200, random_state=0)] * 2)
+    params = dict(
+        n_components=3,
+        batch_size=20,
+        max_iter=3,
+        max_no_improvement=None,
+        max_cached_activations=max_cached_activations,
+        random_state=0,
+    )
+    enc = GapEncoder(**params).fit(X)
+
+    # Interrupt a fit after 25 updates of the topics, after the checkpoint
+    # of step 24
+    update_w = _gap_encoder._multiplicative_update_w
+    n_calls = 0
+
+    def interrupted_update_w(*args, **kwargs):
+        nonlocal n_calls
+        n_calls += 1
+        if n_calls > 25:
+            raise KeyboardInterrupt
+        return update_w(*args, **kwargs)
+
+    monkeypatch.setattr(_gap_encoder, "_multiplicative_update_w", interrupted_update_w)
+    params.update(checkpoint_dir=tmp_path, checkpoint_every=8, resume_from=tmp_path)
+    with pytest.raises(KeyboardInterrupt):
+        GapEncoder(**params).fit(X)
+    assert (tmp_path / "column_0" / "latest").read_text().startswith("step_24_")
+    assert not (tmp_path / "column_1").exists()
+    monkeypatch.setattr(_gap_encoder, "_multiplicative_update_w", update_w)
+
+    # Resuming gives the same topics as the uninterrupted fit
+    enc_resumed = GapEncoder(**params).fit(X)
+    for model, model_resumed in zip(enc.fitted_models_, enc_resumed.fitted_models_):
+        assert_array_equal(model_resumed.W_, model.W_)
+        assert_array_equal(model_resumed.A_, model.A_)
+    assert_array_equal(enc_resumed.transform(X), enc.transform(X))
+    assert len(list((tmp_path / "column_0").glob("step_*"))) == 1
+
+    # Resuming a finished fit does not update the topics again
+    W = enc_resumed.fitted_models_[0].W_
+    enc_resumed.fit(X)
+    assert_array_equal(enc_resumed.fitted_models_[0].W_, W)
+
+    with pytest.raises(ValueError, match="same data and parameters"):
+        GapEncoder(**{**params, "n_components": 4}).fit(X)
+    with pytest.raises(ValueError, match="checkpoint_every"):
+        GapEncoder(**{**params, "checkpoint_every": 0}).fit(X)
+
+
+def test_checkpoint_keys(tmp_path):
+    # Strings with trailing NUL characters and of very different lengths
+    X = np.array(
+        ["abc\x00", "abc", "abd\x00\x00", "x" * 10_000]
+        + [f"label {i}" for i in range(40)],
+        dtype=object,
+    )[:, None]
+    params = dict(n_components=3, max_iter=2, random_state=0)
+    GapEncoder(**params, checkpoint_dir=tmp_path).fit(X)
+    step_dir = tmp_path / "column_0" / (tmp_path / "column_0" / "latest").read_text()
+    # The keys are not padded to the longest one
+    assert np.load(step_dir / "H_keys.npy").nbytes < 11_000
+    GapEncoder(**params, resume_from=tmp_path).fit(X)
+    X_changed = X.copy()
+    X_changed[0, 0] = "abc"
+    with pytest.raises(ValueError, match="same data and parameters"):
+        GapEncoder(**params, resume_from=tmp_path).fit(X_changed)
+
+
+def test_checkpoint_resume_max_iter(tmp_path, monkeypatch):
+    X = generate_data(200, random_state=0)
+    params = dict(
+        n_components=3,
+        batch_size=20,
+        max_no_improvement=None,
+        random_state=0,
+        checkpoint_dir=tmp_path,
+        resume_from=tmp_path,
+    )
+    enc = GapEncoder(**{**params, "max_iter": 3, "checkpoint_dir": None}).fit(X)
+    # A fit which ran out of iterations goes on with a larger max_iter
+    GapEncoder(**params, max_iter=1).fit(X)
+    # The topics are not initialized again when a checkpoint is restored
+    init_w = _gap_encoder.GapEncoderColumn._init_w
+    monkeypatch.setattr(
+        _gap_encoder.GapEncoderColumn,
+        "_init_w",
+        lambda *args: pytest.fail("_init_w called"),
+    )
+    enc_resumed = GapEncoder(**params, max_iter=3).fit(X)
+    monkeypatch.setattr(_gap_encoder.GapEncoderColumn, "_init_w", init_w)
+    assert_array_equal(enc_resumed.fitted_models_[0].W_, enc.fitted_models_[0].W_)
+
+
+@pytest.mark.parametrize("init", ["k-means++", "k-means", "minibatch-k-means"])
+@pytest.mark.parametrize("init_subsample", [None, 50])
+def test_init(init, init_subsample):
+    X = generate_data(300, random_state=0)
+    enc = GapEncoder(
+        n_components=3, init=init, init_subsample=init_subsample, random_state=0
+    ).fit(X)
+    W = enc.fitted_models_[0].W_
+    assert W.shape[0] == 3
+    assert np.isfinite(W).all()
+
+    # Fewer unique strings than components
+    X = np.array([["a b"], ["b c"], ["a b"], ["b c"], ["a b"]])
+    enc = GapEncoder(n_components=3, init=init, random_state=0).fit(X)
+    assert enc.transform(X).shape == (5, 3)
+
+
+def test_init_subsample_checks():
+    X = generate_data(20, random_state=0)
+    with pytest.raises(ValueError, match="init_subsample"):
+        GapEncoder(n_components=3, init_subsample=0).fit(X)
+    # The subsample must have at least one row per topic
+    for init in ["k-means++", "k-means"]:
+        with pytest.raises(ValueError, match="greater than or equal to n_components"):
+            GapEncoder(n_components=10, init=init, init_subsample=3).fit(X)
+    enc = GapEncoder(n_components=10, init_subsample=10, random_state=0).fit(X)
+    assert enc.transform(X).shape == (20, 10)
+
+
+def test_get_feature_names_out_cached(monkeypatch):
+    X = generate_data(100, random_state=0)
+    enc = GapEncoder(n_components=3, random_state=0).fit(X)
+    model = enc.fitted_models_[0]
+    assert model._topic_ranks is not None
+    labels = enc.get_feature_names_out(n_labels=4)
+
+    # The labels are computed in fit, not when they are read
+    def encode(*args, **kwargs):
+        raise AssertionError("the words should not be encoded")
+
+    monkeypatch.setattr(model, "_encode", encode)
+    assert_array_equal(
+        enc.get_feature_names_out(), [label.rsplit(", ", 1)[0] for label in labels]
+    )
+    monkeypatch.undo()
+    # After partial_fit, they are computed when they are first read
+    monkeypatch.setattr(model, "_compute_topic_ranks", encode)
+    enc.partial_fit(X[:10])
+    assert model._topic_ranks is None
+    monkeypatch.undo()
+    labels = enc.get_feature_names_out()
+    assert model._topic_ranks is not None
+    assert len(labels) == 3
+
+    # The labels do not depend on the parameters of transform
+    model.set_params(approximate_transform=True, transform_max_iter=1)
+    model._topic_ranks = None
+    assert_array_equal(enc.get_feature_names_out(), labels)
+
+
+def test_topic_labels_strings_cap(monkeypatch):
+    X = generate_data(100, random_state=0)
+    monkeypatch.setattr(_gap_encoder, "_MAX_LABEL_STRINGS", 20)
+    fitted_strings = []
+    fit = _gap_encoder.CountVectorizer.fit
+
+    def record(self, raw_documents, y=None):
+        fitted_strings.append(len(raw_documents))
+        return fit(self, raw_documents)
+
+    monkeypatch.setattr(_gap_encoder.CountVectorizer, "fit", record)
+    enc = GapEncoder(n_components=3, random_state=0).fit(X)
+    assert fitted_strings == [20]
+    assert len(enc.get_feature_names_out()) == 3
+
+
+@pytest.mark.parametrize("hashing", [False, True])
+@pytest.mark.parametrize("dtype", [np.float16, np.float32])
+def test_freeze(hashing, dtype, tmp_path):
+    X = generate_data(300, random_state=0)
+    enc = GapEncoder(
+        n_components=3, hashing=hashing, add_words=True, random_state=0
+    ).fit(X)
+    labels = enc.get_feature_names_out()
+    H = enc.transform(X)
+    enc.freeze(dtype=dtype, max_cached_activations=50)
+    for model in enc.fitted_models_:
+        assert not hasattr(model, "A_") and not hasattr(model, "B_")
+        assert not hasattr(model, "vocabulary")
+        assert model.W_.dtype == dtype
+        assert len(model.H_dict_) == 50
+        assert model.H_dict_.values.dtype == np.float32
+    assert_array_equal(enc.get_feature_names_out(), labels)
+    H_frozen = enc.transform(X)
+    assert H_frozen.dtype == np.float32
+    np.testing.assert_allclose(H_frozen, H, rtol=0.1, atol=0.1 * H.max())
+
+    # The frozen encoder can be memory-mapped
+    joblib.dump(enc, tmp_path / "enc.joblib")
+    loaded = joblib.load(tmp_path / "enc.joblib", mmap_mode="r")
+    assert isinstance(loaded.fitted_models_[0].W_, np.memmap)
+    assert_array_equal(loaded.transform(X), H_frozen)
+    assert_array_equal(loaded.get_feature_names_out(), labels)
+    assert np.isfinite(loaded.score(X))
+
+    with pytest.raises(ValueError, match="frozen"):
+        loaded.partial_fit(X)
+    with pytest.raises(ValueError, match="dtype"):
+        GapEncoder(n_components=3).fit(X).freeze(dtype=np.int32)
+    with pytest.raises(ValueError, match="max_cached_activations"):
+        GapEncoder(n_components=3).fit(X).freeze(max_cached_activations=-1)
+    # It can be fitted again
+    enc.fit(X)
+    assert hasattr(enc.fitted_models_[0], "A_")
+
+
+def test_transform_max_iter_tol():
+    rng = np.random.RandomState(0)
+    words = ["police", "officer", "fire", "fighter", "office", "manager", "nurse"]
+    X, X_new = [
+        np.array([" ".join(rng.choice(words, 3)) + str(i) for i in range(n)])[:, None]
+        for n in [300, 100]
+    ]
+    enc = GapEncoder(n_components=3, random_state=0).fit(X)
+    H = enc.transform(X_new)
+    # The parameters of transform can be set after fit
+    enc.set_params(transform_max_iter=100, transform_tol=1e-3)
+    assert_array_equal(enc.transform(X_new), H)
+
+    def error(max_iter, approximate):
+        enc.set_params(transform_max_iter=max_iter, approximate_transform=approximate)
+        return np.abs(enc.transform(X_new) - H).sum() / np.abs(H).sum()
+
+    # The approximate mode starts closer to the solution
+    for max_iter in [1, 3, 10]:
+        assert error(max_iter, True) < error(max_iter, False)
+    # The approximate mode runs 3 iterations by default
+    assert error(None, True) == error(3, True)
+    # The strings seen during fit are still warm-started from their activations
+    H_seen = enc.transform(X[:10])
+    enc.set_params(transform_max_iter=3, approximate_transform=False)
+    assert_array_equal(enc.transform(X[:10]), H_seen)
+    enc.set_params(transform_max_iter=None)
+    enc.set_params(transform_tol=0)
+    assert error(None, False) < 0.01
+    # The fitted models are left untouched by transform
+    assert enc.fitted_models_[0].transform_tol == 1e-3
+
+    for params, match in [
+        ({"transform_max_iter": 0}, "transform_max_iter"),
+        ({"transform_tol": -1}, "transform_tol"),
+    ]:
+        with pytest.raises(ValueError, match=match):
+            GapEncoder(n_components=3, **params).fit(X).transform(X)
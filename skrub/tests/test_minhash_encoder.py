@@ -1,16 +1,21 @@
+import pickle
 import random
 from string import ascii_lowercase
+from unittest import mock
 
 import joblib
 import numpy as np
 import pandas as pd
 import pytest
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_allclose, assert_array_equal
 from sklearn.exceptions import NotFittedError
+from sklearn.utils import murmurhash3_32
 from sklearn.utils._testing import skip_if_no_parallel
 
 from skrub import MinHashEncoder
 from skrub._dataframe._polars import POLARS_SETUP
+from skrub._minhash_encoder import _densify
+from skrub._string_distances import get_unique_ngrams
 
 from .utils import generate_data
 
@@ -30,6 +35,8 @@ if POLARS_SETUP:
         ("fast", True),
         ("fast", False),
         ("murmur", False),
+        ("murmur_universal", False),
+        ("oph", False),
     ],
 )
 def test_minhash_encoder(hashing, minmax_hash):
@@ -95,6 +102,8 @@ def test_input_type():
         ("fast", True),
         ("fast", False),
         ("murmur", False),
+        ("murmur_universal", False),
+        ("oph", False),
     ],
 )
 def test_encoder_params(hashing, minmax_hash):
@@ -112,7 +121,9 @@ def test_encoder_params(hashing, minmax_hash):
 
 @pytest.mark.parametrize("input_type", INPUT_TYPE)
 @pytest.mark.parametrize("missing", ["error", "zero_impute", "aaa"])
-@pytest.mark.parametrize("hashing", ["fast", "murmur", "aaa"])
+@pytest.mark.parametrize(
+    "hashing", ["fast", "murmur", "murmur_universal", "oph", "aaa"]
+)
 def test_missing_values(input_type: str, missing: str, hashing: str):
     X = ["Red", np.nan, "green", "blue", "green", "green", "blue", float("nan")]
     n = 3
@@ -170,7 +181,7 @@ def test_cache_overflow():
         return result_str
 
     encoder = MinHashEncoder(n_components=3)
-    capacity = encoder._capacity
+    capacity = encoder.cache_size
     raw_data = [get_random_string(10) for _ in range(capacity + 1)]
     raw_data = np.array(raw_data)[:, None]
     y = encoder.fit_transform(raw_data)
@@ -197,6 +208,20 @@ def test_parallelism():
     assert encoder.n_jobs == 2
 
 
+@skip_if_no_parallel
+@pytest.mark.parametrize("hashing", ["fast", "murmur_universal"])
+def test_parallelism_fills_cache(hashing):
+    X = np.array(["a", "b", "c", "d", "e", "f", "g", "h", "a"])[:, None]
+    encoder = MinHashEncoder(n_components=3, hashing=hashing, n_jobs=2)
+    y = encoder.fit_transform(X)
+    # The hashes computed by the workers are merged in the cache
+    assert len(encoder.hash_dict_.cache) == 8
+
+    # and are reused: nothing is left to compute
+    with mock.patch("skrub._minhash_encoder.Parallel", side_effect=AssertionError):
+        assert_array_equal(encoder.transform(X), y)
+
+
 DEFAULT_JOBLIB_BACKEND = joblib.parallel.get_active_backend()[0].__class__
 
 
@@ -260,6 +285,205 @@ def test_correct_arguments():
         encoder.fit_transform(X)
 
 
+def _murmur_hash_reference(string, n_components, ngram_range):
+    # Encode a single string with murmur, one n-gram and one seed at a time
+    min_hashes = np.full(n_components, np.inf)
+    grams = get_unique_ngrams(string, ngram_range)
+    if len(grams) == 0:
+        grams = get_unique_ngrams(" Na ", ngram_range)
+    for gram in grams:
+        hash_array = np.array(
+            [
+                murmurhash3_32("".join(gram), seed=d, positive=True)
+                for d in range(n_components)
+            ]
+        )
+        min_hashes = np.minimum(min_hashes, hash_array)
+    return min_hashes / (2**32 - 1)
+
+
+@pytest.mark.parametrize("ngram_range", [(2, 4), (3, 5)])
+def test_murmur_batch(ngram_range):
+    # Encoding batches of strings gives the same result as encoding the
+    # strings one at a time
+    X = np.concatenate(
+        [generate_data(30, random_state=0, sample_length=10).ravel(), ["", " ", "é"]]
+    )
+    encoder = MinHashEncoder(n_components=10, hashing="murmur", ngram_range=ngram_range)
+    encoder.fit(X[:, None])
+    expected = np.stack([_murmur_hash_reference(x, 10, ngram_range) for x in X])
+    assert_array_equal(encoder._get_murmur_hash_batch(X), expected)
+    with mock.patch("skrub._minhash_encoder._MURMUR_BATCH_SIZE", 7):
+        assert_array_equal(encoder._get_murmur_hash_batch(X), expected)
+
+
+def test_murmur_universal():
+    X = np.array(["paris, FR", "Paris", "London, UK", "London", "", "a"])[:, None]
+    encoder = MinHashEncoder(n_components=50, hashing="murmur_universal")
+    y = encoder.fit_transform(X)
+    assert y.shape == (6, 50)
+    assert ((y >= 0) & (y < 1)).all()
+    assert_array_equal(y[4], 0)
+
+    # Same result when the strings are encoded in several batches
+    X_large = generate_data(50, random_state=0, sample_length=10)
+    y_large = encoder.fit_transform(X_large)
+    with mock.patch("skrub._minhash_encoder._MURMUR_BATCH_SIZE", 7):
+        assert_array_equal(encoder.fit_transform(X_large), y_large)
+
+    # The n-grams are hashed and permuted by batches of strings, which bounds
+    # the size of the permuted hashes
+    get_hashes = encoder._get_ngram_murmur_hashes
+    with mock.patch("skrub._minhash_encoder._MURMUR_BATCH_SIZE", 7), mock.patch.object(
+        encoder, "_get_ngram_murmur_hashes", wraps=get_hashes
+    ) as mock_hashes:
+        y_batch = encoder._get_murmur_universal_hash_batch(X_large.ravel())
+    assert_array_equal(y_batch, y_large)
+    assert mock_hashes.call_count == len(X_large) // 7 + 1
+    for call in mock_hashes.call_args_list:
+        assert len(call.args[0]) <= 7
+
+    # The encoding is the min over the n-grams of the permuted hashes, so
+    # it can only decrease when n-grams are added, and two strings with the
+    # same n-grams have the same encoding
+    y = encoder.fit_transform(np.array(["abcd", "abcd ", "abcd abcd"])[:, None])
+    assert (y[2] <= y[0]).all()
+    assert_array_equal(y[0], y[1])
+
+
+def test_oph():
+    X = np.array(["paris, FR", "Paris", "London, UK", "London", "a"])[:, None]
+    encoder = MinHashEncoder(n_components=200, hashing="oph")
+    y = encoder.fit_transform(X)
+    assert y.shape == (5, 200)
+    # All the bins are filled, including for short strings which have fewer
+    # n-grams than bins
+    assert np.isfinite(y).all()
+    assert ((y >= 0) & (y < 200)).all()
+
+    # Strings sharing n-grams share components
+    agreement = (y[:, None] == y[None]).mean(axis=2)
+    assert agreement[0, 1] > 0.2
+    assert agreement[2, 3] > 0.2
+    assert agreement[0, 2] < 0.05
+
+
+def test_densify():
+    bins = np.array([[np.inf, 0.5, np.inf, np.inf, 0.25], [0.1, np.inf, 0.2, 0.3, 0.4]])
+    expected = np.array([[1.5, 0.5, 2.25, 1.25, 0.25], [0.1, 1.2, 0.2, 0.3, 0.4]])
+    assert_array_equal(_densify(bins), expected)
+
+
+def test_cache_size():
+    X = np.array(["a", "b", "c", "d", "e", "f", "g", "h"])[:, None]
+    encoder = MinHashEncoder(n_components=3, cache_size=5)
+    y = encoder.fit_transform(X)
+    assert len(encoder.hash_dict_.cache) == 5
+    assert_array_equal(y, MinHashEncoder(n_components=3).fit_transform(X))
+
+    with pytest.raises(ValueError, match=r"Got cache_size="):
+        MinHashEncoder(cache_size=0).fit(X)
+
+
+def test_cache_dir(tmp_path):
+    X = np.array(["a", "b", "c", None, "d", "e"], dtype=object)[:, None]
+    y = MinHashEncoder(n_components=3, cache_dir=tmp_path).fit_transform(X)
+
+    # Another encoder with the same parameters reuses the stored hashes
+    encoder = MinHashEncoder(n_components=3, cache_dir=tmp_path).fit(X)
+    assert len(encoder.hash_store_) == 5
+    with mock.patch.object(
+        MinHashEncoder, "_get_fast_hash_batch", side_effect=AssertionError
+    ):
+        assert_array_equal(encoder.transform(X), y)
+
+    # New strings are computed and stored, and are visible from other
+    # encoders, including unpickled ones
+    encoder2 = pickle.loads(pickle.dumps(encoder))
+    X2 = np.array(["a", "f", "g"])[:, None]
+    y2 = encoder.transform(X2)
+    assert_array_equal(y2, MinHashEncoder(n_components=3).fit_transform(X2))
+    assert len(encoder.hash_store_) == 7
+    encoder2.transform(X2)
+    assert len(encoder2.hash_store_) == 7
+
+    # Encoders with different parameters do not share hashes
+    encoder = MinHashEncoder(n_components=4, cache_dir=tmp_path).fit(X)
+    assert len(encoder.hash_store_) == 0
+
+
+def test_output_dtype():
+    X = generate_data(n_samples=20, random_state=0)
+    X[3, 0] = ""
+    y = MinHashEncoder(n_components=10).fit_transform(X)
+
+    y_32 = MinHashEncoder(n_components=10, output_dtype=np.float32).fit_transform(X)
+    assert y_32.dtype == np.float32
+    assert_allclose(y_32, y, rtol=1e-7)
+
+    y_int = MinHashEncoder(n_components=10, output_dtype=np.int32).fit_transform(X)
+    assert y_int.dtype == np.int32
+    assert_array_equal(y_int, y)
+
+    # b-bit hashes keep the lowest bits of the hashes
+    for dtype, n_bits in [(np.uint16, 16), (np.uint8, 8)]:
+        y_bits = MinHashEncoder(n_components=10, output_dtype=dtype).fit_transform(X)
+        assert y_bits.dtype == dtype
+        assert_array_equal(y_bits, y.astype(np.int64) % 2**n_bits)
+        assert_array_equal(y_bits[3], 0)
+
+    y_oph = MinHashEncoder(
+        n_components=10, hashing="oph", output_dtype="float32"
+    ).fit_transform(X)
+    assert y_oph.dtype == np.float32
+
+    with pytest.raises(ValueError, match=r"Got output_dtype="):
+        MinHashEncoder(output_dtype="aaa").fit(X)
+    with pytest.raises(ValueError, match=r"only supported with hashing='fast'"):
+        MinHashEncoder(output_dtype=np.uint8, hashing="murmur").fit(X)
+
+
+@pytest.mark.parametrize("minmax_hash", [False, True])
+def test_arrow_input(minmax_hash):
+    pa = pytest.importorskip("pyarrow")
+    values = ["paris, FR", "Paris", None, "", "日本語", "Zürich", "Paris", "NAN"]
+    expected = MinHashEncoder(n_components=4, minmax_hash=minmax_hash).fit_transform(
+        np.array(values, dtype=object)[:, None]
+    )
+    # Only the missing values are encoded with zeros, on both paths
+    assert_array_equal(np.flatnonzero(~expected.any(axis=1)), [2, 3])
+    y_python = MinHashEncoder(n_components=4, minmax_hash=minmax_hash).fit_transform(
+        pd.DataFrame({"a": values}, dtype="string[python]")
+    )
+    assert_array_equal(y_python, expected)
+
+    X_list = [
+        pd.DataFrame({"a": values}, dtype="string[pyarrow]"),
+        pd.DataFrame({"a": values}, dtype=pd.ArrowDtype(pa.string())),
+    ]
+    if POLARS_SETUP:
+        X_list.append(pl.DataFrame({"a": values}))
+    for X in X_list:
+        encoder = MinHashEncoder(n_components=4, minmax_hash=minmax_hash)
+        # The Arrow buffers are hashed directly, without Python strings
+        with mock.patch.object(
+            MinHashEncoder, "_get_fast_hash_batch", side_effect=AssertionError
+        ), mock.patch("skrub._minhash_encoder.check_input", side_effect=AssertionError):
+            y = encoder.fit_transform(X)
+        assert encoder.n_features_in_ == 1
+        assert_array_equal(y, expected)
+
+        y_2d = MinHashEncoder(n_components=4, output_dtype=np.int32).fit_transform(
+            X[["a", "a"]] if isinstance(X, pd.DataFrame) else X.select("a", b="a")
+        )
+        assert_array_equal(y_2d[:, :4], y_2d[:, 4:])
+        if not minmax_hash:
+            assert_array_equal(y_2d[:, :4], expected)
+
+        with pytest.raises(ValueError, match=r"Found missing values in input data"):
+            MinHashEncoder(handle_missing="error").fit_transform(X)
+
+
 def test_check_fitted_minhash_encoder():
     """Test that calling transform before fit raises an error"""
     encoder = MinHashEncoder(n_components=3)
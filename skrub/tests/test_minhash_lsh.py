@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+from sklearn.exceptions import NotFittedError
+from sklearn.utils.validation import check_is_fitted
+
+from skrub import MinHashEncoder, MinHashLSH
+from skrub._minhash_lsh import DEFAULT_ENCODER
+
+from .utils import generate_data
+
+
+def _brute_force_pairs(signatures, n_bands):
+    """Pairs of rows sharing at least one band, and their similarity."""
+    bands = np.split(signatures, n_bands, axis=1)
+    pairs, similarity = [], []
+    for i in range(signatures.shape[0]):
+        for j in range(i + 1, signatures.shape[0]):
+            if any((band[i] == band[j]).all() for band in bands):
+                pairs.append((i, j))
+                similarity.append((signatures[i] == signatures[j]).mean())
+    return np.asarray(pairs, dtype=np.int64).reshape(-1, 2), np.asarray(similarity)
+
+
+@pytest.mark.parametrize("minmax_hash", [False, True])
+@pytest.mark.parametrize("output_dtype", [np.float64, np.uint8])
+def test_candidate_pairs(minmax_hash, output_dtype):
+    X = generate_data(100, random_state=0).ravel()
+    X = np.concatenate([X, [x + "!" for x in X[:20]], X[:5]])
+    encoder = MinHashEncoder(
+        n_components=20, minmax_hash=minmax_hash, output_dtype=output_dtype
+    )
+    lsh = MinHashLSH(encoder=encoder, n_bands=10).fit(X)
+    assert lsh.rows_per_band_ == 2
+
+    pairs, similarity = lsh.candidate_pairs()
+    expected_pairs, expected_similarity = _brute_force_pairs(lsh.signatures_, 10)
+    assert_array_equal(pairs, expected_pairs)
+    assert_allclose(similarity, expected_similarity)
+    # Exact duplicates are always found
+    for i in range(5):
+        assert [i, 120 + i] in pairs.tolist()
+
+
+def test_query():
+    X = generate_data(100, random_state=0).ravel()
+    lsh = MinHashLSH(n_bands=15).fit(X)
+    queries = np.concatenate([X[:10], ["a string which is not in the index"]])
+    similarity = lsh.query(queries)
+    assert similarity.shape == (11, 100)
+
+    signatures = lsh.encoder_.transform(queries[:, None])
+    bands = np.split(signatures, 15, axis=1)
+    fit_bands = np.split(lsh.signatures_, 15, axis=1)
+    for i in range(11):
+        candidates = np.zeros(100, dtype=bool)
+        for band, fit_band in zip(bands, fit_bands):
+            candidates |= (band[i] == fit_band).all(axis=1)
+        row = similarity[i].toarray().ravel()
+        assert_array_equal(row != 0, candidates)
+        assert_allclose(
+            row[candidates], (signatures[i] == lsh.signatures_[candidates]).mean(1)
+        )
+    # Strings of the index are found with a similarity of 1
+    assert_array_equal(similarity[np.arange(10), np.arange(10)].A.ravel(), 1.0)
+
+
+def test_query_similar_strings():
+    X = ["Paris", "Paris, FR", "London", "London, UK", "Berlin"]
+    lsh = MinHashLSH(n_bands=15).fit(X)
+    similarity = lsh.query(["London, U.K."]).toarray()
+    assert similarity[0].argmax() == 3
+    assert similarity[0, [0, 1, 4]].max() == 0
+
+
+def test_missing_values():
+    X = ["Paris", None, "", "London", None, "Paris, FR", "", np.nan]
+    lsh = MinHashLSH(n_bands=15).fit(X)
+    # The missing values and empty strings are never candidates
+    pairs, similarity = lsh.candidate_pairs()
+    assert_array_equal(pairs, [[0, 5]])
+    assert (similarity < 1).all()
+
+    similarity = lsh.query(["", None, "Paris"])
+    assert similarity.shape == (3, 8)
+    assert similarity[:2].nnz == 0
+    assert_array_equal(similarity[2].indices, [0, 5])
+    # No explicit zeros are stored
+    assert (similarity.data != 0).all()
+
+    lsh = MinHashLSH().fit([None, ""])
+    pairs, similarity = lsh.candidate_pairs()
+    assert pairs.shape == (0, 2) and similarity.shape == (0,)
+    assert lsh.query(["Paris", None]).nnz == 0
+
+
+def test_default_encoder():
+    lsh = MinHashLSH()
+    assert lsh.encoder is not DEFAULT_ENCODER
+    lsh.fit(["a", "b"])
+    assert not hasattr(DEFAULT_ENCODER, "hash_dict_")
+
+
+def test_fitted_attributes():
+    lsh = MinHashLSH(n_bands=5).fit(["a", "b", None])
+    check_is_fitted(lsh, ["multipliers_", "band_sorted_keys_", "band_order_"])
+    assert lsh.multipliers_.shape == (lsh.rows_per_band_,)
+    # The missing value is not indexed
+    assert lsh.band_sorted_keys_.shape == lsh.band_order_.shape == (5, 2)
+
+
+def test_input_checks():
+    with pytest.raises(ValueError, match="multiple of n_bands"):
+        MinHashLSH(n_bands=7).fit(["a", "b"])
+    with pytest.raises(ValueError, match="n_bands"):
+        MinHashLSH(n_bands=0).fit(["a", "b"])
+    with pytest.raises(TypeError, match="MinHashEncoder"):
+        MinHashLSH(encoder="fast").fit(["a", "b"])
+    with pytest.raises(ValueError, match="1-dimensional"):
+        MinHashLSH().fit([["a"], ["b"]])
+    with pytest.raises(NotFittedError):
+        MinHashLSH().query(["a"])
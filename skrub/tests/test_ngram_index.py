@@ -0,0 +1,91 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+from sklearn.exceptions import NotFittedError
+
+from skrub import NgramIndex, SimilarityEncoder
+from skrub._utils import _expand_ranges
+
+
+def _random_strings(n_strings, max_length, rng):
+    characters = list("aab bc\tdEe") + [chr(i) for i in range(200, 205)]
+    return [
+        "".join(rng.choice(characters, rng.randint(max_length)))
+        for _ in range(n_strings)
+    ]
+
+
+@pytest.mark.parametrize("ngram_range", [(2, 4), (1, 1), (3, 6)])
+@pytest.mark.parametrize("k", [1, 5, 50])
+def test_same_as_similarity_encoder(ngram_range, k):
+    rng = np.random.RandomState(0)
+    vocabulary = np.unique(_random_strings(200, 20, rng))
+    queries = np.concatenate([_random_strings(50, 20, rng), vocabulary[:10]])
+    encoder = SimilarityEncoder(ngram_range=ngram_range).fit(vocabulary[:, None])
+    expected = encoder.transform(queries[:, None])
+
+    index = NgramIndex(ngram_range=ngram_range).fit(vocabulary)
+    indices, similarities = index.query(queries, k=k)
+    assert indices.shape == similarities.shape == (len(queries), k)
+    for i in range(len(queries)):
+        # By decreasing similarity, then increasing index
+        expected_indices = np.lexsort((np.arange(len(vocabulary)), -expected[i]))[:k]
+        assert_array_equal(indices[i], expected_indices)
+        assert_allclose(similarities[i], expected[i, expected_indices])
+
+
+@pytest.mark.parametrize("ngram_range", [(2, 4), (3, 3)])
+def test_queries_longer_than_vocabulary(ngram_range):
+    # The sizes of the queries are larger than the sizes of all the entries
+    X = [" ", "AéaaB  ", "a-    日a -", "aB", "bbbA ", "c", "日", "日éB aA   c"]
+    rng = np.random.RandomState(0)
+    queries = ["éBAaa c日 cA "] + [
+        "".join(rng.choice(list("aAbB c-é日"), 20)) for _ in range(20)
+    ]
+    encoder = SimilarityEncoder(ngram_range=ngram_range).fit(np.array(X)[:, None])
+    expected = encoder.transform(np.array(queries)[:, None])
+
+    indices, similarities = (
+        NgramIndex(ngram_range=ngram_range).fit(X).query(queries, k=len(X))
+    )
+    for i in range(len(queries)):
+        assert len(np.unique(indices[i])) == len(X)
+        expected_indices = np.lexsort((np.arange(len(X)), -expected[i]))
+        assert_array_equal(indices[i], expected_indices)
+        assert_allclose(similarities[i], expected[i, expected_indices])
+
+
+def test_pruning():
+    # Strings of very different lengths are not scored
+    vocabulary = ["ab" * i for i in range(1, 200)]
+    index = NgramIndex().fit(vocabulary)
+    scored = []
+
+    def record(starts, counts):
+        scored.append(counts.sum())
+        return _expand_ranges(starts, counts)
+
+    with mock.patch("skrub._ngram_index._expand_ranges", side_effect=record):
+        indices, similarities = index.query(["ab" * 100], k=1)
+    assert indices[0, 0] == 99
+    assert similarities[0, 0] == 1.0
+    assert sum(scored) < 0.2 * len(index._posting_keys)
+
+
+def test_no_shared_ngrams():
+    index = NgramIndex().fit(["aaa", "bbb", "ccc"])
+    indices, similarities = index.query(["bbb", "xyz"], k=3)
+    assert_array_equal(indices, [[1, 0, 2], [0, 1, 2]])
+    assert_array_equal(similarities, [[1.0, 0.0, 0.0], [0.0, 0.0, 0.0]])
+
+
+def test_input_checks():
+    with pytest.raises(NotFittedError):
+        NgramIndex().query(["a"])
+    index = NgramIndex().fit(["a", "b"])
+    with pytest.raises(ValueError, match="k=3"):
+        index.query(["a"], k=3)
+    with pytest.raises(ValueError, match="ngram_range"):
+        NgramIndex(ngram_range=(3, 2)).fit(["a"])
@@ -1,4 +1,6 @@
 import numpy as np
+from numpy.testing import assert_array_equal
+from scipy import sparse
 
 from skrub import _string_distances
 
@@ -47,3 +49,93 @@ def test_ngram_similarity() -> None:
     # assert ...
     for n in range(1, 4):
         _check_symmetry(_string_distances.ngram_similarity, n)
+
+
+def test_ngram_similarity_array() -> None:
+    strings1 = [a for a, _ in _random_string_pairs(seed=2)] + ["", " A  b "]
+    strings2 = [b for _, b in _random_string_pairs(seed=3)] + ["a b", "aab"]
+    for n in range(1, 4):
+        similarity = _string_distances.ngram_similarity(strings1, strings2, n)
+        assert similarity.shape == (len(strings1), len(strings2))
+        for i, a in enumerate(strings1):
+            for j, b in enumerate(strings2):
+                expected = _string_distances.ngram_similarity(a, b, n)
+                assert np.isclose(similarity[i, j], expected)
+        np.testing.assert_allclose(
+            _string_distances.ngram_similarity(strings1, strings2[0], n),
+            similarity[:, 0],
+        )
+        np.testing.assert_allclose(
+            _string_distances.ngram_similarity(strings1[0], strings2, n),
+            similarity[0],
+        )
+
+
+def test_ngram_similarity_no_ngrams() -> None:
+    # The strings without n-grams have a similarity of 0 on both paths
+    for string1, string2 in [("", ""), ("ab", "a"), ("", "ab")]:
+        for preprocess_strings in [True, False]:
+            similarity = _string_distances.ngram_similarity(
+                string1, string2, 5, preprocess_strings=preprocess_strings
+            )
+            assert similarity == 0.0
+            similarity = _string_distances.ngram_similarity(
+                [string1], [string2], 5, preprocess_strings=preprocess_strings
+            )
+            np.testing.assert_array_equal(similarity, [[0.0]])
+
+
+def test_min_intersection() -> None:
+    rng = np.random.RandomState(0)
+    counts1 = rng.poisson(0.5, size=(20, 30)) * (rng.rand(20, 30) < 0.3)
+    counts2 = rng.poisson(2.0, size=(10, 30)) * (rng.rand(10, 30) < 0.3)
+    expected = np.minimum(counts1[:, None, :], counts2[None, :, :]).sum(axis=2)
+    intersection = _string_distances.min_intersection(
+        sparse.csr_matrix(counts1), sparse.csr_matrix(counts2)
+    )
+    np.testing.assert_array_equal(intersection, expected)
+
+
+def test_get_ngram_count_array() -> None:
+    strings = ["", "a", "abc", "hello world"]
+    for ngram_range in [(2, 4), (1, 1), (3, 6)]:
+        counts = _string_distances.get_ngram_count(strings, ngram_range)
+        expected = [_string_distances.get_ngram_count(s, ngram_range) for s in strings]
+        np.testing.assert_array_equal(counts, expected)
+
+
+def test_get_ngram_ids() -> None:
+    strings = [a for a, _ in _random_string_pairs(seed=4)] + ["", "A  a", "a A"]
+    for ngram_range in [(2, 4), (1, 1), (3, 5)]:
+        indptr, ids = _string_distances.get_ngram_ids(strings, ngram_range)
+        assert ids.dtype == np.uint64
+        unique_indptr, unique_ids = _string_distances.get_ngram_ids(
+            strings, ngram_range, unique=True
+        )
+        all_ngrams = set()
+        for i, string in enumerate(strings):
+            ngrams = _string_distances.get_unique_ngrams(string, ngram_range)
+            all_ngrams |= ngrams
+            n_ngrams = sum(
+                len(_string_distances.get_ngrams(string, n))
+                for n in range(ngram_range[0], ngram_range[1] + 1)
+            )
+            assert indptr[i + 1] - indptr[i] == n_ngrams
+            string_ids = unique_ids[unique_indptr[i] : unique_indptr[i + 1]]
+            assert len(string_ids) == len(ngrams)
+            assert (np.diff(string_ids.astype(float)) > 0).all()
+        # One ID per distinct n-gram
+        assert len(np.unique(ids)) == len(all_ngrams)
+    # The two last strings have the same n-grams
+    assert_array_equal(unique_ids[unique_indptr[-3] : unique_indptr[-2]], string_ids)
+
+
+def test_get_ngram_vocabulary() -> None:
+    strings = [a for a, _ in _random_string_pairs(seed=5)] + ["", "Aa  a"]
+    indptr, gram_ids, grams = _string_distances.get_ngram_vocabulary(strings, (2, 4))
+    assert len(set(grams)) == len(grams)
+    for i, string in enumerate(strings):
+        expected = _string_distances.get_unique_ngrams(string, (2, 4))
+        string_grams = [grams[j] for j in gram_ids[indptr[i] : indptr[i + 1]]]
+        assert len(string_grams) == len(expected)
+        assert set(string_grams) == {"".join(gram) for gram in expected}
@@ -1,8 +1,16 @@
 from inspect import ismodule
 
+import numpy as np
 import pytest
+from numpy.testing import assert_array_equal
 
-from skrub._utils import LRUDict, import_optional_dependency
+from skrub._utils import (
+    ArrayDict,
+    LRUDict,
+    MmapDict,
+    _expand_ranges,
+    import_optional_dependency,
+)
 
 
 def test_lrudict():
@@ -33,3 +41,118 @@ def test_import_optional_dependency():
     # smoke test for an available dependency
     sklearn_module = import_optional_dependency("sklearn")
     assert ismodule(sklearn_module)
+
+
+def test_mmapdict(tmp_path):
+    dict_ = MmapDict(tmp_path)
+    dict_.update(["a", "b"], np.arange(6.0).reshape(2, 3))
+    assert "a" in dict_ and "c" not in dict_
+    assert_array_equal(dict_["b"], [3.0, 4.0, 5.0])
+
+    # Chunks written by another instance are seen after a refresh
+    other = MmapDict(tmp_path)
+    assert len(other) == 2
+    other.update(["c"], np.ones((1, 3)))
+    assert "c" not in dict_
+    dict_.refresh()
+    assert_array_equal(dict_["c"], [1.0, 1.0, 1.0])
+    assert len(list(tmp_path.glob("*.tmp"))) == 0
+
+
+def test_mmapdict_compaction(tmp_path):
+    dict_ = MmapDict(tmp_path, max_chunks=4)
+    other = MmapDict(tmp_path, max_chunks=4)
+    for i in range(50):
+        dict_.update([f"a{i}"], np.full((1, 2), i, dtype=float))
+        other.update([f"b{i}"], np.full((1, 2), -i, dtype=float))
+        # The number of chunks stays bounded after many small updates
+        assert len(list(tmp_path.glob("*.keys.npy"))) <= 5
+        assert len(list(tmp_path.glob("*.npy"))) <= 15
+        assert len(dict_._chunks) <= 5 and len(other._chunks) <= 5
+    for instance in [dict_, other]:
+        instance.refresh()
+        assert len(instance) == 100
+        assert_array_equal(instance["a7"], [7.0, 7.0])
+        assert_array_equal(instance["b7"], [-7.0, -7.0])
+
+    dict_.compact()
+    assert len(list(tmp_path.glob("*.keys.npy"))) == 1
+    assert len(MmapDict(tmp_path)) == 100
+    # The instance which did not compact rebuilds its index on refresh
+    other.refresh()
+    assert len(other._chunks) == 1
+    assert_array_equal(other["a49"], [49.0, 49.0])
+    assert len(list(tmp_path.glob("*.tmp"))) == 0
+
+
+def test_arraydict():
+    dict_ = ArrayDict(3)
+    dict_.update(np.array(["a", "b"]), np.arange(6.0).reshape(2, 3))
+    assert "a" in dict_ and "c" not in dict_
+    assert_array_equal(dict_["b"], [3.0, 4.0, 5.0])
+
+    # Existing keys are updated in place, new keys are appended
+    dict_.update(np.array(["c", "a"]), np.ones((2, 3)))
+    assert len(dict_) == 3
+    assert dict_.keys() == ["a", "b", "c"]
+    assert_array_equal(dict_.rows(np.array(["c", "d", "a"])), [2, -1, 0])
+    assert_array_equal(dict_.get(np.array(["c", "b"])), [[1.0] * 3, [3.0, 4.0, 5.0]])
+    with pytest.raises(KeyError, match="d"):
+        dict_.get(np.array(["a", "d"]))
+
+    # The values returned are copies
+    dict_.get(np.array(["a"]))[:] = 0.0
+    dict_["a"][:] = 0.0
+    assert_array_equal(dict_["a"], [1.0, 1.0, 1.0])
+
+
+def test_arraydict_eviction():
+    dict_ = ArrayDict(2, capacity=3)
+    dict_.update(np.array(["a", "b"]), np.zeros((2, 2)))
+    dict_.update(np.array(["c"]), np.ones((1, 2)))
+    dict_.update(np.array(["a"]), np.full((1, 2), 2.0))
+    # "b" is the least recently updated key
+    dict_.update(np.array(["d"]), np.full((1, 2), 3.0))
+    assert len(dict_) == 3 and "b" not in dict_
+    assert sorted(dict_.keys()) == ["a", "c", "d"]
+    assert_array_equal(dict_.get(np.array(["a", "c", "d"]))[:, 0], [2.0, 1.0, 3.0])
+    assert dict_.values.shape == (3, 2)
+
+    # Evict several keys at once
+    dict_.update(np.array(["e", "f"]), np.full((2, 2), 4.0))
+    assert sorted(dict_.keys()) == ["d", "e", "f"]
+    for key in dict_.keys():
+        assert_array_equal(dict_[key], dict_.values[dict_.rows([key])[0]])
+
+
+def test_mmapdict_size_tiered(tmp_path):
+    # Small updates only merge small chunks, and leave the large one as is
+    dict_ = MmapDict(tmp_path, max_chunks=4)
+    dict_.update([f"a{i}" for i in range(1000)], np.zeros((1000, 2)))
+    (large,) = dict_._chunks
+    for i in range(50):
+        dict_.update([f"b{i}"], np.ones((1, 2)))
+        assert large in dict_._chunks
+        assert len(dict_._chunks) <= 4
+    assert len(dict_) == 1050
+    assert_array_equal(dict_["b3"], [1.0, 1.0])
+
+
+def test_mmapdict_keys(tmp_path):
+    # Keys of any length and any characters are stored without padding
+    keys = ["", "a", "é" * 1000, "\x00b", "\ud800", "日本"]
+    dict_ = MmapDict(tmp_path)
+    dict_.update(keys, np.arange(6.0)[:, None])
+    other = MmapDict(tmp_path)
+    for i, key in enumerate(keys):
+        assert_array_equal(other[key], [float(i)])
+    (keys_file,) = tmp_path.glob("*.keys.npy")
+    assert np.load(keys_file).nbytes == sum(
+        len(key.encode("utf-8", "surrogatepass")) for key in keys
+    )
+
+
+def test_expand_ranges():
+    starts, counts = np.array([5, 0, 2]), np.array([2, 0, 3])
+    assert_array_equal(_expand_ranges(starts, counts), [5, 6, 2, 3, 4])
+    assert _expand_ranges(starts[:0], counts[:0]).size == 0